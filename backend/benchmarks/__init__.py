@@ -0,0 +1,9 @@
+"""
+Benchmarks de desempenho
+
+Executar a partir do diretório backend, por exemplo:
+    python -m benchmarks.bench_importacao --linhas 20000
+
+benchmarks.suite mede todos os endpoints sobre dados gerados por
+benchmarks.dados e grava os resultados em JSON para comparação entre commits.
+"""
@@ -0,0 +1,83 @@
+"""
+Benchmark - Conversão de data_atividade
+
+Mede conversões por segundo de datas ISO 8601 nas formas recebidas pela API
+e pela importação (sem fuso, 'Z' com milissegundos do toISOString() do
+navegador e com offset), comparando:
+- a conversão anterior do serviço (descartava o offset);
+- fromisoformat + conversão para UTC (caminho lento de utils/datas.py);
+- converter_iso8601 (caminho rápido pré-compilado).
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from utils.datas import converter_iso8601, para_utc
+
+
+def converter_antigo(data_str):
+    """Conversão usada pelo serviço antes de utils/datas.py"""
+    try:
+        data_str = data_str.rstrip('Z')
+        if '+' in data_str:
+            data_str = data_str.split('+')[0]
+        elif data_str.count('-') > 2:
+            parts = data_str.rsplit('-', 2)
+            if len(parts) == 3 and ':' in parts[2]:
+                data_str = '-'.join(parts[:2])
+        return datetime.fromisoformat(data_str)
+    except (ValueError, AttributeError):
+        return datetime.utcnow()
+
+
+def converter_lento(texto):
+    if texto.endswith('Z'):
+        # fromisoformat só aceita 'Z' a partir do Python 3.11
+        texto = texto[:-1] + '+00:00'
+    return para_utc(datetime.fromisoformat(texto))
+
+
+def gerar_datas(quantidade, semente=42):
+    aleatorio = random.Random(semente)
+    inicio = datetime(2020, 1, 1)
+    formas = (
+        lambda d: d.isoformat(timespec='seconds'),
+        lambda d: d.isoformat(timespec='milliseconds') + 'Z',
+        lambda d: d.isoformat(timespec='seconds') + '-03:00',
+        lambda d: d.isoformat(timespec='minutes') + '+05:30',
+    )
+    return [
+        aleatorio.choice(formas)(inicio + timedelta(minutes=aleatorio.randint(0, 5 * 365 * 24 * 60)))
+        for _ in range(quantidade)
+    ]
+
+
+def medir(funcao, datas, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for texto in datas:
+            funcao(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return len(datas) / melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--datas', type=int, default=100000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+    
+    datas = gerar_datas(args.datas)
+    assert [converter_iso8601(d) for d in datas] == [converter_lento(d) for d in datas]
+    
+    print(f"{'conversor':<22} {'datas/s':>12}")
+    for nome, funcao in (('anterior', converter_antigo), ('fromisoformat + UTC', converter_lento),
+                         ('converter_iso8601', converter_iso8601)):
+        print(f'{nome:<22} {medir(funcao, datas, args.repeticoes):>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark - Escritores concorrentes no SQLite
+
+N threads (8 por padrão), cada uma com seu cliente de teste, criam
+atividades ao mesmo tempo em um banco em arquivo; metade escreve para o mesmo
+usuário. Compara o engine sem ajustes, a configuração padrão (PRAGMAs de
+SQLITE_PRAGMAS e BEGIN IMMEDIATE) e o escritor único com commits em lote
+(ESCRITA_SERIALIZADA), informando escritas/s, respostas diferentes de 201
+e erros "database is locked".
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from server import create_app
+from models.models import db
+
+CONFIGURACOES = (
+    ('sem ajustes', {'SQLITE_PRAGMAS': {}, 'SQLITE_BEGIN_IMEDIATO': False}),
+    ('pragmas + immediate', {}),
+    ('escritor único', {'ESCRITA_SERIALIZADA': True}),
+)
+
+
+def executar(config_extra, threads, escritas, diretorio):
+    caminho = os.path.join(diretorio, f'bench{len(os.listdir(diretorio))}.db')
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + caminho, **config_extra})
+    # Erros do banco viram 500 em vez de exceções na thread
+    app.config['TESTING'] = False
+    
+    clientes = []
+    for i in range(threads):
+        client = app.test_client()
+        email = 'compartilhado@bench.com' if i < threads // 2 else f'usuario{i}@bench.com'
+        dados = {'nome': 'Bench', 'email': email, 'senha': 'Senha123!'}
+        if client.post('/api/auth/registrar', json=dados).status_code != 201:
+            client.post('/api/auth/login', json=dados)
+        clientes.append(client)
+    
+    status = []
+    bloqueios = []
+    trava = threading.Lock()
+    barreira = threading.Barrier(threads)
+    
+    def escrever(client):
+        barreira.wait()
+        for i in range(escritas):
+            response = client.post('/api/atividades', json={
+                'tipo': 'corrida', 'duracao': 30, 'data_atividade': f'2024-01-{(i % 28) + 1:02d}T07:00:00'
+            })
+            with trava:
+                status.append(response.status_code)
+                if b'locked' in response.get_data():
+                    bloqueios.append(response.status_code)
+    
+    grupo = [threading.Thread(target=escrever, args=(c,)) for c in clientes]
+    inicio = time.perf_counter()
+    for thread in grupo:
+        thread.start()
+    for thread in grupo:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    
+    escritor = app.extensions['servicos'].escritor
+    if escritor is not None:
+        escritor.encerrar()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    return len(status) / duracao, len(status) - status.count(201), len(bloqueios)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--escritas', type=int, default=50, help='escritas por thread')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        print(f"{'configuração':<22} {'escritas/s':>10} {'falhas':>7} {'locked':>7}")
+        for nome, config_extra in CONFIGURACOES:
+            vazao, falhas, bloqueios = executar(config_extra, args.threads, args.escritas, diretorio)
+            print(f'{nome:<22} {vazao:>10.1f} {falhas:>7} {bloqueios:>7}')
+
+
+if __name__ == '__main__':
+    main()
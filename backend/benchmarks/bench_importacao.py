@@ -0,0 +1,99 @@
+"""
+Benchmark - Importação em lote de atividades
+
+Mede linhas por segundo de POST /api/atividades/importar para CSV e NDJSON
+e, com --memoria, o pico de memória alocada durante a requisição, que deve
+ficar estável com o aumento do arquivo.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from server import create_app
+from models.models import db
+
+TIPOS = ['corrida', 'caminhada', 'ciclismo', 'musculacao', 'natacao', 'artesmarciais', 'yoga']
+INTENSIDADES = ['baixa', 'moderada', 'alta']
+
+
+def gerar_registros(quantidade, semente=42):
+    aleatorio = random.Random(semente)
+    inicio = datetime(2020, 1, 1)
+    for i in range(quantidade):
+        yield {
+            'tipo': aleatorio.choice(TIPOS),
+            'duracao': aleatorio.randint(10, 120),
+            'distancia': round(aleatorio.uniform(0, 20), 2),
+            'intensidade': aleatorio.choice(INTENSIDADES),
+            'data_atividade': (inicio + timedelta(hours=i * 3)).isoformat()
+        }
+
+
+def gerar_csv(quantidade):
+    cabecalho = 'tipo,duracao,distancia,intensidade,data_atividade\n'
+    return (cabecalho + ''.join(
+        f"{r['tipo']},{r['duracao']},{r['distancia']},{r['intensidade']},{r['data_atividade']}\n"
+        for r in gerar_registros(quantidade)
+    )).encode('utf-8')
+
+
+def gerar_ndjson(quantidade):
+    return ''.join(json.dumps(r) + '\n' for r in gerar_registros(quantidade)).encode('utf-8')
+
+
+def medir(formato, corpo, linhas, tamanho_lote, rastrear_memoria=False):
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(diretorio, 'bench.db'),
+            'IMPORTACAO_TAMANHO_LOTE': tamanho_lote
+        })
+        with app.app_context():
+            client = app.test_client()
+            client.post('/api/auth/registrar', json={
+                'nome': 'Bench', 'email': 'bench@test.com', 'senha': 'Senha123!'
+            })
+            
+            # tracemalloc deixa a importação bem mais lenta: só é ligado sob demanda
+            if rastrear_memoria:
+                tracemalloc.start()
+            inicio = time.perf_counter()
+            response = client.post(f'/api/atividades/importar?formato={formato}', data=corpo)
+            duracao = time.perf_counter() - inicio
+            pico = None
+            if rastrear_memoria:
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            
+            resultado = json.loads(response.data)
+            assert resultado['importadas'] == linhas, resultado
+            db.session.remove()
+            db.engine.dispose()
+    
+    return duracao, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[5000, 20000])
+    parser.add_argument('--lote', type=int, default=500)
+    parser.add_argument('--memoria', action='store_true', help='Mede o pico de memória (mais lento)')
+    args = parser.parse_args()
+    
+    print(f"{'formato':<8} {'linhas':>8} {'segundos':>9} {'linhas/s':>10} {'pico (MB)':>10}")
+    for linhas in args.linhas:
+        # O corpo é montado fora da medição de memória
+        for formato, gerar in (('csv', gerar_csv), ('ndjson', gerar_ndjson)):
+            corpo = gerar(linhas)
+            duracao, pico = medir(formato, corpo, linhas, args.lote, args.memoria)
+            memoria = f'{pico / 2**20:>10.1f}' if pico is not None else f"{'-':>10}"
+            print(f'{formato:<8} {linhas:>8} {duracao:>9.2f} {linhas / duracao:>10.0f} {memoria}')
+
+
+if __name__ == '__main__':
+    main()
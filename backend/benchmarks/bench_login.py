@@ -0,0 +1,87 @@
+"""
+Benchmark - Vazão de login e latência das demais rotas durante um pico
+
+Várias threads fazem login ao mesmo tempo enquanto outra consulta
+/api/health; compara o hash na própria thread (SENHA_PROCESSOS=0) com o pool
+de processos. Logins recusados com 503 (fila cheia) são contados à parte.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from server import create_app
+from models.models import db
+
+
+def medir(processos, threads, logins_por_thread, metodo, fila_maxima):
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(diretorio, 'bench.db'),
+            'SENHA_METODO': metodo,
+            'SENHA_PROCESSOS': processos,
+            'SENHA_FILA_MAXIMA': fila_maxima
+        })
+        credenciais = {'email': 'bench@test.com', 'senha': 'Senha123!'}
+        app.test_client().post('/api/auth/registrar', json={'nome': 'Bench', **credenciais})
+        # Aquece o pool para não medir a criação dos processos
+        app.test_client().post('/api/auth/login', json=credenciais)
+        
+        status = []
+        latencias_health = []
+        terminou = threading.Event()
+        
+        def logar():
+            client = app.test_client()
+            for _ in range(logins_por_thread):
+                status.append(client.post('/api/auth/login', json=credenciais).status_code)
+        
+        def sondar():
+            client = app.test_client()
+            while not terminou.is_set():
+                inicio = time.perf_counter()
+                client.get('/api/health')
+                latencias_health.append(time.perf_counter() - inicio)
+                time.sleep(0.005)
+        
+        sonda = threading.Thread(target=sondar)
+        sonda.start()
+        trabalhadores = [threading.Thread(target=logar) for _ in range(threads)]
+        inicio = time.perf_counter()
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+        duracao = time.perf_counter() - inicio
+        terminou.set()
+        sonda.join()
+        
+        app.extensions['senhas'].encerrar()
+        with app.app_context():
+            db.engine.dispose()
+    
+    aceitos = status.count(200)
+    p95 = statistics.quantiles(latencias_health, n=20)[-1] if len(latencias_health) > 1 else 0
+    return aceitos / duracao, status.count(503), p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--processos', type=int, nargs='+', default=[0, 2, 4])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=10, help='Logins por thread')
+    parser.add_argument('--metodo', default='pbkdf2:sha256:600000')
+    parser.add_argument('--fila', type=int, default=64)
+    args = parser.parse_args()
+    
+    print(f"{'processos':>9} {'logins/s':>9} {'503':>5} {'health p95 (ms)':>16}")
+    for processos in args.processos:
+        vazao, recusados, p95 = medir(processos, args.threads, args.logins, args.metodo, args.fila)
+        print(f'{processos:>9} {vazao:>9.1f} {recusados:>5} {p95:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
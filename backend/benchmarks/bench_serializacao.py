@@ -0,0 +1,103 @@
+"""
+Benchmark - Serialização de atividades para JSON
+
+Serializa N atividades (10.000 por padrão) e compara:
+- serialize() do modelo + JSON indentado (jsonify em DEBUG antes da mudança);
+- serialize() do modelo + JSON compacto;
+- serializador pré-compilado sobre objetos ORM + JSON compacto;
+- serializador pré-compilado sobre tuplas de select() + JSON compacto.
+
+Os objetos e tuplas são carregados antes da medição: só a serialização é medida.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+
+from server import create_app
+from models.models import db, Atividade
+from utils.serializacao import JSONCompacto, compilar
+
+TIPOS = ['corrida', 'caminhada', 'ciclismo', 'musculacao', 'natacao', 'artesmarciais', 'yoga']
+INTENSIDADES = ['baixa', 'moderada', 'alta']
+
+
+def popular(quantidade, semente=42):
+    aleatorio = random.Random(semente)
+    inicio = datetime(2020, 1, 1)
+    criacao = datetime(2024, 1, 1)
+    db.session.add_all([
+        Atividade(
+            usuario_id=1,
+            tipo=aleatorio.choice(TIPOS),
+            duracao=aleatorio.randint(10, 120),
+            distancia=round(aleatorio.uniform(0, 20), 2),
+            intensidade=aleatorio.choice(INTENSIDADES),
+            calorias_queimadas=round(aleatorio.uniform(50, 1200), 1),
+            data_atividade=inicio + timedelta(hours=i * 3),
+            # Como numa importação em lote: muitas linhas com a mesma data de criação
+            data_criacao=criacao + timedelta(seconds=i // 500),
+            observacoes=aleatorio.choice([None, 'treino leve', 'série intervalada de 8x400m'])
+        )
+        for i in range(quantidade)
+    ])
+    db.session.commit()
+
+
+def medir(funcao, repeticoes):
+    """Melhor tempo (ms) entre as repetições e o tamanho da saída em bytes"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, len(saida.encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--atividades', type=int, default=10000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(diretorio, 'bench.db')})
+        with app.app_context():
+            popular(args.atividades)
+            campos = Atividade.CAMPOS
+            objetos = Atividade.query.order_by(Atividade.id).all()
+            tuplas = db.session.execute(
+                select(*(getattr(Atividade, campo) for campo in campos)).order_by(Atividade.id)
+            ).all()
+            
+            padrao = DefaultJSONProvider(app)
+            compacto = JSONCompacto(app)
+            de_objetos = compilar(campos)
+            de_tuplas = compilar(campos, 'tupla')
+            
+            caminhos = (
+                ('serialize + indentado', lambda: padrao.dumps([a.serialize() for a in objetos], indent=2)),
+                ('serialize + compacto', lambda: compacto.dumps([a.serialize() for a in objetos])),
+                ('compilado objetos', lambda: compacto.dumps(list(map(de_objetos, objetos)))),
+                ('compilado tuplas', lambda: compacto.dumps(list(map(de_tuplas, tuplas)))),
+            )
+            
+            assert [a.serialize() for a in objetos] == list(map(de_objetos, objetos)) == list(map(de_tuplas, tuplas))
+            
+            print(f"{'caminho':<24} {'ms':>8} {'µs/linha':>9} {'bytes':>10}")
+            for nome, funcao in caminhos:
+                ms, tamanho = medir(funcao, args.repeticoes)
+                print(f'{nome:<24} {ms:>8.1f} {ms * 1000 / args.atividades:>9.2f} {tamanho:>10}')
+            
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark - Custo por requisição da obtenção dos serviços
+
+Compara a montagem de repositórios e serviços a cada requisição (fábrica
+antiga das rotas) com a leitura do container criado em create_app, tanto
+isoladamente quanto em requisições completas a GET /api/atividades/resumo/stats.
+"""
+
+import argparse
+import time
+
+import routes.atividades_refatorada as rotas_atividades
+from server import create_app
+from models.models import db
+from repositories.base_repository import AtividadeRepository, EstatisticasRepository, UsuarioRepository
+from services.container import obter_servicos
+from services.usuario_service import AtividadeService
+
+
+def fabrica_por_requisicao():
+    """Fábrica usada pelas rotas antes do container"""
+    return AtividadeService(AtividadeRepository(db), UsuarioRepository(db), EstatisticasRepository(db))
+
+
+def fabrica_container():
+    return obter_servicos().atividade_service
+
+
+def medir_fabrica(app, fabrica, repeticoes):
+    """Microssegundos por obtenção do serviço dentro de um contexto de requisição"""
+    with app.test_request_context():
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            fabrica()
+        return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def medir_requisicoes(app, fabrica, requisicoes):
+    """Microssegundos por requisição completa usando a fábrica informada"""
+    original = rotas_atividades.get_atividade_service
+    rotas_atividades.get_atividade_service = fabrica
+    try:
+        client = app.test_client()
+        client.post('/api/auth/registrar', json={
+            'nome': 'Bench', 'email': f'bench{id(fabrica)}@test.com', 'senha': 'Senha123!'
+        })
+        client.get('/api/atividades/resumo/stats')
+        inicio = time.perf_counter()
+        for _ in range(requisicoes):
+            client.get('/api/atividades/resumo/stats')
+        return (time.perf_counter() - inicio) / requisicoes * 1e6
+    finally:
+        rotas_atividades.get_atividade_service = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticoes', type=int, default=100000)
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    args = parser.parse_args()
+    
+    app = create_app('testing')
+    fabricas = (('por requisição', fabrica_por_requisicao), ('container', fabrica_container))
+    
+    print(f"{'fábrica':<16} {'obtenção (µs)':>14} {'requisição (µs)':>16}")
+    for nome, fabrica in fabricas:
+        obtencao = medir_fabrica(app, fabrica, args.repeticoes)
+        requisicao = medir_requisicoes(app, fabrica, args.requisicoes)
+        print(f'{nome:<16} {obtencao:>14.2f} {requisicao:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark - Custo da sessão por requisição em cada SESSION_BACKEND
+
+Mede microssegundos por requisição autenticada que só lê a sessão
+(GET /api/auth/usuario-atual) e por ciclo que a altera (logout + login),
+comparando com /api/health, que não toca na sessão.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from server import create_app
+from models.models import db
+
+BACKENDS = ['filesystem', 'memoria', 'sqlite', 'cookie']
+CREDENCIAIS = {'email': 'bench@test.com', 'senha': 'Senha123!'}
+
+
+def por_requisicao(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def medir(backend, repeticoes):
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(diretorio, 'bench.db'),
+            'SESSION_BACKEND': backend,
+            'SESSION_FILE_DIR': os.path.join(diretorio, 'flask_session'),
+            'SESSION_SQLITE_CAMINHO': os.path.join(diretorio, 'sessoes.db')
+        })
+        client = app.test_client()
+        client.post('/api/auth/registrar', json={'nome': 'Bench', **CREDENCIAIS})
+        
+        def escrever():
+            client.post('/api/auth/logout')
+            client.post('/api/auth/login', json=CREDENCIAIS)
+        
+        base = por_requisicao(lambda: client.get('/api/health'), repeticoes)
+        leitura = por_requisicao(lambda: client.get('/api/auth/usuario-atual'), repeticoes)
+        escrita = por_requisicao(escrever, repeticoes // 4) / 2
+        with app.app_context():
+            db.engine.dispose()
+    return base, leitura, escrita
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backends', nargs='+', default=BACKENDS, choices=BACKENDS)
+    parser.add_argument('--repeticoes', type=int, default=2000)
+    args = parser.parse_args()
+    
+    print(f"{'backend':<11} {'health (µs)':>12} {'leitura (µs)':>13} {'escrita (µs)':>13}")
+    for backend in args.backends:
+        base, leitura, escrita = medir(backend, args.repeticoes)
+        print(f'{backend:<11} {base:>12.0f} {leitura:>13.0f} {escrita:>13.0f}')
+
+
+if __name__ == '__main__':
+    main()
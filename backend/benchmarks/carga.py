@@ -0,0 +1,239 @@
+"""
+Teste de carga - Servidor WSGI local com usuários virtuais concorrentes
+
+Sobe create_app('production') em um servidor WSGI com threads do Werkzeug
+(make_server(threaded=True)), em uma porta livre, com banco e sessões em um
+diretório temporário e dados de benchmarks.dados. Para cada nível de
+concorrência, um pool de threads de usuários virtuais, cada um com seu
+próprio cookie jar, faz login e repete por --duracao segundos uma mistura
+ponderada de chamadas:
+    login, listar, criar, atualizar, stats
+(--mix 'login=1,listar=10,criar=3,atualizar=2,stats=4').
+
+Relata por nível requisições/s, latências p50/p95/p99, taxa de erros e erros
+"database is locked" (contados no servidor pelo sinal got_request_exception),
+mostrando onde a aplicação satura:
+    python -m benchmarks.carga --concorrencia 1,4,16,32 --duracao 10
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+from flask import got_request_exception
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from server import create_app
+from models.models import db
+from benchmarks.dados import SENHA, popular
+
+MIX_PADRAO = 'login=1,listar=10,criar=3,atualizar=2,stats=4'
+NOVA_ATIVIDADE = {'tipo': 'corrida', 'duracao': 30, 'distancia': 5, 'intensidade': 'moderada',
+                  'data_atividade': '2024-06-01T07:00:00'}
+
+
+class UsuarioVirtual:
+    """Cliente HTTP com cookie jar próprio, logado como um usuário gerado"""
+    
+    def __init__(self, base: str, email: str):
+        self.base = base
+        self.email = email
+        self.cliente = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.atividade_id = None
+    
+    def requisitar(self, metodo: str, caminho: str, dados=None):
+        """(status, corpo JSON ou None) de uma chamada; erros HTTP não são exceções"""
+        corpo = json.dumps(dados).encode() if dados is not None else None
+        requisicao = urllib.request.Request(self.base + caminho, data=corpo, method=metodo)
+        if corpo is not None:
+            requisicao.add_header('Content-Type', 'application/json')
+        try:
+            with self.cliente.open(requisicao, timeout=60) as resposta:
+                return resposta.status, json.loads(resposta.read() or b'null')
+        except urllib.error.HTTPError as erro:
+            erro.read()
+            return erro.code, None
+    
+    def login(self):
+        return self.requisitar('POST', '/api/auth/login', {'email': self.email, 'senha': SENHA})
+    
+    def listar(self):
+        return self.requisitar('GET', '/api/atividades?por_pagina=20')
+    
+    def criar(self):
+        status, corpo = self.requisitar('POST', '/api/atividades', NOVA_ATIVIDADE)
+        if status == 201:
+            self.atividade_id = corpo['atividade']['id']
+        return status, corpo
+    
+    def atualizar(self):
+        if self.atividade_id is None:
+            return self.criar()
+        return self.requisitar('PUT', f'/api/atividades/{self.atividade_id}', {'duracao': random.randint(20, 90)})
+    
+    def stats(self):
+        return self.requisitar('GET', '/api/atividades/resumo/stats')
+
+
+def ler_mix(texto: str) -> Dict[str, int]:
+    mix = {}
+    for parte in texto.split(','):
+        nome, _, peso = parte.partition('=')
+        if not hasattr(UsuarioVirtual, nome.strip()):
+            raise SystemExit(f'Operação desconhecida no mix: {nome}')
+        mix[nome.strip()] = int(peso or 1)
+    return mix
+
+
+class _SemLogDeAcesso(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class Servidor:
+    """Aplicação de produção em um servidor WSGI com threads, em segundo plano"""
+    
+    def __init__(self, diretorio: str, config_extra: Dict):
+        self.app = create_app('production', {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(diretorio, 'carga.db'),
+            'SESSION_SQLITE_CAMINHO': os.path.join(diretorio, 'sessoes.db'),
+            'CACHE_BACKEND': 'local',
+            **config_extra
+        })
+        self.bloqueios = 0
+        self.excecoes = Counter()
+        got_request_exception.connect(self._registrar_excecao, self.app)
+        self.servidor = make_server('127.0.0.1', 0, self.app, threaded=True, request_handler=_SemLogDeAcesso)
+        self.base = f'http://127.0.0.1:{self.servidor.server_port}'
+        self._thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+    
+    def _registrar_excecao(self, sender, exception, **extra):
+        self.excecoes[type(exception).__name__] += 1
+        if 'database is locked' in str(exception):
+            self.bloqueios += 1
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.servidor.shutdown()
+        self._thread.join()
+        escritor = self.app.extensions['servicos'].escritor
+        if escritor is not None:
+            escritor.encerrar()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+def percentil(amostras: List[float], p: int) -> float:
+    if len(amostras) < 2:
+        return amostras[0] if amostras else 0.0
+    return statistics.quantiles(amostras, n=100, method='inclusive')[p - 1]
+
+
+def executar_nivel(servidor: Servidor, usuarios: int, concorrencia: int, mix: Dict[str, int], duracao: float) -> Dict:
+    """Roda concorrencia usuários virtuais por duracao segundos e resume o resultado"""
+    operacoes, pesos = zip(*mix.items())
+    latencias = defaultdict(list)
+    status = Counter()
+    trava = threading.Lock()
+    bloqueios_antes = servidor.bloqueios
+    barreira = threading.Barrier(concorrencia + 1)
+    fim = [0.0]
+    
+    def virtual(indice):
+        aleatorio = random.Random(indice)
+        usuario = UsuarioVirtual(servidor.base, f'usuario{indice % usuarios}@bench.com')
+        usuario.login()
+        barreira.wait()
+        while time.perf_counter() < fim[0]:
+            operacao = aleatorio.choices(operacoes, pesos)[0]
+            inicio = time.perf_counter()
+            try:
+                codigo, _ = getattr(usuario, operacao)()
+            except OSError:
+                codigo = 'conexão'
+            tempo = (time.perf_counter() - inicio) * 1000
+            with trava:
+                latencias[operacao].append(tempo)
+                status[codigo] += 1
+    
+    threads = [threading.Thread(target=virtual, args=(i,)) for i in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    fim[0] = time.perf_counter() + duracao
+    barreira.wait()
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+    
+    todas = [tempo for tempos in latencias.values() for tempo in tempos]
+    erros = sum(quantidade for codigo, quantidade in status.items() if not isinstance(codigo, int) or codigo >= 400)
+    return {
+        'concorrencia': concorrencia,
+        'requisicoes': len(todas),
+        'req_s': round(len(todas) / decorrido, 1),
+        'p50_ms': round(percentil(todas, 50), 2),
+        'p95_ms': round(percentil(todas, 95), 2),
+        'p99_ms': round(percentil(todas, 99), 2),
+        'taxa_erros': round(erros / len(todas), 4) if todas else 0.0,
+        'bloqueios': servidor.bloqueios - bloqueios_antes,
+        'status': {str(codigo): quantidade for codigo, quantidade in sorted(status.items(), key=str)},
+        'operacoes': {
+            operacao: {'n': len(tempos), 'p50_ms': round(percentil(tempos, 50), 2), 'p95_ms': round(percentil(tempos, 95), 2)}
+            for operacao, tempos in sorted(latencias.items())
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concorrencia', default='1,4,16,32', help='níveis de usuários virtuais simultâneos')
+    parser.add_argument('--duracao', type=float, default=10, help='segundos por nível')
+    parser.add_argument('--mix', default=MIX_PADRAO)
+    parser.add_argument('--usuarios', type=int, default=50, help='usuários gerados no banco')
+    parser.add_argument('--atividades', type=int, default=200, help='atividades por usuário')
+    parser.add_argument('--senha-rapida', action='store_true',
+                        help='hash de senha barato (pbkdf2:sha256:1000) para isolar o custo do resto')
+    parser.add_argument('--escritor', action='store_true', help='liga ESCRITA_SERIALIZADA')
+    parser.add_argument('--saida', default=None, help='grava os resultados em JSON')
+    args = parser.parse_args()
+    
+    mix = ler_mix(args.mix)
+    config_extra = {'ESCRITA_SERIALIZADA': args.escritor}
+    if args.senha_rapida:
+        config_extra['SENHA_METODO'] = 'pbkdf2:sha256:1000'
+    
+    niveis = []
+    with tempfile.TemporaryDirectory() as diretorio, Servidor(diretorio, config_extra) as servidor:
+        with servidor.app.app_context():
+            popular(args.usuarios, args.atividades)
+        print(f"{'VUs':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'erros':>7} {'locked':>7}")
+        for concorrencia in (int(n) for n in args.concorrencia.split(',')):
+            nivel = executar_nivel(servidor, args.usuarios, concorrencia, mix, args.duracao)
+            niveis.append(nivel)
+            print(f"{concorrencia:>5} {nivel['req_s']:>8.1f} {nivel['p50_ms']:>8.2f} {nivel['p95_ms']:>8.2f} "
+                  f"{nivel['p99_ms']:>8.2f} {nivel['taxa_erros']:>7.2%} {nivel['bloqueios']:>7}")
+        if servidor.excecoes:
+            print('Exceções no servidor:', dict(servidor.excecoes))
+    
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump({'parametros': vars(args), 'niveis': niveis}, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
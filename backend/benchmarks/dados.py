@@ -0,0 +1,140 @@
+"""
+Gerador de dados sintéticos para benchmarks
+
+Preenche o banco com N usuários × M atividades, de forma reproduzível
+(semente fixa), com distribuições próximas do uso real:
+- tipos de TABELA_CALORIAS com pesos (caminhada e corrida mais comuns);
+- intensidade moderada na maioria das vezes;
+- duração log-normal em torno da mediana de cada tipo;
+- distância pela velocidade típica do tipo (nenhuma para musculação,
+  yoga e artes marciais);
+- datas no último ano, concentradas de manhã cedo e no fim da tarde.
+
+As calorias vêm de AtividadeService.calcular_calorias com o peso do
+usuário e os totais são reconstruídos ao final, como após uma importação.
+
+Uso, a partir do diretório backend:
+    python -m benchmarks.dados --usuarios 50 --atividades 200 --banco /tmp/bench.db
+"""
+
+import argparse
+import math
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import insert
+
+from models.models import db, Usuario, Atividade
+from services.container import obter_servicos
+from utils.senhas import hasher_atual
+
+SENHA = 'Senha123!'
+# Fim do período gerado: fixo para que a mesma semente gere as mesmas datas
+REFERENCIA = datetime(2024, 12, 31, 23, 59)
+DIAS = 365
+
+PESOS_TIPOS = {
+    'caminhada': 25, 'corrida': 22, 'musculacao': 20, 'ciclismo': 13,
+    'yoga': 8, 'natacao': 7, 'artesmarciais': 5
+}
+PESOS_INTENSIDADES = {'baixa': 30, 'moderada': 50, 'alta': 20}
+# Duração mediana em minutos e velocidade típica em km/h (None: sem distância)
+DURACAO_MEDIANA = {
+    'caminhada': 40, 'corrida': 35, 'musculacao': 55, 'ciclismo': 60,
+    'yoga': 50, 'natacao': 40, 'artesmarciais': 60
+}
+VELOCIDADE = {'caminhada': 5, 'corrida': 10, 'ciclismo': 20, 'natacao': 2}
+FATOR_INTENSIDADE = {'baixa': 0.85, 'moderada': 1.0, 'alta': 1.15}
+OBSERVACOES = ['treino leve', 'série intervalada', 'com amigos', 'recuperação', 'prova']
+
+
+def _horario(aleatorio: random.Random) -> timedelta:
+    """Hora do dia: picos às 7h e às 18h30, algum movimento no resto do dia"""
+    sorteio = aleatorio.random()
+    if sorteio < 0.4:
+        horas = aleatorio.gauss(7, 1)
+    elif sorteio < 0.85:
+        horas = aleatorio.gauss(18.5, 1.5)
+    else:
+        horas = aleatorio.uniform(9, 16)
+    return timedelta(minutes=int(min(max(horas, 5), 23) * 60))
+
+
+def gerar_atividades(aleatorio: random.Random, usuario_id: int, peso: float, quantidade: int) -> List[dict]:
+    """Linhas de atividades de um usuário, prontas para um INSERT executemany"""
+    servico = obter_servicos().atividade_service
+    tipos, pesos_tipos = zip(*PESOS_TIPOS.items())
+    intensidades, pesos_intensidades = zip(*PESOS_INTENSIDADES.items())
+    linhas = []
+    for tipo, intensidade in zip(
+        aleatorio.choices(tipos, pesos_tipos, k=quantidade),
+        aleatorio.choices(intensidades, pesos_intensidades, k=quantidade)
+    ):
+        duracao = int(min(max(aleatorio.lognormvariate(math.log(DURACAO_MEDIANA[tipo]), 0.35), 5), 240))
+        velocidade = VELOCIDADE.get(tipo)
+        distancia = None
+        if velocidade:
+            distancia = round(velocidade * FATOR_INTENSIDADE[intensidade] * aleatorio.uniform(0.85, 1.15) * duracao / 60, 2)
+        dia = (REFERENCIA - timedelta(days=aleatorio.randrange(DIAS))).replace(hour=0, minute=0)
+        linhas.append({
+            'usuario_id': usuario_id,
+            'tipo': tipo,
+            'duracao': duracao,
+            'distancia': distancia,
+            'intensidade': intensidade,
+            'calorias_queimadas': servico.calcular_calorias(tipo, duracao, intensidade, peso),
+            'data_atividade': dia + _horario(aleatorio),
+            'observacoes': aleatorio.choice(OBSERVACOES) if aleatorio.random() < 0.2 else None
+        })
+    return linhas
+
+
+def popular(usuarios: int, atividades: int, semente: int = 42) -> List[int]:
+    """Cria usuarios × atividades no banco da aplicação atual e retorna os IDs dos usuários
+    
+    Os emails são usuario{i}@bench.com e todos usam a senha SENHA.
+    """
+    aleatorio = random.Random(semente)
+    senha_hash = hasher_atual().gerar_hash(SENHA)
+    novos = [
+        Usuario(
+            nome=f'Usuário {i}',
+            email=f'usuario{i}@bench.com',
+            senha_hash=senha_hash,
+            idade=aleatorio.randint(18, 70),
+            peso=round(min(max(aleatorio.gauss(75, 12), 45), 140), 1),
+            altura=int(min(max(aleatorio.gauss(170, 9), 145), 205))
+        )
+        for i in range(usuarios)
+    ]
+    db.session.add_all(novos)
+    db.session.commit()
+    
+    servico = obter_servicos().atividade_service
+    for usuario in novos:
+        linhas = gerar_atividades(aleatorio, usuario.id, usuario.peso, atividades)
+        if linhas:
+            db.session.execute(insert(Atividade), linhas)
+        db.session.commit()
+        servico.reconstruir_estatisticas(usuario.id)
+    return [usuario.id for usuario in novos]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--usuarios', type=int, default=50)
+    parser.add_argument('--atividades', type=int, default=200, help='atividades por usuário')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--banco', required=True, help='arquivo SQLite a preencher')
+    args = parser.parse_args()
+    
+    from server import create_app
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + args.banco})
+    with app.app_context():
+        ids = popular(args.usuarios, args.atividades, args.semente)
+    print(f'{len(ids)} usuário(s) com {args.atividades} atividade(s) cada em {args.banco}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""
+Benchmark - Suíte de endpoints e serviços
+
+Preenche um banco SQLite em arquivo com benchmarks.dados (N usuários × M
+atividades) e mede cada endpoint dos blueprints pelo cliente de teste do
+Flask e as principais operações de AtividadeService chamadas direto. Para
+cada cenário informa latência p50/p95/p99 (ms), consultas SQL por chamada e
+o pico de memória alocada em uma chamada (KiB, por tracemalloc, em uma
+passada separada para não distorcer as latências).
+
+Os resultados são gravados em JSON (benchmarks/resultados/ por padrão),
+com o commit atual; --comparar mostra a variação em relação a um
+resultado anterior:
+    python -m benchmarks.suite --usuarios 20 --atividades 500
+    python -m benchmarks.suite --comparar benchmarks/resultados/<anterior>.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+
+from server import create_app
+from domain.entities import Atividade as AtividadeDominio
+from models.models import db, Atividade
+from services.container import obter_servicos
+from benchmarks.dados import SENHA, popular
+
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+NOVA_ATIVIDADE = {'tipo': 'corrida', 'duracao': 30, 'distancia': 5, 'intensidade': 'moderada',
+                  'data_atividade': '2024-06-01T07:00:00'}
+CSV_IMPORTACAO = 'tipo,duracao,distancia,intensidade,data_atividade\n' + ''.join(
+    f'caminhada,{20 + i % 40},3.5,baixa,2024-05-{1 + i % 28:02d}T07:00:00\n' for i in range(50)
+)
+
+
+class Cenario(NamedTuple):
+    nome: str
+    camada: str  # 'http' ou 'servico'
+    executar: Callable  # executar(contexto, preparado) -> status ou resultado
+    preparar: Optional[Callable] = None  # preparar(contexto), fora da medição
+
+
+class Contexto:
+    """Aplicação, usuários e clientes autenticados usados pelos cenários"""
+    
+    def __init__(self, app, usuario_ids: List[int]):
+        self.app = app
+        self.usuario_ids = usuario_ids
+        self.clientes = {}
+        for indice, usuario_id in enumerate(usuario_ids):
+            client = app.test_client()
+            client.post('/api/auth/login', json={'email': f'usuario{indice}@bench.com', 'senha': SENHA})
+            self.clientes[usuario_id] = client
+        with app.app_context():
+            self.atividades = {
+                usuario_id: [a.id for a in Atividade.query.filter_by(usuario_id=usuario_id).limit(50)]
+                for usuario_id in usuario_ids
+            }
+        self._rodizio = itertools.cycle(usuario_ids)
+        self._contador = itertools.count()
+    
+    def proximo(self):
+        """Próximo usuário do rodízio, com seu cliente e uma atividade dele"""
+        usuario_id = next(self._rodizio)
+        atividades = self.atividades[usuario_id]
+        return usuario_id, self.clientes[usuario_id], atividades[next(self._contador) % len(atividades)]
+    
+    def servico(self):
+        return obter_servicos().atividade_service
+    
+    def criar_atividade(self, usuario_id: int) -> int:
+        with self.app.app_context():
+            atividade, _, _ = self.servico().criar_atividade(usuario_id, dict(NOVA_ATIVIDADE))
+            return atividade.id
+
+
+def _http(metodo, caminho, **kwargs):
+    """Cenário HTTP simples para o próximo usuário; {id} vira uma atividade dele"""
+    def executar(contexto, preparado):
+        _, client, atividade_id = contexto.proximo()
+        response = getattr(client, metodo)(caminho.format(id=atividade_id), **kwargs)
+        response.get_data()
+        return response.status_code
+    return executar
+
+
+def _no_contexto(funcao):
+    """Cenário de serviço: cada chamada em um contexto de aplicação novo, como uma requisição"""
+    def executar(contexto, preparado):
+        usuario_id, _, atividade_id = contexto.proximo()
+        with contexto.app.app_context():
+            return funcao(contexto.servico(), usuario_id, atividade_id)
+    return executar
+
+
+def _preparar_remocao(contexto):
+    usuario_id, client, _ = contexto.proximo()
+    return client, contexto.criar_atividade(usuario_id)
+
+
+def _remover(contexto, preparado):
+    client, atividade_id = preparado
+    return client.delete(f'/api/atividades/{atividade_id}').status_code
+
+
+def _preparar_sessao(contexto):
+    client = contexto.app.test_client()
+    client.post('/api/auth/login', json={'email': 'usuario0@bench.com', 'senha': SENHA})
+    return client
+
+
+def _registrar(contexto, preparado):
+    return contexto.app.test_client().post('/api/auth/registrar', json={
+        'nome': 'Novo', 'email': f'novo{next(contexto._contador)}@bench.com', 'senha': SENHA
+    }).status_code
+
+
+def _login(contexto, preparado):
+    return contexto.app.test_client().post('/api/auth/login', json={
+        'email': 'usuario0@bench.com', 'senha': SENHA
+    }).status_code
+
+
+def _importar(contexto, preparado):
+    _, client, _ = contexto.proximo()
+    return client.post('/api/atividades/importar', data=CSV_IMPORTACAO, content_type='text/csv').status_code
+
+
+def _exportar_servico(servico, usuario_id, atividade_id):
+    linhas, _, _ = servico.exportar_atividades(usuario_id, Atividade.CAMPOS)
+    return sum(1 for _ in linhas)
+
+
+CENARIOS = [
+    Cenario('GET /api/health', 'http', _http('get', '/api/health')),
+    Cenario('POST /api/auth/registrar', 'http', _registrar),
+    Cenario('POST /api/auth/login', 'http', _login),
+    Cenario('POST /api/auth/logout', 'http', lambda contexto, client: client.post('/api/auth/logout').status_code,
+            _preparar_sessao),
+    Cenario('GET /api/auth/usuario-atual', 'http', _http('get', '/api/auth/usuario-atual')),
+    Cenario('PUT /api/auth/atualizar-perfil', 'http', _http('put', '/api/auth/atualizar-perfil', json={'nome': 'Bench'})),
+    Cenario('GET /api/atividades', 'http', _http('get', '/api/atividades')),
+    Cenario('GET /api/atividades?pagina=5', 'http', _http('get', '/api/atividades?pagina=5&por_pagina=20')),
+    Cenario('GET /api/atividades?cursor', 'http', _http('get', '/api/atividades?cursor=&por_pagina=20')),
+    Cenario('GET /api/atividades?campos', 'http', _http('get', '/api/atividades?campos=tipo,duracao,data_atividade')),
+    Cenario('GET /api/atividades/<id>', 'http', _http('get', '/api/atividades/{id}')),
+    Cenario('POST /api/atividades', 'http', _http('post', '/api/atividades', json=NOVA_ATIVIDADE)),
+    Cenario('PUT /api/atividades/<id>', 'http', _http('put', '/api/atividades/{id}', json={'duracao': 45})),
+    Cenario('DELETE /api/atividades/<id>', 'http', _remover, _preparar_remocao),
+    Cenario('POST /api/atividades/importar', 'http', _importar),
+    Cenario('GET /api/atividades/exportar', 'http', _http('get', '/api/atividades/exportar?formato=ndjson')),
+    Cenario('GET /api/atividades/resumo/stats', 'http', _http('get', '/api/atividades/resumo/stats')),
+    Cenario('GET /api/atividades/resumo/serie', 'http', _http('get', '/api/atividades/resumo/serie?granularidade=semana')),
+    Cenario('listar_atividades', 'servico', _no_contexto(
+        lambda servico, usuario_id, _: servico.listar_atividades(usuario_id, 1, 10, AtividadeDominio.CAMPOS_LISTA))),
+    Cenario('listar_atividades_cursor', 'servico', _no_contexto(
+        lambda servico, usuario_id, _: servico.listar_atividades_cursor(usuario_id, None, 20))),
+    Cenario('obter_atividade', 'servico', _no_contexto(
+        lambda servico, usuario_id, atividade_id: servico.obter_atividade(atividade_id, usuario_id))),
+    Cenario('criar_atividade', 'servico', _no_contexto(
+        lambda servico, usuario_id, _: servico.criar_atividade(usuario_id, dict(NOVA_ATIVIDADE)))),
+    Cenario('obter_estatisticas', 'servico', _no_contexto(
+        lambda servico, usuario_id, _: servico.obter_estatisticas(usuario_id))),
+    Cenario('obter_serie', 'servico', _no_contexto(
+        lambda servico, usuario_id, _: servico.obter_serie(usuario_id, 'mes', '2024-01-01', '2024-12-31'))),
+    Cenario('exportar_atividades', 'servico', _no_contexto(_exportar_servico)),
+]
+
+
+def percentil(amostras: List[float], p: int) -> float:
+    if len(amostras) < 2:
+        return amostras[0] if amostras else 0.0
+    return statistics.quantiles(amostras, n=100, method='inclusive')[p - 1]
+
+
+def medir(contexto: Contexto, cenario: Cenario, repeticoes: int, aquecimento: int, amostras_memoria: int) -> Dict:
+    """Latências, consultas por chamada e pico de memória de um cenário"""
+    consultas = [0]
+    falhas = [0]
+    
+    def contar(*args):
+        consultas[0] += 1
+    
+    def chamar():
+        preparado = cenario.preparar(contexto) if cenario.preparar else None
+        consultas[0] = 0
+        inicio = time.perf_counter()
+        resultado = cenario.executar(contexto, preparado)
+        tempo = time.perf_counter() - inicio
+        if cenario.camada == 'http' and resultado >= 400:
+            falhas[0] += 1
+        return tempo, consultas[0]
+    
+    with contexto.app.app_context():
+        engine = db.engine
+    for _ in range(aquecimento):
+        chamar()
+    
+    event.listen(engine, 'before_cursor_execute', contar)
+    try:
+        tempos, totais = zip(*(chamar() for _ in range(repeticoes)))
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+    
+    picos = []
+    tracemalloc.start()
+    try:
+        for _ in range(amostras_memoria):
+            preparado = cenario.preparar(contexto) if cenario.preparar else None
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            cenario.executar(contexto, preparado)
+            picos.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    
+    latencias = [tempo * 1000 for tempo in tempos]
+    return {
+        'camada': cenario.camada,
+        'repeticoes': repeticoes,
+        'p50_ms': round(percentil(latencias, 50), 3),
+        'p95_ms': round(percentil(latencias, 95), 3),
+        'p99_ms': round(percentil(latencias, 99), 3),
+        'media_ms': round(statistics.fmean(latencias), 3),
+        'consultas': round(statistics.fmean(totais), 2),
+        'memoria_pico_kib': round(max(picos, default=0) / 1024, 1),
+        # Respostas HTTP 4xx/5xx, inclusive no aquecimento
+        'falhas': falhas[0]
+    }
+
+
+def commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(resultados: Dict, anterior: Optional[Dict] = None):
+    print(f"{'cenário':<36} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL':>6} {'KiB':>8} {'falhas':>6}" + ('  Δp95   ΔSQL' if anterior else ''))
+    for nome, r in resultados.items():
+        linha = (f"{nome:<36} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                 f"{r['consultas']:>6.1f} {r['memoria_pico_kib']:>8.1f} {r['falhas']:>6}")
+        antes = (anterior or {}).get(nome)
+        if antes:
+            variacao = (r['p95_ms'] / antes['p95_ms'] - 1) * 100 if antes['p95_ms'] else 0.0
+            linha += f" {variacao:>+6.1f}% {r['consultas'] - antes['consultas']:>+6.1f}"
+        print(linha)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--usuarios', type=int, default=20)
+    parser.add_argument('--atividades', type=int, default=500, help='atividades por usuário')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=200)
+    parser.add_argument('--aquecimento', type=int, default=10)
+    parser.add_argument('--amostras-memoria', type=int, default=20)
+    parser.add_argument('--cache', choices=['local'], default=None, help='CACHE_BACKEND (padrão: desligado)')
+    parser.add_argument('--filtro', default='', help='só cenários cujo nome contém este texto')
+    parser.add_argument('--saida', default=None, help='arquivo JSON (padrão: benchmarks/resultados/<data>-<commit>.json)')
+    parser.add_argument('--comparar', default=None, help='resultado JSON anterior para comparação')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(diretorio, 'suite.db'),
+            'CACHE_BACKEND': args.cache
+        })
+        with app.app_context():
+            usuario_ids = popular(args.usuarios, args.atividades, args.semente)
+        contexto = Contexto(app, usuario_ids)
+        
+        resultados = {}
+        for cenario in CENARIOS:
+            if args.filtro in cenario.nome:
+                resultados[cenario.nome] = medir(
+                    contexto, cenario, args.repeticoes, args.aquecimento, args.amostras_memoria
+                )
+        
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    
+    commit = commit_atual()
+    documento = {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'parametros': {chave: valor for chave, valor in vars(args).items() if chave not in ('saida', 'comparar')},
+        'cenarios': resultados
+    }
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)['cenarios']
+    imprimir(resultados, anterior)
+    
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'sem-commit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(documento, arquivo, ensure_ascii=False, indent=2)
+    print(f'Resultados gravados em {saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Comandos de linha de comando da aplicação (flask <grupo> <comando>)
+"""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from models.models import db
+from models.migracoes import MIGRACOES, aplicar_migracoes, versoes_aplicadas
+from services.container import obter_servicos
+from repositories.cache import criar_servidor_cache
+
+atividades_cli = AppGroup('atividades', help='Manutenção do histórico de atividades')
+estatisticas_cli = AppGroup('estatisticas', help='Manutenção dos totais de atividades por usuário')
+cache_cli = AppGroup('cache', help='Cache de leituras dos repositórios')
+migracoes_cli = AppGroup('migracoes', help='Migrações versionadas do banco de dados')
+
+
+@migracoes_cli.command('aplicar')
+def aplicar():
+    """Aplica as migrações pendentes"""
+    novas = aplicar_migracoes(db.engine)
+    if novas:
+        click.echo(f"Migrações aplicadas: {', '.join(str(v) for v in novas)}")
+    else:
+        click.echo('Banco de dados já está atualizado.')
+
+
+@migracoes_cli.command('status')
+def status():
+    """Lista as migrações e indica quais já foram aplicadas"""
+    aplicadas = set(versoes_aplicadas(db.engine))
+    for versao, descricao, _ in MIGRACOES:
+        marcador = 'x' if versao in aplicadas else ' '
+        click.echo(f'[{marcador}] {versao:03d} {descricao}')
+
+
+@cache_cli.command('servidor')
+def servidor_cache():
+    """Atende o cache compartilhado (CACHE_BACKEND = 'remoto') em CACHE_ENDERECO"""
+    host, porta = current_app.config['CACHE_ENDERECO'].rsplit(':', 1)
+    servidor = criar_servidor_cache(
+        (host, int(porta)), current_app.config['CACHE_CHAVE'].encode(), current_app.config['CACHE_CAPACIDADE']
+    )
+    click.echo(f"Cache compartilhado em {current_app.config['CACHE_ENDERECO']}")
+    servidor.serve_forever()
+
+
+@cache_cli.command('status')
+def status_cache():
+    """Mostra os contadores do cache configurado"""
+    cache = obter_servicos().cache
+    if cache is None:
+        click.echo('Cache desativado (CACHE_BACKEND vazio).')
+        return
+    for nome, valor in cache.estatisticas().items():
+        click.echo(f'{nome}: {valor}')
+
+
+@atividades_cli.command('recalcular-calorias')
+@click.option('--usuario-id', type=int, default=None, help='Recalcula apenas este usuário')
+@click.option('--lote', type=int, default=None, help='Atividades lidas e gravadas por vez')
+def recalcular_calorias(usuario_id, lote):
+    """Recalcula as calorias de todo o histórico com o peso atual e a tabela vigente"""
+    servicos = obter_servicos()
+    usuario_ids = [usuario_id] if usuario_id else servicos.usuario_repository.listar_ids()
+    
+    total = 0
+    for uid in usuario_ids:
+        usuario = servicos.usuario_repository.find_by_id(uid)
+        if usuario is None:
+            click.echo(f'Usuário {uid} não encontrado.')
+            continue
+        alteradas = servicos.atividade_service.recalcular_historico(uid, usuario.peso or 70, lote)
+        if alteradas:
+            total += alteradas
+            click.echo(f'Usuário {uid}: {alteradas} atividade(s) recalculada(s)')
+    
+    click.echo(f'{len(usuario_ids)} usuário(s) verificados, {total} atividade(s) recalculada(s).')
+
+
+@estatisticas_cli.command('reconstruir')
+@click.option('--usuario-id', type=int, default=None, help='Reconstrói apenas este usuário')
+@click.option('--apenas-verificar', is_flag=True, help='Só relata divergências, sem gravar')
+def reconstruir_estatisticas(usuario_id, apenas_verificar):
+    """Recalcula os totais a partir das atividades e relata divergências"""
+    servico = obter_servicos().atividade_service
+    usuario_ids = [usuario_id] if usuario_id else servico.usuario_repository.listar_ids()
+    
+    total_divergentes = 0
+    for uid in usuario_ids:
+        divergencias = servico.reconstruir_estatisticas(uid, aplicar=not apenas_verificar)
+        if divergencias:
+            total_divergentes += 1
+            detalhes = ', '.join(f'{campo}: {antes} -> {depois}' for campo, (antes, depois) in divergencias.items())
+            click.echo(f'Usuário {uid}: {detalhes}')
+    
+    acao = 'encontradas' if apenas_verificar else 'corrigidas'
+    click.echo(f'{len(usuario_ids)} usuário(s) verificados, {total_divergentes} com divergências {acao}.')
+
+
+def registrar_comandos(app):
+    """Registra os grupos de comandos na aplicação"""
+    app.cli.add_command(atividades_cli)
+    app.cli.add_command(cache_cli)
+    app.cli.add_command(estatisticas_cli)
+    app.cli.add_command(migracoes_cli)
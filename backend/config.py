@@ -4,10 +4,73 @@ class Config:
     """Configurações padrão"""
     SQLALCHEMY_DATABASE_URI = 'sqlite:///fittrack.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # PRAGMAs aplicados a cada conexão nova (models/banco.py)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,  # em KiB (64 MB)
+        'mmap_size': 268435456,  # 256 MB
+        'busy_timeout': 5000,  # ms esperando o lock de escrita antes de falhar
+        'foreign_keys': 'ON'
+    }
+    # Requisições que escrevem abrem a transação com BEGIN IMMEDIATE
+    SQLITE_BEGIN_IMEDIATO = True
+    # Escritas de atividades em uma única thread, confirmadas em lotes (repositories/escritor.py)
+    ESCRITA_SERIALIZADA = False
+    ESCRITA_LOTE_MAXIMO = 100  # operações por transação
+    ESCRITA_ESPERA = 30  # segundos aguardando o início da escrita (depois, 503)
     DEBUG = False
-    SESSION_TYPE = 'filesystem'
+    # Armazenamento de sessões: 'memoria', 'sqlite', 'cookie' ou 'filesystem' (utils/sessoes.py)
+    SESSION_BACKEND = 'sqlite'
+    SESSION_SQLITE_CAMINHO = None  # padrão: instance/sessoes.db
+    SESSION_LIMPEZA_INTERVALO = 300  # segundos entre remoções de sessões expiradas
+    SESSION_MEMORIA_CAPACIDADE = 10000
+    SESSION_TYPE = 'filesystem'  # usado apenas por SESSION_BACKEND = 'filesystem'
+    # Cache de leituras dos repositórios: 'local' (um processo), 'remoto'
+    # (flask cache servidor, compartilhado entre workers) ou None (desligado)
+    CACHE_BACKEND = 'local'
+    CACHE_TTL = 300
+    CACHE_CAPACIDADE = 10000
+    CACHE_ENDERECO = '127.0.0.1:50000'
+    CACHE_CHAVE = 'chave-do-cache-mudar-em-producao'
     SECRET_KEY = 'sua-chave-secreta-mudable-em-producao'
     PERMANENT_SESSION_LIFETIME = 86400  # 24 horas
+    # Tokens de acesso (login com "modo": "token"); chave derivada do SECRET_KEY se vazia
+    AUTH_TOKEN_VALIDADE = 86400
+    AUTH_TOKEN_CHAVE = None
+    # Serializadores pré-compilados (utils/serializacao.py) e JSON sem espaços
+    SERIALIZACAO_COMPILADA = True
+    JSON_COMPACTO = True
+    # Cabeçalho Server-Timing por requisição e log estruturado opcional (utils/instrumentacao.py)
+    INSTRUMENTACAO = True
+    INSTRUMENTACAO_LOG = False
+    INSTRUMENTACAO_LOG_LIMIAR_MS = 0  # só registra requisições acima deste tempo
+    # GET /api/metrics (utils/metricas.py); com vários workers, METRICAS_DIRETORIO
+    # recebe um instantâneo por worker, agregados na coleta
+    METRICAS = True
+    METRICAS_DIRETORIO = None
+    METRICAS_INTERVALO = 10  # segundos entre gravações do instantâneo do worker
+    METRICAS_EXPIRACAO = 300  # instantâneos mais antigos são ignorados
+    # Acesso: 'Authorization: Bearer <METRICAS_TOKEN>' ou endereço em METRICAS_IPS;
+    # sem nenhum dos dois, aberto apenas com METRICAS_PUBLICAS (desligado em produção)
+    METRICAS_TOKEN = None
+    METRICAS_IPS = ()
+    METRICAS_PUBLICAS = True
+    # Perfis cProfile de requisições (utils/perfis.py): pedidos com X-Perfil/?perfil=
+    # por chamadores autorizados ou sorteados por PERFIS_AMOSTRAGEM
+    PERFIS = False
+    PERFIS_TOKEN = None
+    PERFIS_IPS = ()
+    PERFIS_AMOSTRAGEM = 0.0
+    PERFIS_DIRETORIO = None  # padrão: instance/perfis
+    PERFIS_MAXIMO = 50  # perfis mantidos; os mais antigos são removidos
+    IMPORTACAO_TAMANHO_LOTE = 500  # atividades por INSERT/transação na importação
+    # Hash de senhas: método do Werkzeug, processos dedicados (0 = na própria thread)
+    # e quantas requisições podem aguardar um processo antes de responder 503
+    SENHA_METODO = 'pbkdf2:sha256:600000'
+    SENHA_TAMANHO_SALT = 16
+    SENHA_PROCESSOS = 2
+    SENHA_FILA_MAXIMA = 64
 
 class DevelopmentConfig(Config):
     """Configurações para desenvolvimento"""
@@ -19,6 +82,10 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    SENHA_METODO = 'pbkdf2:sha256:1000'
+    SENHA_PROCESSOS = 0
+    SESSION_BACKEND = 'memoria'
+    CACHE_BACKEND = None
 
 class ProductionConfig(Config):
     """Configurações para produção"""
@@ -29,6 +96,29 @@ class ProductionConfig(Config):
         'DATABASE_URL', 
         'sqlite:///fittrack.db'
     )
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_TAMANHO', 10)),
+        'max_overflow': int(os.getenv('DB_POOL_EXTRA', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_ESPERA', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECICLAR', 3600)),
+        'pool_pre_ping': True
+    }
+    SENHA_PROCESSOS = int(os.getenv('SENHA_PROCESSOS', os.cpu_count() or 2))
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sqlite')
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local') or None
+    CACHE_ENDERECO = os.getenv('CACHE_ENDERECO', '127.0.0.1:50000')
+    CACHE_CHAVE = os.getenv('CACHE_CHAVE', 'chave-do-cache-mudar-em-producao')
+    INSTRUMENTACAO_LOG = os.getenv('INSTRUMENTACAO_LOG', '') == '1'
+    INSTRUMENTACAO_LOG_LIMIAR_MS = float(os.getenv('INSTRUMENTACAO_LOG_LIMIAR_MS', 0))
+    METRICAS_DIRETORIO = os.getenv('METRICAS_DIRETORIO') or None
+    METRICAS_TOKEN = os.getenv('METRICAS_TOKEN') or None
+    METRICAS_IPS = tuple(ip for ip in os.getenv('METRICAS_IPS', '').split(',') if ip)
+    METRICAS_PUBLICAS = os.getenv('METRICAS_PUBLICAS', '') == '1'
+    PERFIS = os.getenv('PERFIS', '') == '1'
+    PERFIS_TOKEN = os.getenv('PERFIS_TOKEN') or None
+    PERFIS_IPS = tuple(ip for ip in os.getenv('PERFIS_IPS', '').split(',') if ip)
+    PERFIS_AMOSTRAGEM = float(os.getenv('PERFIS_AMOSTRAGEM', 0))
+    PERFIS_DIRETORIO = os.getenv('PERFIS_DIRETORIO') or None
 
 config = {
     'development': DevelopmentConfig,
@@ -4,7 +4,7 @@ Define as entidades do negócio de forma independente do framework
 """
 
 from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.senhas import hasher_atual
 
 
 class Usuario:
@@ -22,11 +22,15 @@ class Usuario:
     
     def set_password(self, senha):
         """Define a senha com hash"""
-        self.senha_hash = generate_password_hash(senha)
+        self.senha_hash = hasher_atual().gerar_hash(senha)
     
     def check_password(self, senha):
         """Verifica se a senha está correta"""
-        return check_password_hash(self.senha_hash, senha)
+        return hasher_atual().verificar(self.senha_hash, senha)
+    
+    def precisa_rehash(self):
+        """Indica se o hash foi gerado com parâmetros antigos"""
+        return hasher_atual().precisa_rehash(self.senha_hash)
     
     def to_dict(self):
         """Converte para dicionário"""
@@ -44,6 +48,14 @@ class Usuario:
 class Atividade:
     """Entidade de Atividade do domínio"""
     
+    # Campos expostos pela API, na ordem da resposta. As listagens omitem
+    # por padrão o texto livre (observacoes), que pode ser grande.
+    CAMPOS = (
+        'id', 'usuario_id', 'tipo', 'duracao', 'distancia', 'intensidade',
+        'calorias_queimadas', 'data_atividade', 'data_criacao', 'observacoes'
+    )
+    CAMPOS_LISTA = CAMPOS[:-1]
+    
     def __init__(self, id=None, usuario_id=None, tipo=None, duracao=None, distancia=None, 
                  intensidade=None, calorias_queimadas=None, data_atividade=None, 
                  observacoes=None, data_criacao=None):
@@ -0,0 +1,79 @@
+"""
+Configuração do engine SQLite
+
+Cada conexão nova recebe os PRAGMAs de SQLITE_PRAGMAS (journal_mode=WAL,
+synchronous, cache_size, mmap_size, busy_timeout, foreign_keys). Com WAL,
+leitores não bloqueiam o escritor e vice-versa, e busy_timeout faz um
+escritor esperar a vez em vez de falhar com "database is locked".
+
+Resta o caso em que busy_timeout não ajuda: uma transação que começou lendo
+(BEGIN DEFERRED) e depois tenta escrever falha na hora se outro escritor
+confirmou nesse intervalo (SQLITE_BUSY_SNAPSHOT). Com SQLITE_BEGIN_IMEDIATO,
+requisições que podem escrever (métodos diferentes de GET/HEAD/OPTIONS, e
+comandos fora de requisição) abrem a transação com BEGIN IMMEDIATE: a vez
+de escrever é obtida no início, esperando até busy_timeout. Leituras
+continuam com BEGIN comum e não disputam o lock de escrita.
+
+Isso exige que rotas GET/HEAD/OPTIONS nunca escrevam: uma escrita dentro de
+uma dessas transações falharia com SQLITE_BUSY_SNAPSHOT sob escrita
+concorrente. Dados derivados que faltam (ex.: totais de um usuário ainda sem
+eles) são calculados na leitura e gravados pela próxima escrita ou por uma
+migração. tests/integration/test_escrita_concorrente.py percorre todas as
+rotas GET verificando que nenhuma emite INSERT/UPDATE/DELETE.
+"""
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+# Métodos que não podem escrever (ver acima): abrem a transação com BEGIN comum
+METODOS_LEITURA = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+def _comando_begin() -> str:
+    if has_request_context() and request.method in METODOS_LEITURA:
+        return 'BEGIN'
+    return 'BEGIN IMMEDIATE'
+
+
+def configurar_engine(engine, pragmas=None, begin_imediato: bool = False):
+    """Registra no engine a aplicação dos PRAGMAs e, opcionalmente, o BEGIN IMMEDIATE"""
+    if engine.dialect.name != 'sqlite':
+        return engine
+    if engine.url.database in (None, '', ':memory:'):
+        # Banco em memória: uma única conexão compartilhada, sem escritores concorrentes
+        begin_imediato = False
+    comandos = [f'PRAGMA {nome}={valor}' for nome, valor in (pragmas or {}).items()]
+    
+    @event.listens_for(engine, 'connect')
+    def ao_conectar(conexao_dbapi, registro):
+        if begin_imediato:
+            # O driver deixa de abrir transações sozinho; o BEGIN vem do evento abaixo
+            conexao_dbapi.isolation_level = None
+        cursor = conexao_dbapi.cursor()
+        try:
+            for comando in comandos:
+                cursor.execute(comando)
+        finally:
+            cursor.close()
+    
+    if begin_imediato:
+        @event.listens_for(engine, 'begin')
+        def ao_iniciar(conexao):
+            conexao.exec_driver_sql(_comando_begin())
+    
+    return engine
+
+
+def configurar_banco(app, db):
+    """Configura o engine da aplicação com SQLITE_PRAGMAS e SQLITE_BEGIN_IMEDIATO"""
+    with app.app_context():
+        return configurar_engine(
+            db.engine,
+            app.config.get('SQLITE_PRAGMAS'),
+            app.config.get('SQLITE_BEGIN_IMEDIATO', False)
+        )
+
+
+def pragmas_atuais(conexao, nomes) -> dict:
+    """Valores atuais dos PRAGMAs informados em uma conexão SQLAlchemy"""
+    return {nome: conexao.exec_driver_sql(f'PRAGMA {nome}').scalar() for nome in nomes}
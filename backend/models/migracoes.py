@@ -0,0 +1,127 @@
+"""
+Migrações versionadas do banco de dados
+
+db.create_all() só cria tabelas que ainda não existem; alterações em tabelas
+já existentes (índices, colunas) são aplicadas por estas migrações, que ficam
+registradas na tabela versao_esquema e rodam uma única vez por banco.
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+
+def adicionar_coluna(tabela: str, coluna: str, definicao: str):
+    """Passo de migração que adiciona uma coluna caso ainda não exista
+    
+    Bancos novos já recebem a coluna do create_all e o SQLite não tem
+    ADD COLUMN IF NOT EXISTS.
+    """
+    def passo(conexao):
+        if coluna not in {c['name'] for c in inspect(conexao).get_columns(tabela)}:
+            conexao.execute(text(f'ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}'))
+    return passo
+
+
+def preencher_estatisticas(conexao):
+    """Passo de migração que cria os totais dos usuários que ainda não os têm
+    
+    Os totais são mantidos a cada escrita; usuários com atividades anteriores
+    à tabela recebem aqui os seus, para que as leituras não precisem gravar.
+    """
+    sem_totais = 'usuario_id NOT IN (SELECT usuario_id FROM usuario_estatisticas)'
+    conexao.execute(text(f'DELETE FROM atividades_diarias WHERE {sem_totais}'))
+    conexao.execute(text(
+        'INSERT INTO atividades_diarias (usuario_id, dia, tipo, quantidade, duracao, distancia, calorias) '
+        'SELECT usuario_id, date(data_atividade), tipo, COUNT(id), COALESCE(SUM(duracao), 0), '
+        'COALESCE(SUM(distancia), 0), COALESCE(SUM(calorias_queimadas), 0) '
+        f'FROM atividades WHERE data_atividade IS NOT NULL AND {sem_totais} '
+        'GROUP BY usuario_id, date(data_atividade), tipo'
+    ))
+    
+    totais: Dict[int, Dict] = {}
+    for usuario_id, tipo, quantidade, duracao, distancia, calorias in conexao.execute(text(
+        'SELECT usuario_id, tipo, COUNT(id), COALESCE(SUM(duracao), 0), COALESCE(SUM(distancia), 0), '
+        f'COALESCE(SUM(calorias_queimadas), 0) FROM atividades WHERE {sem_totais} GROUP BY usuario_id, tipo'
+    )):
+        total = totais.setdefault(usuario_id, {
+            'usuario_id': usuario_id, 'atividades': 0, 'duracao': 0, 'distancia': 0, 'calorias': 0, 'tipos': {}
+        })
+        total['atividades'] += quantidade
+        total['duracao'] += duracao
+        total['distancia'] += distancia
+        total['calorias'] += calorias
+        total['tipos'][tipo] = quantidade
+    
+    if totais:
+        agora = datetime.utcnow()
+        conexao.execute(text(
+            'INSERT INTO usuario_estatisticas (usuario_id, total_atividades, total_duracao, total_distancia, '
+            'total_calorias, distribuicao_tipos, data_atualizacao) '
+            'VALUES (:usuario_id, :atividades, :duracao, :distancia, :calorias, :tipos, :agora)'
+        ), [dict(total, tipos=json.dumps(total['tipos']), agora=agora) for total in totais.values()])
+
+
+# (versão, descrição, comandos SQL ou passos chamáveis) em ordem crescente de versão
+MIGRACOES = [
+    (1, 'Índices compostos de atividades por usuário, tipo e data', [
+        'CREATE INDEX IF NOT EXISTS ix_atividades_usuario_data '
+        'ON atividades (usuario_id, data_atividade)',
+        'CREATE INDEX IF NOT EXISTS ix_atividades_usuario_tipo_data '
+        'ON atividades (usuario_id, tipo, data_atividade)',
+    ]),
+    (2, 'Versão dos dados do usuário (ETag)', [
+        adicionar_coluna('usuarios', 'versao_dados', 'INTEGER NOT NULL DEFAULT 0'),
+    ]),
+    (3, 'Totais de atividades dos usuários com histórico anterior à tabela', [
+        preencher_estatisticas,
+    ]),
+]
+
+
+def _criar_tabela_versoes(conexao):
+    conexao.execute(text(
+        'CREATE TABLE IF NOT EXISTS versao_esquema ('
+        'versao INTEGER PRIMARY KEY, '
+        'descricao VARCHAR(255) NOT NULL, '
+        'aplicada_em DATETIME NOT NULL)'
+    ))
+
+
+def versoes_aplicadas(engine) -> List[int]:
+    """Lista as versões já aplicadas ao banco"""
+    with engine.begin() as conexao:
+        _criar_tabela_versoes(conexao)
+        return [versao for (versao,) in conexao.execute(text('SELECT versao FROM versao_esquema ORDER BY versao'))]
+
+
+def aplicar_migracoes(engine) -> List[int]:
+    """Aplica as migrações pendentes, cada uma em sua própria transação
+    
+    Retorna as versões aplicadas nesta execução.
+    """
+    aplicadas = set(versoes_aplicadas(engine))
+    novas = []
+    
+    for versao, descricao, comandos in MIGRACOES:
+        if versao in aplicadas:
+            continue
+        try:
+            with engine.begin() as conexao:
+                for comando in comandos:
+                    if callable(comando):
+                        comando(conexao)
+                    else:
+                        conexao.execute(text(comando))
+                conexao.execute(
+                    text('INSERT INTO versao_esquema (versao, descricao, aplicada_em) VALUES (:v, :d, :a)'),
+                    {'v': versao, 'd': descricao, 'a': datetime.utcnow()}
+                )
+        except IntegrityError:
+            # Outro processo aplicou a mesma versão ao mesmo tempo
+            continue
+        novas.append(versao)
+    
+    return novas
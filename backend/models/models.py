@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from domain.entities import Atividade as AtividadeDominio
+from utils.senhas import hasher_atual
 from datetime import datetime
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'expire_on_commit': False})
 
 class Usuario(db.Model):
     """Modelo de Usuário do FitTrack"""
@@ -16,17 +17,25 @@ class Usuario(db.Model):
     peso = db.Column(db.Float)
     altura = db.Column(db.Integer)  # em cm
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    # Incrementada a cada alteração nos dados do usuário (base do ETag das respostas)
+    versao_dados = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relacionamento
     atividades = db.relationship('Atividade', backref='usuario', lazy=True, cascade='all, delete-orphan')
+    estatisticas = db.relationship('UsuarioEstatisticas', uselist=False, lazy=True, cascade='all, delete-orphan')
+    resumos_diarios = db.relationship('AtividadeDiaria', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, senha):
         """Hash da senha"""
-        self.senha_hash = generate_password_hash(senha)
+        self.senha_hash = hasher_atual().gerar_hash(senha)
     
     def check_password(self, senha):
         """Verifica se a senha está correta"""
-        return check_password_hash(self.senha_hash, senha)
+        return hasher_atual().verificar(self.senha_hash, senha)
+    
+    def precisa_rehash(self):
+        """Indica se o hash foi gerado com parâmetros antigos"""
+        return hasher_atual().precisa_rehash(self.senha_hash)
     
     def serialize(self):
         """Serializa o usuário para JSON"""
@@ -58,6 +67,11 @@ class Usuario(db.Model):
 class Atividade(db.Model):
     """Modelo de Atividade do FitTrack"""
     __tablename__ = 'atividades'
+    __table_args__ = (
+        # Listagem por usuário ordenada por data e filtros por tipo
+        db.Index('ix_atividades_usuario_data', 'usuario_id', 'data_atividade'),
+        db.Index('ix_atividades_usuario_tipo_data', 'usuario_id', 'tipo', 'data_atividade'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
@@ -70,25 +84,56 @@ class Atividade(db.Model):
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
     observacoes = db.Column(db.Text)
     
-    def serialize(self):
-        """Serializa a atividade para JSON"""
-        return {
-            'id': self.id,
-            'usuario_id': self.usuario_id,
-            'tipo': self.tipo,
-            'duracao': self.duracao,
-            'distancia': self.distancia,
-            'intensidade': self.intensidade,
-            'calorias_queimadas': self.calorias_queimadas,
-            'data_atividade': self.data_atividade.isoformat() if self.data_atividade else None,
-            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
-            'observacoes': self.observacoes
-        }
+    CAMPOS = AtividadeDominio.CAMPOS
+    
+    def serialize(self, campos=None):
+        """Serializa a atividade para JSON (só os campos informados, se houver)
+        
+        Apenas os atributos pedidos são lidos, então colunas não carregadas
+        (load_only/defer) não disparam consultas.
+        """
+        dados = {}
+        for campo in campos or self.CAMPOS:
+            valor = getattr(self, campo)
+            dados[campo] = valor.isoformat() if isinstance(valor, datetime) else valor
+        return dados
     
     def __repr__(self):
         return f'<Atividade {self.tipo} de {self.usuario_id}>'
 
 
+class UsuarioEstatisticas(db.Model):
+    """Totais de atividades do usuário mantidos incrementalmente"""
+    __tablename__ = 'usuario_estatisticas'
+    
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), primary_key=True)
+    total_atividades = db.Column(db.Integer, nullable=False, default=0)
+    total_duracao = db.Column(db.Integer, nullable=False, default=0)  # em minutos
+    total_distancia = db.Column(db.Float, nullable=False, default=0)  # em km
+    total_calorias = db.Column(db.Float, nullable=False, default=0)
+    distribuicao_tipos = db.Column(db.JSON, nullable=False, default=dict)  # tipo -> quantidade
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UsuarioEstatisticas de {self.usuario_id}>'
+
+
+class AtividadeDiaria(db.Model):
+    """Totais diários de atividades por usuário e tipo, mantidos incrementalmente"""
+    __tablename__ = 'atividades_diarias'
+    
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    tipo = db.Column(db.String(50), primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    duracao = db.Column(db.Integer, nullable=False, default=0)  # em minutos
+    distancia = db.Column(db.Float, nullable=False, default=0)  # em km
+    calorias = db.Column(db.Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<AtividadeDiaria {self.tipo} de {self.usuario_id} em {self.dia}>'
+
+
 #  class Meta(db.Model):
 #     """Modelo de Metas de Fitness para o FitTrack"""
 #     __tablename__ = 'metas'
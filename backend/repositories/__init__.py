@@ -1,4 +1,4 @@
 """Persistence Layer"""
-from .base_repository import BaseRepository, UsuarioRepository, AtividadeRepository
+from .base_repository import BaseRepository, UsuarioRepository, AtividadeRepository, EstatisticasRepository
 
-__all__ = ['BaseRepository', 'UsuarioRepository', 'AtividadeRepository']
+__all__ = ['BaseRepository', 'UsuarioRepository', 'AtividadeRepository', 'EstatisticasRepository']
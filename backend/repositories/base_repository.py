@@ -4,7 +4,15 @@ Interface para acesso aos dados
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
+from datetime import date, datetime, time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import load_only
+
+from .cache import em_cache, invalidar_apos_commit
+from .escritor import em_lote_de_escrita
+from .mapa_identidade import MapaIdentidade, mapa_da_sessao
 
 
 class BaseRepository(ABC):
@@ -34,13 +42,37 @@ class BaseRepository(ABC):
     def update(self, entity):
         """Atualiza uma entidade"""
         pass
+    
+    @property
+    def mapa(self) -> MapaIdentidade:
+        """Mapa de identidade da sessão atual (uma requisição)"""
+        return mapa_da_sessao(self.db.session)
+    
+    def _buscar_por_chave(self, modelo, chave):
+        """Busca pela chave primária consultando antes o mapa de identidade"""
+        objeto = self.mapa.obter(modelo, chave)
+        if objeto is None:
+            objeto = self.mapa.registrar(modelo, chave, self.db.session.get(modelo, chave))
+        return objeto
+    
+    def _confirmar(self):
+        """Confirma a transação; em um lote do escritor único só envia as alterações"""
+        if em_lote_de_escrita():
+            self.db.session.flush()
+        else:
+            self.db.session.commit()
+    
+    def _invalidar_cache(self, usuario_id: int):
+        """Invalida as leituras em cache do usuário após o commit atual"""
+        invalidar_apos_commit(self.db.session, getattr(self, 'cache', None), usuario_id)
 
 
 class UsuarioRepository(BaseRepository):
     """Repositório para Usuario"""
     
-    def __init__(self, db):
+    def __init__(self, db, cache=None):
         self.db = db
+        self.cache = cache
         # Importar aqui para evitar circular imports
         from models.models import Usuario as UsuarioDB
         self.Usuario = UsuarioDB
@@ -52,31 +84,61 @@ class UsuarioRepository(BaseRepository):
             email=entity.email,
             idade=entity.idade,
             peso=entity.peso,
-            altura=entity.altura
+            altura=entity.altura,
+            # A entidade já traz o hash calculado pelo serviço
+            senha_hash=getattr(entity, 'senha_hash', None)
         )
-        usuario.set_password(entity.senha_hash) if hasattr(entity, 'senha_hash') and entity.senha_hash else None
         self.db.session.add(usuario)
-        self.db.session.commit()
-        return usuario
+        self._confirmar()
+        return self.mapa.registrar(self.Usuario, usuario.id, usuario)
     
     def find_by_id(self, usuario_id: int):
         """Busca usuário por ID"""
-        return self.Usuario.query.get(usuario_id)
+        usuario = self.mapa.obter(self.Usuario, usuario_id)
+        if usuario is None:
+            usuario = self.mapa.registrar(self.Usuario, usuario_id, self._carregar(usuario_id))
+        return usuario
+    
+    @em_cache('usuario')
+    def _carregar(self, usuario_id: int):
+        return self.db.session.get(self.Usuario, usuario_id)
     
     def find_by_email(self, email: str):
         """Busca usuário por email"""
-        return self.Usuario.query.filter_by(email=email).first()
+        usuario = self.mapa.obter(self.Usuario, ('email', email))
+        if usuario is None:
+            # O cache guarda só email -> id; o usuário vem do cache por ID
+            usuario_id = self.cache.obter_indice(('email', email)) if self.cache else None
+            if usuario_id is not None:
+                usuario = self.find_by_id(usuario_id)
+            if usuario is None or usuario.email != email:
+                usuario = self.Usuario.query.filter_by(email=email).first()
+                if usuario is not None and self.cache:
+                    self.cache.gravar_indice(('email', email), usuario.id)
+            if usuario is not None:
+                self.mapa.registrar(self.Usuario, ('email', email), usuario)
+                self.mapa.registrar(self.Usuario, usuario.id, usuario)
+        return usuario
     
     def find_all(self):
         """Busca todos os usuários"""
         return self.Usuario.query.all()
     
+    def listar_ids(self) -> List[int]:
+        """Lista os IDs de todos os usuários sem carregar os objetos"""
+        return [usuario_id for (usuario_id,) in self.db.session.query(self.Usuario.id).order_by(self.Usuario.id)]
+    
     def delete(self, usuario_id: int):
         """Deleta um usuário"""
         usuario = self.find_by_id(usuario_id)
         if usuario:
             self.db.session.delete(usuario)
-            self.db.session.commit()
+            self._invalidar_cache(usuario_id)
+            self._confirmar()
+            self.mapa.remover(self.Usuario, usuario_id)
+            self.mapa.remover(self.Usuario, ('email', usuario.email))
+            if self.cache:
+                self.cache.remover_indice(('email', usuario.email))
             return True
         return False
     
@@ -88,7 +150,36 @@ class UsuarioRepository(BaseRepository):
             usuario.idade = entity.idade
             usuario.peso = entity.peso
             usuario.altura = entity.altura
-            self.db.session.commit()
+            self._invalidar_cache(usuario.id)
+            self._confirmar()
+            return usuario
+        return None
+    
+    def incrementar_versao(self, usuario_id: int):
+        """Incrementa a versão dos dados do usuário (sem commit)
+        
+        O incremento é feito no banco (versao_dados = versao_dados + 1), então
+        alterações concorrentes nunca resultam na mesma versão.
+        """
+        self.db.session.execute(
+            update(self.Usuario)
+            .where(self.Usuario.id == usuario_id)
+            .values(versao_dados=self.Usuario.versao_dados + 1)
+        )
+        self._invalidar_cache(usuario_id)
+    
+    def obter_versao(self, usuario_id: int) -> Optional[int]:
+        """Versão atual dos dados do usuário; None se não existir"""
+        usuario = self.find_by_id(usuario_id)
+        return usuario.versao_dados if usuario else None
+    
+    def atualizar_senha(self, usuario_id: int, senha_hash: str):
+        """Grava um novo hash de senha"""
+        usuario = self.find_by_id(usuario_id)
+        if usuario:
+            usuario.senha_hash = senha_hash
+            self._invalidar_cache(usuario_id)
+            self._confirmar()
             return usuario
         return None
 
@@ -96,8 +187,9 @@ class UsuarioRepository(BaseRepository):
 class AtividadeRepository(BaseRepository):
     """Repositório para Atividade"""
     
-    def __init__(self, db):
+    def __init__(self, db, cache=None):
         self.db = db
+        self.cache = cache
         from models.models import Atividade as AtividadeDB
         self.Atividade = AtividadeDB
     
@@ -114,21 +206,208 @@ class AtividadeRepository(BaseRepository):
             observacoes=entity.observacoes
         )
         self.db.session.add(atividade)
-        self.db.session.commit()
+        self._invalidar_cache(entity.usuario_id)
+        self._confirmar()
+        return self.mapa.registrar(self.Atividade, atividade.id, atividade)
+    
+    def inserir_em_lote(self, entities: List):
+        """Insere várias atividades em um único INSERT executemany e confirma"""
+        self.db.session.execute(insert(self.Atividade), [
+            {
+                'usuario_id': entity.usuario_id,
+                'tipo': entity.tipo,
+                'duracao': entity.duracao,
+                'distancia': entity.distancia,
+                'intensidade': entity.intensidade,
+                'calorias_queimadas': entity.calorias_queimadas,
+                'data_atividade': entity.data_atividade,
+                'observacoes': entity.observacoes
+            }
+            for entity in entities
+        ])
+        for usuario_id in {entity.usuario_id for entity in entities}:
+            self._invalidar_cache(usuario_id)
+        self._confirmar()
+        return len(entities)
+    
+    def find_by_id(self, atividade_id: int, campos: Optional[Sequence[str]] = None):
+        """Busca atividade por ID (carregando só as colunas de campos, se informado)"""
+        if campos is None:
+            return self._buscar_por_chave(self.Atividade, atividade_id)
+        atividade = self.mapa.obter(self.Atividade, atividade_id)
+        if atividade is None:
+            atividade = self.mapa.registrar(self.Atividade, atividade_id, self.db.session.get(
+                self.Atividade, atividade_id, options=[self._projecao(campos)]
+            ))
         return atividade
     
-    def find_by_id(self, atividade_id: int):
-        """Busca atividade por ID"""
-        return self.Atividade.query.get(atividade_id)
+    def _projecao(self, campos: Sequence[str]):
+        """load_only das colunas pedidas mais as usadas em posse, ordenação e cursor"""
+        nomes = dict.fromkeys(('id', 'usuario_id', 'data_atividade', *campos))
+        return load_only(*(getattr(self.Atividade, nome) for nome in nomes))
+    
+    @em_cache('atividades', condicao=lambda pagina=1, por_pagina=10, campos=None: pagina == 1)
+    def find_by_usuario(self, usuario_id: int, pagina: int = 1, por_pagina: int = 10,
+                        campos: Optional[Sequence[str]] = None) -> Tuple[List, int]:
+        """Busca atividades por usuário com paginação (projetando campos, se informado)"""
+        query = self.Atividade.query.filter_by(usuario_id=usuario_id)
+        if campos is not None:
+            query = query.options(self._projecao(campos))
+        query = query.order_by(
+            self.Atividade.data_atividade.desc(),
+            self.Atividade.id.desc()
+        )
+        # paginate já conta o total: evita um segundo COUNT
+        paginacao = query.paginate(page=pagina, per_page=por_pagina)
+        return paginacao.items, paginacao.total
+    
+    def find_by_usuario_apos(self, usuario_id: int, apos: Optional[Tuple] = None, limite: int = 10,
+                             campos: Optional[Sequence[str]] = None) -> Tuple[List, bool]:
+        """Busca a próxima página de atividades por usuário a partir de uma posição (keyset)
+        
+        apos é o par (data_atividade, id) da última atividade já entregue. A consulta
+        posiciona-se direto no índice (usuario_id, data_atividade), com custo
+        proporcional ao tamanho da página em qualquer profundidade. Retorna as
+        atividades e se há mais páginas.
+        """
+        query = self.Atividade.query.filter_by(usuario_id=usuario_id)
+        if campos is not None:
+            query = query.options(self._projecao(campos))
+        if apos:
+            data_atividade, atividade_id = apos
+            query = query.filter(
+                self.Atividade.data_atividade <= data_atividade,
+                or_(
+                    self.Atividade.data_atividade < data_atividade,
+                    and_(self.Atividade.data_atividade == data_atividade, self.Atividade.id < atividade_id)
+                )
+            )
+        atividades = query.order_by(
+            self.Atividade.data_atividade.desc(),
+            self.Atividade.id.desc()
+        ).limit(limite + 1).all()
+        return atividades[:limite], len(atividades) > limite
     
-    def find_by_usuario(self, usuario_id: int, pagina: int = 1, por_pagina: int = 10) -> Tuple[List, int]:
-        """Busca atividades por usuário com paginação"""
-        query = self.Atividade.query.filter_by(usuario_id=usuario_id).order_by(
-            self.Atividade.data_atividade.desc()
+    def iterar_por_usuario(self, usuario_id: int, campos: Sequence[str], lote: int = 1000) -> Iterator[Tuple]:
+        """Percorre todas as atividades do usuário como tuplas, lendo lote linhas por vez
+        
+        Usa yield_per: o cursor do banco é consumido sob demanda e nenhum
+        objeto ORM é criado, então a memória não cresce com o histórico.
+        """
+        colunas = [getattr(self.Atividade, campo) for campo in campos]
+        resultado = self.db.session.execute(
+            select(*colunas).where(
+                self.Atividade.usuario_id == usuario_id
+            ).order_by(
+                self.Atividade.data_atividade.desc(),
+                self.Atividade.id.desc()
+            ).execution_options(yield_per=lote)
         )
-        total = query.count()
-        atividades = query.paginate(page=pagina, per_page=por_pagina).items
-        return atividades, total
+        for linha in resultado:
+            yield tuple(linha)
+    
+    def contar_por_usuario(self, usuario_id: int) -> int:
+        """Conta as atividades do usuário"""
+        return self.Atividade.query.filter_by(usuario_id=usuario_id).count()
+    
+    def obter_agregados(self, usuario_id: int) -> Dict:
+        """Agrega as atividades do usuário em uma única consulta GROUP BY tipo"""
+        linhas = self.db.session.query(
+            self.Atividade.tipo,
+            func.count(self.Atividade.id),
+            func.coalesce(func.sum(self.Atividade.duracao), 0),
+            func.coalesce(func.sum(self.Atividade.distancia), 0),
+            func.coalesce(func.sum(self.Atividade.calorias_queimadas), 0)
+        ).filter(
+            self.Atividade.usuario_id == usuario_id
+        ).group_by(self.Atividade.tipo).all()
+        
+        distribuicao = {}
+        total_atividades = total_duracao = 0
+        total_distancia = total_calorias = 0
+        for tipo, quantidade, duracao, distancia, calorias in linhas:
+            distribuicao[tipo] = quantidade
+            total_atividades += quantidade
+            total_duracao += duracao
+            total_distancia += distancia
+            total_calorias += calorias
+        
+        return {
+            'total_atividades': total_atividades,
+            'total_duracao': total_duracao,
+            'total_distancia': total_distancia,
+            'total_calorias': total_calorias,
+            'media_duracao': total_duracao / total_atividades if total_atividades else 0,
+            'media_calorias': total_calorias / total_atividades if total_atividades else 0,
+            'distribuicao_tipos': distribuicao
+        }
+    
+    def obter_agregados_diarios(self, usuario_id: int) -> Dict:
+        """Agrega as atividades do usuário por (dia, tipo) em uma única consulta"""
+        dia = func.date(self.Atividade.data_atividade)
+        linhas = self.db.session.query(
+            dia,
+            self.Atividade.tipo,
+            func.count(self.Atividade.id),
+            func.coalesce(func.sum(self.Atividade.duracao), 0),
+            func.coalesce(func.sum(self.Atividade.distancia), 0),
+            func.coalesce(func.sum(self.Atividade.calorias_queimadas), 0)
+        ).filter(
+            self.Atividade.usuario_id == usuario_id
+        ).group_by(dia, self.Atividade.tipo).all()
+        
+        return {
+            (date.fromisoformat(dia_iso), tipo): {
+                'quantidade': quantidade,
+                'duracao': duracao,
+                'distancia': distancia,
+                'calorias': calorias
+            }
+            for dia_iso, tipo, quantidade, duracao, distancia, calorias in linhas
+        }
+    
+    def obter_serie_diaria(self, usuario_id: int, inicio: date, fim: date) -> List[Tuple]:
+        """Agrega as atividades por dia entre inicio e fim (inclusive), no formato de
+        EstatisticasRepository.obter_serie_diaria
+        """
+        dia = func.date(self.Atividade.data_atividade)
+        linhas = self.db.session.query(
+            dia,
+            func.count(self.Atividade.id),
+            func.coalesce(func.sum(self.Atividade.duracao), 0),
+            func.coalesce(func.sum(self.Atividade.distancia), 0),
+            func.coalesce(func.sum(self.Atividade.calorias_queimadas), 0)
+        ).filter(
+            self.Atividade.usuario_id == usuario_id,
+            self.Atividade.data_atividade >= datetime.combine(inicio, time.min),
+            self.Atividade.data_atividade <= datetime.combine(fim, time.max)
+        ).group_by(dia).order_by(dia).all()
+        
+        return [(date.fromisoformat(dia_iso), *totais) for dia_iso, *totais in linhas]
+    
+    def listar_para_recalculo(self, usuario_id: int, apos_id: int = 0, limite: int = 1000) -> List[Tuple]:
+        """Próximo lote de (id, tipo, intensidade, duracao, calorias_queimadas) com id > apos_id"""
+        return self.db.session.execute(
+            select(
+                self.Atividade.id,
+                self.Atividade.tipo,
+                self.Atividade.intensidade,
+                self.Atividade.duracao,
+                self.Atividade.calorias_queimadas
+            ).where(
+                self.Atividade.usuario_id == usuario_id,
+                self.Atividade.id > apos_id
+            ).order_by(self.Atividade.id).limit(limite)
+        ).all()
+    
+    def atualizar_calorias(self, usuario_id: int, calorias: List[Tuple[int, float]]):
+        """Grava (id, calorias) com um UPDATE executemany pela chave primária e confirma"""
+        if calorias:
+            self.db.session.execute(update(self.Atividade), [
+                {'id': atividade_id, 'calorias_queimadas': valor} for atividade_id, valor in calorias
+            ])
+        self._invalidar_cache(usuario_id)
+        self._confirmar()
     
     def find_all(self):
         """Busca todas as atividades"""
@@ -139,7 +418,9 @@ class AtividadeRepository(BaseRepository):
         atividade = self.find_by_id(atividade_id)
         if atividade:
             self.db.session.delete(atividade)
-            self.db.session.commit()
+            self._invalidar_cache(atividade.usuario_id)
+            self._confirmar()
+            self.mapa.remover(self.Atividade, atividade_id)
             return True
         return False
     
@@ -154,12 +435,221 @@ class AtividadeRepository(BaseRepository):
             atividade.calorias_queimadas = entity.calorias_queimadas
             atividade.data_atividade = entity.data_atividade
             atividade.observacoes = entity.observacoes
-            self.db.session.commit()
+            self._invalidar_cache(atividade.usuario_id)
+            self._confirmar()
             return atividade
         return None
+
+
+class EstatisticasRepository(BaseRepository):
+    """Repositório para os totais incrementais de atividades por usuário
+    
+    Os métodos de escrita incremental não fazem commit: as alterações ficam
+    na sessão e são confirmadas junto com a atividade que as originou.
+    """
+    
+    def __init__(self, db):
+        self.db = db
+        from models.models import UsuarioEstatisticas as UsuarioEstatisticasDB, AtividadeDiaria as AtividadeDiariaDB
+        self.UsuarioEstatisticas = UsuarioEstatisticasDB
+        self.AtividadeDiaria = AtividadeDiariaDB
+    
+    def save(self, entity):
+        """Salva os totais de um usuário"""
+        self.db.session.add(entity)
+        self._confirmar()
+        return entity
+    
+    def find_by_id(self, usuario_id: int):
+        """Busca os totais de um usuário pela chave primária"""
+        return self._buscar_por_chave(self.UsuarioEstatisticas, usuario_id)
+    
+    def find_all(self):
+        """Busca os totais de todos os usuários"""
+        return self.UsuarioEstatisticas.query.all()
+    
+    def delete(self, usuario_id: int):
+        """Deleta os totais de um usuário"""
+        estatisticas = self.find_by_id(usuario_id)
+        if estatisticas:
+            self.db.session.delete(estatisticas)
+            self._confirmar()
+            self.mapa.remover(self.UsuarioEstatisticas, usuario_id)
+            return True
+        return False
+    
+    def update(self, entity):
+        """Atualiza os totais de um usuário"""
+        self._confirmar()
+        return entity
+    
+    def obter_agregados(self, usuario_id: int) -> Optional[Dict]:
+        """Lê os totais no mesmo formato de AtividadeRepository.obter_agregados"""
+        estatisticas = self.find_by_id(usuario_id)
+        if not estatisticas:
+            return None
+        
+        total = estatisticas.total_atividades
+        return {
+            'total_atividades': total,
+            'total_duracao': estatisticas.total_duracao,
+            'total_distancia': estatisticas.total_distancia,
+            'total_calorias': estatisticas.total_calorias,
+            'media_duracao': estatisticas.total_duracao / total if total else 0,
+            'media_calorias': estatisticas.total_calorias / total if total else 0,
+            'distribuicao_tipos': dict(estatisticas.distribuicao_tipos or {})
+        }
+    
+    def obter_diarios(self, usuario_id: int) -> Dict:
+        """Lê os totais diários no mesmo formato de AtividadeRepository.obter_agregados_diarios"""
+        linhas = self.AtividadeDiaria.query.filter_by(usuario_id=usuario_id).all()
+        return {
+            (linha.dia, linha.tipo): {
+                'quantidade': linha.quantidade,
+                'duracao': linha.duracao,
+                'distancia': linha.distancia,
+                'calorias': linha.calorias
+            }
+            for linha in linhas
+        }
+    
+    def obter_serie_diaria(self, usuario_id: int, inicio: date, fim: date) -> List[Tuple]:
+        """Soma os totais diários de todos os tipos entre inicio e fim (inclusive)
+        
+        Retorna tuplas (dia, quantidade, duracao, distancia, calorias) ordenadas
+        por dia, no máximo uma por dia com atividade.
+        """
+        return self.db.session.query(
+            self.AtividadeDiaria.dia,
+            func.sum(self.AtividadeDiaria.quantidade),
+            func.sum(self.AtividadeDiaria.duracao),
+            func.sum(self.AtividadeDiaria.distancia),
+            func.sum(self.AtividadeDiaria.calorias)
+        ).filter(
+            self.AtividadeDiaria.usuario_id == usuario_id,
+            self.AtividadeDiaria.dia >= inicio,
+            self.AtividadeDiaria.dia <= fim
+        ).group_by(self.AtividadeDiaria.dia).order_by(self.AtividadeDiaria.dia).all()
+    
+    def reconstruir(self, usuario_id: int, agregados: Dict, diarios: Dict):
+        """Substitui os totais do usuário pelos agregados recalculados (sem commit)"""
+        self.AtividadeDiaria.query.filter_by(usuario_id=usuario_id).delete()
+        self.db.session.add_all([
+            self.AtividadeDiaria(usuario_id=usuario_id, dia=dia, tipo=tipo, **valores)
+            for (dia, tipo), valores in diarios.items()
+        ])
+        
+        estatisticas = self.find_by_id(usuario_id)
+        if not estatisticas:
+            estatisticas = self.UsuarioEstatisticas(usuario_id=usuario_id)
+            self.db.session.add(estatisticas)
+            self.mapa.registrar(self.UsuarioEstatisticas, usuario_id, estatisticas)
+        
+        estatisticas.total_atividades = agregados['total_atividades']
+        estatisticas.total_duracao = agregados['total_duracao']
+        estatisticas.total_distancia = agregados['total_distancia']
+        estatisticas.total_calorias = agregados['total_calorias']
+        estatisticas.distribuicao_tipos = dict(agregados['distribuicao_tipos'])
+        return estatisticas
+    
+    def registrar_atividade(self, atividade, sinal: int = 1):
+        """Soma (sinal=1) ou subtrai (sinal=-1) uma atividade dos totais (sem commit)"""
+        return self.registrar_lote(atividade.usuario_id, [atividade], sinal)
+    
+    def registrar_lote(self, usuario_id: int, atividades: List, sinal: int = 1):
+        """Soma ou subtrai várias atividades do mesmo usuário dos totais (sem commit)
+        
+        As atividades são agrupadas por (dia, tipo) antes de tocar nos registros,
+        de modo que cada total diário é lido e alterado uma única vez.
+        """
+        return self._registrar_variacoes(usuario_id, [(atividade, sinal) for atividade in atividades])
+    
+    def registrar_substituicao(self, anterior, atual):
+        """Troca uma versão da atividade por outra nos totais (sem commit)
+        
+        Subtração e soma são combinadas antes de tocar nos totais diários: uma
+        edição que não muda dia nem tipo altera o registro existente em vez de
+        apagá-lo e recriá-lo.
+        """
+        return self._registrar_variacoes(atual.usuario_id, [(anterior, -1), (atual, 1)])
+    
+    def _registrar_variacoes(self, usuario_id: int, variacoes: List[Tuple]):
+        """Aplica pares (atividade, sinal) aos totais do usuário (sem commit)"""
+        estatisticas = self.find_by_id(usuario_id)
+        if not estatisticas:
+            return None
+        
+        distribuicao = dict(estatisticas.distribuicao_tipos or {})
+        por_dia = {}
+        for atividade, sinal in variacoes:
+            duracao = atividade.duracao or 0
+            distancia = atividade.distancia or 0
+            calorias = atividade.calorias_queimadas or 0
+            
+            estatisticas.total_atividades += sinal
+            estatisticas.total_duracao += sinal * duracao
+            estatisticas.total_distancia += sinal * distancia
+            estatisticas.total_calorias += sinal * calorias
+            distribuicao[atividade.tipo] = distribuicao.get(atividade.tipo, 0) + sinal
+            
+            if atividade.data_atividade:
+                totais = por_dia.setdefault((atividade.data_atividade.date(), atividade.tipo), [0, 0, 0, 0])
+                totais[0] += sinal
+                totais[1] += sinal * duracao
+                totais[2] += sinal * distancia
+                totais[3] += sinal * calorias
+        
+        # JSON não rastreia mutações: atribui um novo dicionário
+        estatisticas.distribuicao_tipos = {tipo: qtd for tipo, qtd in distribuicao.items() if qtd > 0}
+        
+        # Variações que se anulam não precisam tocar no banco
+        por_dia = {chave: totais for chave, totais in por_dia.items() if any(totais)}
+        if por_dia:
+            self._aplicar_dias(usuario_id, por_dia)
+        return estatisticas
+    
+    def _aplicar_dias(self, usuario_id: int, por_dia: Dict):
+        """Aplica variações aos totais diários, lendo os existentes em uma única consulta (sem commit)
+        
+        por_dia mapeia (dia, tipo) -> [quantidade, duracao, distancia, calorias].
+        """
+        existentes = {
+            (resumo.dia, resumo.tipo): resumo
+            for resumo in self.AtividadeDiaria.query.filter(
+                self.AtividadeDiaria.usuario_id == usuario_id,
+                self.AtividadeDiaria.dia.in_({dia for dia, _ in por_dia})
+            )
+        }
+        
+        vazios = []
+        for (dia, tipo), (quantidade, duracao, distancia, calorias) in por_dia.items():
+            resumo = existentes.get((dia, tipo))
+            if not resumo:
+                resumo = self.AtividadeDiaria(
+                    usuario_id=usuario_id, dia=dia, tipo=tipo,
+                    quantidade=0, duracao=0, distancia=0, calorias=0
+                )
+                self.db.session.add(resumo)
+            
+            resumo.quantidade += quantidade
+            resumo.duracao += duracao
+            resumo.distancia += distancia
+            resumo.calorias += calorias
+            if resumo.quantidade <= 0:
+                vazios.append(resumo)
+        
+        for resumo in vazios:
+            if resumo in self.db.session.new:
+                self.db.session.expunge(resumo)
+            else:
+                self.db.session.delete(resumo)
+        if vazios:
+            # Remove os dias vazios já agora para que um novo registro na mesma chave não colida
+            self.db.session.flush()
+ 
  # class MetaRepository:
 #     """Implementação do Repositório para o modelo Meta"""
-    
+
 #     def save(self, meta: Meta) -> Meta:
 #         db.session.add(meta)
 #         db.session.commit()
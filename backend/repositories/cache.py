@@ -0,0 +1,314 @@
+"""
+Persistence Layer - Cache de leituras dos repositórios
+
+Leituras frequentes (usuário por ID/email, primeira página de atividades)
+são guardadas serializadas em um armazenamento com limite de tamanho (LRU)
+e TTL, e reanexadas à sessão atual com session.merge(load=False), sem
+consultar o banco.
+
+A invalidação é por usuário: as chaves incluem a "geração" do usuário, e
+toda escrita troca essa geração depois do commit, tornando inacessíveis de
+uma vez todas as entradas antigas (que saem por LRU/TTL).
+
+Backends (CACHE_BACKEND):
+- 'local': dicionário no próprio processo; só use com um único worker.
+- 'remoto': um processo à parte (flask cache servidor) compartilhado pelos
+  workers via multiprocessing.managers.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+AUSENTE = object()
+_CHAVE_SESSAO = 'cache_invalidar'
+
+
+class CacheLocal:
+    """Armazenamento em memória com LRU e TTL por entrada"""
+    
+    def __init__(self, capacidade: int = 10000):
+        self.capacidade = capacidade
+        self._dados = OrderedDict()
+        self._trava = threading.Lock()
+        self._descartes = 0
+    
+    def obter(self, chave):
+        """Valor armazenado ou None se ausente/expirado"""
+        with self._trava:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            valor, expira = item
+            if expira is not None and expira <= time.monotonic():
+                del self._dados[chave]
+                return None
+            self._dados.move_to_end(chave)
+            return valor
+    
+    def gravar(self, chave, valor, ttl: Optional[float] = None):
+        """Grava um valor; ttl None não expira (só sai por LRU)"""
+        with self._trava:
+            self._dados[chave] = (valor, time.monotonic() + ttl if ttl is not None else None)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.capacidade:
+                self._dados.popitem(last=False)
+                self._descartes += 1
+    
+    def remover(self, chave):
+        with self._trava:
+            self._dados.pop(chave, None)
+    
+    def estatisticas(self) -> Dict[str, int]:
+        return {'entradas': len(self._dados), 'capacidade': self.capacidade, 'descartes': self._descartes}
+
+
+class _ServidorCache(BaseManager):
+    """Expõe um CacheLocal para outros processos"""
+
+
+class _ClienteCache(BaseManager):
+    """Conexão com um _ServidorCache"""
+
+
+_ClienteCache.register('cache')
+
+
+def criar_servidor_cache(endereco: Tuple[str, int], chave: bytes, capacidade: int = 10000):
+    """Cria o servidor do cache compartilhado; chamar serve_forever() para atender"""
+    armazenamento = CacheLocal(capacidade)
+    _ServidorCache.register('cache', callable=lambda: armazenamento)
+    return _ServidorCache(address=endereco, authkey=chave).get_server()
+
+
+class CacheRemoto:
+    """Cliente do servidor de cache (cada thread usa sua própria conexão)"""
+    
+    def __init__(self, endereco: Tuple[str, int], chave: bytes):
+        self.endereco = endereco
+        self.chave = chave
+        self._proxy = None
+        self._trava = threading.Lock()
+    
+    def _obter_proxy(self):
+        with self._trava:
+            if self._proxy is None:
+                gerenciador = _ClienteCache(address=self.endereco, authkey=self.chave)
+                gerenciador.connect()
+                self._proxy = gerenciador.cache()
+            return self._proxy
+    
+    def _chamar(self, metodo: str, *args):
+        try:
+            return getattr(self._obter_proxy(), metodo)(*args)
+        except (OSError, EOFError):
+            # Servidor reiniciado ou fora do ar: reconecta na próxima chamada
+            self._proxy = None
+            raise
+    
+    def obter(self, chave):
+        return self._chamar('obter', chave)
+    
+    def gravar(self, chave, valor, ttl: Optional[float] = None):
+        self._chamar('gravar', chave, valor, ttl)
+    
+    def remover(self, chave):
+        self._chamar('remover', chave)
+    
+    def estatisticas(self) -> Dict[str, int]:
+        return self._chamar('estatisticas')
+
+
+class CacheRepositorios:
+    """Chaves por geração de usuário, serialização e contadores sobre um armazenamento"""
+    
+    def __init__(self, armazenamento, ttl: float = 300):
+        self.armazenamento = armazenamento
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+        self.erros = 0
+    
+    def _geracao(self, usuario_id) -> int:
+        geracao = self.armazenamento.obter(('geracao', usuario_id))
+        if geracao is None:
+            # Geração descartada pelo LRU: recomeça em um valor nunca usado
+            geracao = time.time_ns()
+            self.armazenamento.gravar(('geracao', usuario_id), geracao)
+        return geracao
+    
+    def geracao(self, usuario_id) -> Optional[int]:
+        """Geração atual do usuário, ou None com o armazenamento indisponível
+        
+        Quem lê do banco após uma falha deve obtê-la antes da leitura e
+        repassá-la a gravar: uma invalidação no meio do caminho deixa o valor
+        lido na geração antiga, em vez de guardá-lo como atual.
+        """
+        try:
+            return self._geracao(usuario_id)
+        except (OSError, EOFError) as erro:
+            self.erros += 1
+            logger.warning('Cache indisponível: %s', erro)
+            return None
+    
+    def obter(self, namespace: str, usuario_id, argumentos: Tuple, geracao: Optional[int] = None) -> Any:
+        """Valor em cache ou AUSENTE"""
+        try:
+            if geracao is None:
+                geracao = self._geracao(usuario_id)
+            dados = self.armazenamento.obter((namespace, usuario_id, geracao, argumentos))
+        except (OSError, EOFError) as erro:
+            self.erros += 1
+            logger.warning('Cache indisponível: %s', erro)
+            return AUSENTE
+        if dados is None:
+            self.falhas += 1
+            return AUSENTE
+        self.acertos += 1
+        return pickle.loads(dados)
+    
+    def gravar(self, namespace: str, usuario_id, argumentos: Tuple, valor, geracao: Optional[int] = None):
+        """Grava um valor na geração informada (a atual se None)"""
+        try:
+            if geracao is None:
+                geracao = self._geracao(usuario_id)
+            chave = (namespace, usuario_id, geracao, argumentos)
+            self.armazenamento.gravar(chave, pickle.dumps(valor, pickle.HIGHEST_PROTOCOL), self.ttl)
+        except (OSError, EOFError) as erro:
+            self.erros += 1
+            logger.warning('Cache indisponível: %s', erro)
+    
+    def obter_indice(self, chave) -> Any:
+        """Valor de um índice auxiliar (ex.: email -> usuario_id) ou None"""
+        try:
+            return self.armazenamento.obter(('indice', chave))
+        except (OSError, EOFError):
+            self.erros += 1
+            return None
+    
+    def gravar_indice(self, chave, valor):
+        try:
+            self.armazenamento.gravar(('indice', chave), valor, self.ttl)
+        except (OSError, EOFError):
+            self.erros += 1
+    
+    def remover_indice(self, chave):
+        try:
+            self.armazenamento.remover(('indice', chave))
+        except (OSError, EOFError):
+            self.erros += 1
+    
+    def invalidar(self, usuario_id):
+        """Descarta todas as entradas do usuário trocando sua geração"""
+        self.invalidacoes += 1
+        try:
+            self.armazenamento.gravar(('geracao', usuario_id), time.time_ns())
+        except (OSError, EOFError) as erro:
+            self.erros += 1
+            logger.error('Falha ao invalidar o cache do usuário %s: %s', usuario_id, erro)
+    
+    def estatisticas(self) -> Dict[str, int]:
+        """Contadores deste processo e do armazenamento"""
+        consultas = self.acertos + self.falhas
+        resultado = {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': round(self.acertos / consultas, 4) if consultas else 0,
+            'invalidacoes': self.invalidacoes,
+            'erros': self.erros
+        }
+        try:
+            resultado.update(self.armazenamento.estatisticas())
+        except (OSError, EOFError):
+            pass
+        return resultado
+
+
+def criar_cache(config) -> Optional[CacheRepositorios]:
+    """Cria o cache indicado por CACHE_BACKEND (None desativa)"""
+    backend = config.get('CACHE_BACKEND')
+    if not backend:
+        return None
+    if backend == 'local':
+        armazenamento = CacheLocal(config.get('CACHE_CAPACIDADE', 10000))
+    elif backend == 'remoto':
+        host, porta = config.get('CACHE_ENDERECO', '127.0.0.1:50000').rsplit(':', 1)
+        armazenamento = CacheRemoto((host, int(porta)), config['CACHE_CHAVE'].encode())
+    else:
+        raise ValueError(f'CACHE_BACKEND inválido: {backend}. Use: local, remoto')
+    return CacheRepositorios(armazenamento, config.get('CACHE_TTL', 300))
+
+
+def _anexar(session, valor):
+    """Reanexa à sessão os objetos ORM de um valor vindo do cache"""
+    if isinstance(valor, tuple):
+        return tuple(_anexar(session, item) for item in valor)
+    if isinstance(valor, list):
+        return [_anexar(session, item) for item in valor]
+    if hasattr(valor, '_sa_instance_state'):
+        return session.merge(valor, load=False)
+    return valor
+
+
+def em_cache(namespace: str, condicao: Optional[Callable[..., bool]] = None):
+    """Decorator para métodos de leitura de repositório cujo 1º argumento é o usuario_id
+    
+    Sem cache configurado (self.cache None) o método é chamado diretamente.
+    Resultados None não são guardados. condicao(*args, **kwargs) restringe
+    quais chamadas usam o cache.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envolvido(self, usuario_id, *args, **kwargs):
+            cache = self.cache
+            if cache is None or (condicao and not condicao(*args, **kwargs)):
+                return metodo(self, usuario_id, *args, **kwargs)
+            
+            # Geração lida uma única vez, antes da consulta ao banco
+            geracao = cache.geracao(usuario_id)
+            if geracao is None:
+                return metodo(self, usuario_id, *args, **kwargs)
+            
+            argumentos = (args, tuple(sorted(kwargs.items())))
+            valor = cache.obter(namespace, usuario_id, argumentos, geracao)
+            if valor is not AUSENTE:
+                return _anexar(self.db.session, valor)
+            
+            valor = metodo(self, usuario_id, *args, **kwargs)
+            if valor is not None:
+                cache.gravar(namespace, usuario_id, argumentos, valor, geracao)
+            return valor
+        return envolvido
+    return decorador
+
+
+def invalidar_apos_commit(session, cache: Optional[CacheRepositorios], usuario_id):
+    """Agenda a invalidação do usuário para depois do commit da transação atual
+    
+    Invalidar antes do commit permitiria que outra requisição regravasse no
+    cache os dados antigos ainda visíveis no banco.
+    """
+    if cache is not None:
+        session.info.setdefault(_CHAVE_SESSAO, set()).add((cache, usuario_id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_pendentes(session):
+    for cache, usuario_id in session.info.pop(_CHAVE_SESSAO, ()):
+        cache.invalidar(usuario_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _descartar_pendentes(session, transacao_anterior):
+    session.info.pop(_CHAVE_SESSAO, None)
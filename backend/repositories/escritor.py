@@ -0,0 +1,164 @@
+"""
+Persistence Layer - Escritor único para o SQLite
+
+O SQLite aceita um escritor por vez. Com várias threads confirmando cada uma
+a sua transação, os escritores disputam o lock e esperam em busy_timeout.
+Com ESCRITA_SERIALIZADA, as escritas dos serviços são enviadas a uma única
+thread, que agrupa as operações da fila (até ESCRITA_LOTE_MAXIMO) em uma só
+transação e um só commit, e entrega a cada chamador o seu resultado por um
+Future. Leituras continuam nas threads das requisições, em paralelo.
+
+Dentro do lote, BaseRepository._confirmar apenas envia as alterações
+(flush); o commit é feito uma vez pelo escritor. Se uma operação falha, o
+lote é desfeito e as demais são refeitas uma a uma, cada uma com seu commit,
+para que a falha de uma não afete as outras.
+
+Se o chamador desiste de esperar (ESCRITA_ESPERA), a operação ainda não
+iniciada é cancelada e descartada (EscritorOcupado, respondido com 503); a
+que já entrou no lote em execução é aguardada até o fim, pois o seu commit
+ainda pode acontecer, e responder com erro levaria o cliente a repeti-la.
+"""
+
+import atexit
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as EsperaEsgotada
+from typing import Callable, List, Optional
+
+from flask import has_app_context
+
+from .mapa_identidade import mapa_da_sessao
+
+_local = threading.local()
+
+
+def em_lote_de_escrita() -> bool:
+    """Indica se a thread atual é a do escritor único, executando um lote"""
+    return getattr(_local, 'ativo', False)
+
+
+class EscritorOcupado(Exception):
+    """A escrita não começou dentro do prazo e foi descartada, sem efeito no banco"""
+
+
+class EscritorUnico:
+    """Thread dedicada que executa e confirma as escritas em lotes"""
+    
+    def __init__(self, app, db, lote_maximo: int = 100, espera: float = 30):
+        self.app = app
+        self.db = db
+        self.lote_maximo = lote_maximo
+        # Segundos que um chamador aguarda o resultado antes de desistir
+        self.espera = espera
+        self._fila = queue.SimpleQueue()
+        self._thread = None
+        self._trava = threading.Lock()
+    
+    def executar(self, funcao: Callable, *args, **kwargs):
+        """Executa funcao na thread do escritor e retorna o seu resultado
+        
+        Chamadas feitas de dentro de um lote rodam direto, na mesma transação.
+        Gera EscritorOcupado se a operação não começou dentro de self.espera.
+        
+        A transação de leitura da thread chamadora é encerrada antes (sem
+        expirar os objetos): aberta com BEGIN IMMEDIATE, ela seguraria o lock
+        de escrita de que o escritor precisa.
+        """
+        if em_lote_de_escrita():
+            return funcao(*args, **kwargs)
+        if has_app_context():
+            sessao = self.db.session()
+            if sessao.in_transaction():
+                sessao.commit()
+        futuro = self.submeter(funcao, *args, **kwargs)
+        try:
+            return futuro.result(timeout=self.espera)
+        except EsperaEsgotada:
+            if futuro.cancel():
+                raise EscritorOcupado('Escrita não iniciada no prazo') from None
+            # Já em execução: o commit ainda pode acontecer, então aguarda o resultado
+            return futuro.result()
+    
+    def submeter(self, funcao: Callable, *args, **kwargs) -> Future:
+        """Enfileira funcao para o próximo lote"""
+        futuro = Future()
+        self._iniciar()
+        self._fila.put((futuro, funcao, args, kwargs))
+        return futuro
+    
+    def encerrar(self):
+        """Processa o que já está na fila e finaliza a thread"""
+        with self._trava:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._fila.put(None)
+            thread.join()
+    
+    def _iniciar(self):
+        # Criada sob demanda, como o pool de HasherSenhas
+        with self._trava:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._laco, name='escritor-sqlite', daemon=True)
+                self._thread.start()
+                atexit.register(self.encerrar)
+    
+    def _laco(self):
+        _local.ativo = True
+        with self.app.app_context():
+            encerrar = False
+            while not encerrar:
+                item = self._fila.get()
+                if item is None:
+                    break
+                lote = [item]
+                while len(lote) < self.lote_maximo:
+                    try:
+                        item = self._fila.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        encerrar = True
+                        break
+                    lote.append(item)
+                self._processar([item for item in lote if item[0].set_running_or_notify_cancel()])
+            self.db.session.remove()
+    
+    def _processar(self, lote: List):
+        """Executa o lote em uma transação; em caso de falha, refaz uma a uma"""
+        if not lote:
+            return
+        sessao = self.db.session
+        try:
+            resultados = [funcao(*args, **kwargs) for _, funcao, args, kwargs in lote]
+            sessao.commit()
+        except Exception as erro:
+            sessao.rollback()
+            self._soltar_objetos()
+            if len(lote) == 1:
+                lote[0][0].set_exception(erro)
+            else:
+                for item in lote:
+                    self._processar([item])
+            return
+        
+        # Os objetos retornados passam às threads chamadoras: desvinculados
+        # da sessão do escritor (já carregados, pois expire_on_commit=False)
+        self._soltar_objetos()
+        for (futuro, *_), resultado in zip(lote, resultados):
+            futuro.set_result(resultado)
+    
+    def _soltar_objetos(self):
+        sessao = self.db.session
+        mapa_da_sessao(sessao).limpar()
+        sessao.expunge_all()
+
+
+def criar_escritor(app, db) -> Optional[EscritorUnico]:
+    """Cria o escritor único se ESCRITA_SERIALIZADA (só para SQLite em arquivo)"""
+    if not app.config.get('ESCRITA_SERIALIZADA'):
+        return None
+    with app.app_context():
+        url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return EscritorUnico(app, db, app.config.get('ESCRITA_LOTE_MAXIMO', 100), app.config.get('ESCRITA_ESPERA', 30))
@@ -0,0 +1,55 @@
+"""
+Persistence Layer - Mapa de identidade por requisição
+
+O identity map da sessão do SQLAlchemy guarda referências fracas: um objeto
+buscado e descartado no meio do fluxo (ex.: uma checagem de existência) é
+coletado e a busca seguinte volta ao banco. Este mapa mantém referências
+fortes aos objetos já carregados enquanto a sessão existir (uma requisição),
+de modo que buscas repetidas pela mesma chave não geram novas consultas.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_CHAVE_SESSAO = 'mapa_identidade'
+
+
+class MapaIdentidade:
+    """Objetos já carregados na sessão, indexados por (modelo, chave)"""
+    
+    def __init__(self):
+        self._objetos = {}
+    
+    def obter(self, modelo, chave):
+        """Retorna o objeto registrado ou None"""
+        return self._objetos.get((modelo, chave))
+    
+    def registrar(self, modelo, chave, objeto):
+        """Registra um objeto carregado (ignora None)"""
+        if objeto is not None:
+            self._objetos[(modelo, chave)] = objeto
+        return objeto
+    
+    def remover(self, modelo, chave):
+        """Remove um objeto do mapa (ex.: após exclusão)"""
+        self._objetos.pop((modelo, chave), None)
+    
+    def limpar(self):
+        """Esquece todos os objetos"""
+        self._objetos.clear()
+    
+    def __len__(self):
+        return len(self._objetos)
+
+
+def mapa_da_sessao(session) -> MapaIdentidade:
+    """Obtém o mapa de identidade associado à sessão (criado sob demanda)"""
+    return session.info.setdefault(_CHAVE_SESSAO, MapaIdentidade())
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _limpar_apos_rollback(session, transacao_anterior):
+    # Objetos pendentes deixam de existir após o rollback
+    mapa = session.info.get(_CHAVE_SESSAO)
+    if mapa is not None:
+        mapa.limpar()
@@ -3,47 +3,101 @@ API Routes - Atividades
 Refatorado para usar Service Layer
 """
 
-from flask import Blueprint, request, jsonify, session
-from repositories.base_repository import AtividadeRepository, UsuarioRepository
-from services.usuario_service import AtividadeService
-from models.models import db
+from datetime import datetime
+from functools import wraps
+from flask import Blueprint, Response, current_app, g, request, jsonify, stream_with_context
+from domain.entities import Atividade
+from services.container import obter_servicos
+from utils.auth_utils import login_required
+from utils.importacao import LEITORES, decodificar_linhas, detectar_formato
+from utils.exportacao import CAMPOS_EXPORTACAO, GERADORES, MIMETYPES_EXPORTACAO
+from utils.serializacao import serializador
 
 atividades_bp = Blueprint('atividades', __name__, url_prefix='/api/atividades')
 
+MENSAGEM_CAMPOS_INVALIDOS = f"Campos inválidos. Use: {', '.join(Atividade.CAMPOS)}"
+
 
 def get_atividade_service():
-    """Factory para criar instância do serviço"""
-    atividade_repo = AtividadeRepository(db)
-    usuario_repo = UsuarioRepository(db)
-    return AtividadeService(atividade_repo, usuario_repo)
+    """Serviço de atividades compartilhado da aplicação"""
+    return obter_servicos().atividade_service
 
 
-def get_usuario_id():
-    """Obtém o ID do usuário da sessão ou retorna erro"""
-    usuario_id = session.get('usuario_id')
-    if not usuario_id:
-        return None
-    return usuario_id
+def resposta_condicional(view=None, variante=None):
+    """Anexa um ETag derivado da versão dos dados do usuário e responde 304
+    a If-None-Match correspondente, sem executar a consulta da rota
+    
+    variante() complementa o ETag quando a resposta depende de algo além dos
+    dados e da URL (ex.: a data atual, usada como padrão de um parâmetro).
+    """
+    if view is None:
+        return lambda view: resposta_condicional(view, variante)
+    
+    @wraps(view)
+    def decorada(*args, **kwargs):
+        versao = get_atividade_service().obter_versao_dados(g.usuario_id)
+        if versao is None:
+            return view(*args, **kwargs)
+        
+        etag = f'{g.usuario_id}-{versao}'
+        if variante is not None:
+            etag = f'{etag}-{variante()}'
+        if request.if_none_match.contains_weak(etag):
+            resposta = current_app.response_class(status=304)
+        else:
+            resposta = current_app.make_response(view(*args, **kwargs))
+            if resposta.status_code != 200:
+                return resposta
+        resposta.set_etag(etag, weak=True)
+        # O navegador guarda a resposta, mas revalida a cada uso
+        resposta.headers['Cache-Control'] = 'private, no-cache'
+        return resposta
+    return decorada
 
 
 @atividades_bp.route('', methods=['GET'])
+@login_required
+@resposta_condicional
 def listar():
     """Lista atividades do usuário"""
-    usuario_id = get_usuario_id()
-    if not usuario_id:
-        return jsonify({'mensagem': 'Não autenticado'}), 401
+    usuario_id = g.usuario_id
     
     pagina = request.args.get('pagina', 1, type=int)
     por_pagina = request.args.get('por_pagina', 10, type=int)
     
     servico = get_atividade_service()
-    atividades, total, mensagem, status_code = servico.listar_atividades(usuario_id, pagina, por_pagina)
+    campos = servico.resolver_campos(request.args.get('campos'), Atividade.CAMPOS_LISTA)
+    if campos is None:
+        return jsonify({'mensagem': MENSAGEM_CAMPOS_INVALIDOS}), 400
+    
+    if 'cursor' in request.args:
+        # Paginação por cursor: ?cursor= (vazio) inicia do mais recente
+        resultado, mensagem, status_code = servico.listar_atividades_cursor(
+            usuario_id,
+            request.args.get('cursor'),
+            por_pagina,
+            request.args.get('incluir_total', '').lower() in ('1', 'true', 'sim'),
+            campos
+        )
+        if status_code != 200:
+            return jsonify({'mensagem': mensagem}), status_code
+        
+        resposta = {
+            'atividades': list(map(serializador(campos), resultado['atividades'])),
+            'proximo_cursor': resultado['proximo_cursor'],
+            'por_pagina': por_pagina
+        }
+        if 'total' in resultado:
+            resposta['total'] = resultado['total']
+        return jsonify(resposta), status_code
+    
+    atividades, total, mensagem, status_code = servico.listar_atividades(usuario_id, pagina, por_pagina, campos)
     
     if status_code != 200:
         return jsonify({'mensagem': mensagem}), status_code
     
     return jsonify({
-        'atividades': [a.serialize() for a in atividades],
+        'atividades': list(map(serializador(campos), atividades)),
         'total': total,
         'pagina': pagina,
         'por_pagina': por_pagina,
@@ -52,27 +106,32 @@ def listar():
 
 
 @atividades_bp.route('/<int:atividade_id>', methods=['GET'])
+@login_required
+@resposta_condicional
 def obter(atividade_id):
     """Obtém uma atividade específica"""
-    usuario_id = get_usuario_id()
-    if not usuario_id:
-        return jsonify({'mensagem': 'Não autenticado'}), 401
+    usuario_id = g.usuario_id
     
     servico = get_atividade_service()
-    atividade, mensagem, status_code = servico.obter_atividade(atividade_id, usuario_id)
+    campos = None
+    if 'campos' in request.args:
+        campos = servico.resolver_campos(request.args['campos'])
+        if campos is None:
+            return jsonify({'mensagem': MENSAGEM_CAMPOS_INVALIDOS}), 400
+    
+    atividade, mensagem, status_code = servico.obter_atividade(atividade_id, usuario_id, campos)
     
     if status_code != 200:
         return jsonify({'mensagem': mensagem}), status_code
     
-    return jsonify(atividade.serialize()), status_code
+    return jsonify(serializador(campos or Atividade.CAMPOS)(atividade)), status_code
 
 
 @atividades_bp.route('', methods=['POST'])
+@login_required
 def criar():
     """Cria uma nova atividade"""
-    usuario_id = get_usuario_id()
-    if not usuario_id:
-        return jsonify({'mensagem': 'Não autenticado'}), 401
+    usuario_id = g.usuario_id
     
     dados = request.get_json()
     servico = get_atividade_service()
@@ -84,16 +143,74 @@ def criar():
     
     return jsonify({
         'mensagem': mensagem,
-        'atividade': atividade.serialize()
+        'atividade': serializador(Atividade.CAMPOS)(atividade)
     }), status_code
 
 
+@atividades_bp.route('/importar', methods=['POST'])
+@login_required
+def importar():
+    """Importa atividades de um arquivo CSV ou NDJSON
+    
+    Aceita o arquivo no corpo da requisição (Content-Type text/csv ou
+    application/x-ndjson) ou como campo 'arquivo' de um formulário multipart.
+    O formato também pode ser informado em ?formato=csv|ndjson.
+    """
+    usuario_id = g.usuario_id
+    
+    nome_arquivo = None
+    if request.mimetype == 'multipart/form-data':
+        arquivo = request.files.get('arquivo')
+        if not arquivo:
+            return jsonify({'mensagem': "Envie o arquivo no campo 'arquivo'"}), 400
+        stream, nome_arquivo = arquivo.stream, arquivo.filename
+    else:
+        stream = request.stream
+    
+    formato = request.args.get('formato') or detectar_formato(request.mimetype, nome_arquivo)
+    if formato not in LEITORES:
+        return jsonify({'mensagem': f"Formato inválido. Formatos válidos: {', '.join(LEITORES)}"}), 400
+    
+    servico = get_atividade_service()
+    linhas = LEITORES[formato](decodificar_linhas(stream))
+    resultado, mensagem, status_code = servico.importar_atividades(
+        usuario_id, linhas, current_app.config['IMPORTACAO_TAMANHO_LOTE']
+    )
+    
+    if status_code != 200:
+        return jsonify({'mensagem': mensagem}), status_code
+    
+    return jsonify(dict(resultado, mensagem=mensagem)), status_code
+
+
+@atividades_bp.route('/exportar', methods=['GET'])
+@login_required
+def exportar():
+    """Exporta todo o histórico do usuário em CSV ou NDJSON, em streaming"""
+    usuario_id = g.usuario_id
+    
+    formato = request.args.get('formato', 'csv')
+    if formato not in GERADORES:
+        return jsonify({'mensagem': f"Formato inválido. Formatos válidos: {', '.join(GERADORES)}"}), 400
+    
+    servico = get_atividade_service()
+    linhas, mensagem, status_code = servico.exportar_atividades(usuario_id, CAMPOS_EXPORTACAO)
+    
+    if status_code != 200:
+        return jsonify({'mensagem': mensagem}), status_code
+    
+    return Response(
+        stream_with_context(GERADORES[formato](linhas)),
+        mimetype=MIMETYPES_EXPORTACAO[formato],
+        headers={'Content-Disposition': f'attachment; filename=atividades.{formato}'}
+    )
+
+
 @atividades_bp.route('/<int:atividade_id>', methods=['PUT'])
+@login_required
 def atualizar(atividade_id):
     """Atualiza uma atividade"""
-    usuario_id = get_usuario_id()
-    if not usuario_id:
-        return jsonify({'mensagem': 'Não autenticado'}), 401
+    usuario_id = g.usuario_id
     
     dados = request.get_json()
     servico = get_atividade_service()
@@ -105,16 +222,15 @@ def atualizar(atividade_id):
     
     return jsonify({
         'mensagem': mensagem,
-        'atividade': atividade.serialize()
+        'atividade': serializador(Atividade.CAMPOS)(atividade)
     }), status_code
 
 
 @atividades_bp.route('/<int:atividade_id>', methods=['DELETE'])
+@login_required
 def deletar(atividade_id):
     """Deleta uma atividade"""
-    usuario_id = get_usuario_id()
-    if not usuario_id:
-        return jsonify({'mensagem': 'Não autenticado'}), 401
+    usuario_id = g.usuario_id
     
     servico = get_atividade_service()
     sucesso, mensagem, status_code = servico.deletar_atividade(atividade_id, usuario_id)
@@ -126,11 +242,11 @@ def deletar(atividade_id):
 
 
 @atividades_bp.route('/resumo/stats', methods=['GET'])
+@login_required
+@resposta_condicional
 def obter_estatisticas():
     """Obtém estatísticas do usuário"""
-    usuario_id = get_usuario_id()
-    if not usuario_id:
-        return jsonify({'mensagem': 'Não autenticado'}), 401
+    usuario_id = g.usuario_id
     
     servico = get_atividade_service()
     stats = servico.obter_estatisticas(usuario_id)
@@ -139,3 +255,30 @@ def obter_estatisticas():
         return jsonify({'mensagem': 'Usuário não encontrado'}), 404
     
     return jsonify(stats), 200
+
+
+def _periodo_serie() -> str:
+    """Parâmetros da série já resolvidos: sem 'ate', o intervalo termina hoje (UTC)"""
+    ate = request.args.get('ate') or datetime.utcnow().date().isoformat()
+    return f"{request.args.get('granularidade', 'dia')}-{request.args.get('de', '')}-{ate}"
+
+
+@atividades_bp.route('/resumo/serie', methods=['GET'])
+@login_required
+@resposta_condicional(variante=_periodo_serie)
+def obter_serie():
+    """Obtém totais de duração, distância e calorias por dia, semana ou mês"""
+    usuario_id = g.usuario_id
+    
+    servico = get_atividade_service()
+    serie, mensagem, status_code = servico.obter_serie(
+        usuario_id,
+        request.args.get('granularidade', 'dia'),
+        request.args.get('de'),
+        request.args.get('ate')
+    )
+    
+    if status_code != 200:
+        return jsonify({'mensagem': mensagem}), status_code
+    
+    return jsonify(serie), status_code
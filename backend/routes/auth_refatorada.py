@@ -3,18 +3,16 @@ API Routes - Autenticação
 Refatorado para usar Service Layer
 """
 
-from flask import Blueprint, request, jsonify, session
-from repositories.base_repository import UsuarioRepository
-from services.usuario_service import UsuarioService
-from models.models import db
+from flask import Blueprint, current_app, g, request, jsonify, session
+from services.container import obter_servicos
+from utils.auth_utils import login_required, obter_token_requisicao
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 
 def get_usuario_service():
-    """Factory para criar instância do serviço"""
-    repo = UsuarioRepository(db)
-    return UsuarioService(repo)
+    """Serviço de usuários compartilhado da aplicação"""
+    return obter_servicos().usuario_service
 
 
 @auth_bp.route('/registrar', methods=['POST'])
@@ -55,29 +53,38 @@ def login():
     if status_code != 200:
         return jsonify({'mensagem': mensagem}), status_code
     
-    # Armazena na sessão
-    session['usuario_id'] = usuario.id
-    
-    return jsonify({
+    resposta = {
         'mensagem': mensagem,
         'usuario': usuario.serialize_sem_sensivel()
-    }), status_code
+    }
+    
+    if dados.get('modo') == 'token':
+        # Modo token: nada é gravado na sessão; o cliente envia Authorization: Bearer
+        token, expira = current_app.extensions['tokens'].gerar(usuario.id)
+        resposta.update({'token': token, 'tipo_token': 'Bearer', 'expira_em': expira})
+    else:
+        # Armazena na sessão
+        session['usuario_id'] = usuario.id
+    
+    return jsonify(resposta), status_code
 
 
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
     """Faz logout do usuário"""
-    session.pop('usuario_id', None)
+    token = obter_token_requisicao()
+    if token is not None:
+        current_app.extensions['tokens'].revogar(token)
+    else:
+        session.pop('usuario_id', None)
     return jsonify({'mensagem': 'Logout realizado com sucesso!'}), 200
 
 
 @auth_bp.route('/usuario-atual', methods=['GET'])
+@login_required
 def usuario_atual():
     """Obtém os dados do usuário logado"""
-    usuario_id = session.get('usuario_id')
-    
-    if not usuario_id:
-        return jsonify({'mensagem': 'Não autenticado'}), 401
+    usuario_id = g.usuario_id
     
     servico = get_usuario_service()
     usuario, mensagem, status_code = servico.obter_perfil(usuario_id)
@@ -89,12 +96,10 @@ def usuario_atual():
 
 
 @auth_bp.route('/atualizar-perfil', methods=['PUT'])
+@login_required
 def atualizar_perfil():
     """Atualiza o perfil do usuário"""
-    usuario_id = session.get('usuario_id')
-    
-    if not usuario_id:
-        return jsonify({'mensagem': 'Não autenticado'}), 401
+    usuario_id = g.usuario_id
     
     dados = request.get_json()
     servico = get_usuario_service()
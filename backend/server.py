@@ -6,27 +6,60 @@ Servidor backend para o aplicativo de rastreamento de atividades físicas
 
 from flask import Flask, jsonify
 from flask_cors import CORS
-from flask_session import Session
 from models.models import db
+from models.banco import configurar_banco
+from models.migracoes import aplicar_migracoes
+from services.container import ContainerServicos
+from repositories.cache import criar_cache
+from repositories.escritor import EscritorOcupado, criar_escritor
+from utils.senhas import HasherSenhas
+from utils.sessoes import configurar_sessoes
+from utils.auth_utils import EmissorTokens
+from utils.serializacao import JSONCompacto
+from utils.instrumentacao import configurar_instrumentacao, iniciar_medicao, registrar_log, registrar_server_timing
+from utils.metricas import configurar_metricas, iniciar_requisicao, registrar_requisicao, resposta_metricas
+from utils.perfis import baixar_perfil, finalizar_perfil, indice_perfis, iniciar_perfil, marcar_resposta
 from routes.auth_refatorada import auth_bp
 from routes.atividades_refatorada import atividades_bp
 from config import config
+from commands import registrar_comandos
 import os
 from datetime import datetime
 # from routes.metas_refatorada import metas_bp
 
-def create_app(config_name='development'):
-    """Factory para criar e configurar a aplicação Flask"""
+def create_app(config_name='development', config_extra=None):
+    """Factory para criar e configurar a aplicação Flask
+    
+    config_extra sobrescreve chaves da configuração escolhida (ex.: o banco
+    usado por benchmarks e testes de carga).
+    """
     
     # Cria a aplicação
     app = Flask(__name__)
     
     # Carrega configuração
     app.config.from_object(config.get(config_name, config['default']))
+    if config_extra:
+        app.config.update(config_extra)
     
     # Inicializa extensões
     db.init_app(app)
-    Session(app)
+    configurar_banco(app, db)
+    configurar_sessoes(app)
+    
+    if app.config.get('JSON_COMPACTO', True):
+        app.json = JSONCompacto(app)
+    
+    HasherSenhas.a_partir_da_config(app.config).init_app(app)
+    EmissorTokens.a_partir_da_config(app.config).init_app(app)
+    
+    # Repositórios e serviços são criados uma vez e compartilhados entre requisições
+    ContainerServicos(db, criar_cache(app.config), criar_escritor(app, db)).init_app(app)
+    
+    # Tempos de SQL, sessão e serialização por requisição (Server-Timing)
+    configurar_instrumentacao(app, db)
+    # Contadores e histogramas por rota, pool, cache, senhas e memória (GET /api/metrics)
+    configurar_metricas(app, db)
     
     # Configura CORS - permite requisições do frontend
     # IMPORTANTE: Inclui todas as portas possíveis do Live Server e outros servidores locais
@@ -42,9 +75,9 @@ def create_app(config_name='development'):
             'http://localhost:8080'
         ],
         supports_credentials=True,
-        allow_headers=['Content-Type', 'Authorization', 'X-Requested-With'],
+        allow_headers=['Content-Type', 'Authorization', 'X-Requested-With', 'If-None-Match', 'X-Perfil'],
         methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'],
-        expose_headers=['Content-Type']
+        expose_headers=['Content-Type', 'ETag', 'Server-Timing', 'X-Perfil']
     )
     
     # Registra blueprints (rotas)
@@ -52,9 +85,13 @@ def create_app(config_name='development'):
     app.register_blueprint(atividades_bp)
     # app.register_blueprint(metas_bp)
     
-    # Cria as tabelas do banco de dados
+    # Registra comandos de linha de comando
+    registrar_comandos(app)
+    
+    # Cria as tabelas do banco de dados e aplica migrações pendentes
     with app.app_context():
         db.create_all()
+        aplicar_migracoes(db.engine)
     
     # ==================== ROTAS AUXILIARES ====================
     
@@ -67,6 +104,21 @@ def create_app(config_name='development'):
             'timestamp': datetime.utcnow().isoformat()
         }), 200
     
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Métricas no formato de texto do Prometheus"""
+        return resposta_metricas()
+    
+    @app.route('/api/perfis', methods=['GET'])
+    def perfis():
+        """Índice dos perfis cProfile capturados (PERFIS)"""
+        return indice_perfis()
+    
+    @app.route('/api/perfis/<nome>', methods=['GET'])
+    def perfil(nome):
+        """Download de um perfil .prof"""
+        return baixar_perfil(nome)
+    
     @app.route('/', methods=['GET'])
     def index():
         """Rota raiz com informações da API"""
@@ -77,18 +129,22 @@ def create_app(config_name='development'):
             'endpoints': {
                 'auth': {
                     'registrar': 'POST /api/auth/registrar',
-                    'login': 'POST /api/auth/login',
+                    'login': 'POST /api/auth/login (com "modo": "token" retorna um token Bearer)',
                     'logout': 'POST /api/auth/logout',
                     'usuario-atual': 'GET /api/auth/usuario-atual',
                     'atualizar-perfil': 'PUT /api/auth/atualizar-perfil'
                 },
                 'atividades': {
                     'listar': 'GET /api/atividades',
+                    'listar-cursor': 'GET /api/atividades?cursor=&por_pagina=&incluir_total=',
                     'obter': 'GET /api/atividades/<id>',
                     'criar': 'POST /api/atividades',
+                    'importar': 'POST /api/atividades/importar?formato=csv|ndjson',
+                    'exportar': 'GET /api/atividades/exportar?formato=csv|ndjson',
                     'atualizar': 'PUT /api/atividades/<id>',
                     'deletar': 'DELETE /api/atividades/<id>',
-                    'estatisticas': 'GET /api/atividades/resumo/stats'
+                    'estatisticas': 'GET /api/atividades/resumo/stats',
+                    'serie': 'GET /api/atividades/resumo/serie?granularidade=dia|semana|mes&de=&ate='
                 },
                 # 'metas': {
                 #     'listar': 'GET /api/metas',
@@ -119,6 +175,15 @@ def create_app(config_name='development'):
             'status': 500
         }), 500
     
+    @app.errorhandler(EscritorOcupado)
+    def escritor_ocupado(error):
+        """Escrita descartada por esperar demais na fila do escritor único"""
+        db.session.rollback()
+        return jsonify({
+            'mensagem': 'Servidor ocupado, tente novamente em instantes',
+            'status': 503
+        }), 503
+    
     @app.errorhandler(400)
     def bad_request(error):
         """Tratamento para erro 400"""
@@ -148,13 +213,23 @@ def create_app(config_name='development'):
     @app.before_request
     def antes_request():
         """Executado antes de cada requisição"""
-        pass
+        iniciar_requisicao()
+        iniciar_medicao()
+        iniciar_perfil()
     
     @app.after_request
     def apos_request(response):
         """Executado após cada requisição"""
-        response.headers['Content-Type'] = 'application/json; charset=utf-8'
-        return response
+        # Respostas de exportação (CSV/NDJSON) mantêm seu próprio Content-Type
+        if response.mimetype == 'application/json':
+            response.headers['Content-Type'] = 'application/json; charset=utf-8'
+        return registrar_server_timing(registrar_requisicao(marcar_resposta(response)))
+    
+    @app.teardown_request
+    def fim_request(erro):
+        """Executado ao final de cada requisição, mesmo com erro"""
+        finalizar_perfil()
+        registrar_log()
     
     return app
 
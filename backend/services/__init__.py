@@ -1,4 +1,5 @@
 """Service Layer"""
 from .usuario_service import UsuarioService, AtividadeService
+from .container import ContainerServicos, obter_servicos
 
-__all__ = ['UsuarioService', 'AtividadeService']
+__all__ = ['UsuarioService', 'AtividadeService', 'ContainerServicos', 'obter_servicos']
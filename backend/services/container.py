@@ -0,0 +1,41 @@
+"""
+Service Layer - Container de serviços
+
+Repositórios e serviços não guardam estado de requisição: a sessão do banco
+é resolvida a cada uso pelo scoped session do Flask-SQLAlchemy (uma por
+contexto de aplicação/thread). Por isso são criados uma única vez em
+create_app e compartilhados entre requisições e threads.
+"""
+
+from flask import current_app
+
+from repositories.base_repository import AtividadeRepository, EstatisticasRepository, UsuarioRepository
+from .usuario_service import AtividadeService, UsuarioService
+
+EXTENSAO = 'servicos'
+
+
+class ContainerServicos:
+    """Instâncias de longa duração dos repositórios e serviços da aplicação"""
+    
+    def __init__(self, db, cache=None, escritor=None):
+        self.cache = cache
+        self.escritor = escritor
+        self.usuario_repository = UsuarioRepository(db, cache)
+        self.atividade_repository = AtividadeRepository(db, cache)
+        self.estatisticas_repository = EstatisticasRepository(db)
+        
+        self.atividade_service = AtividadeService(
+            self.atividade_repository, self.usuario_repository, self.estatisticas_repository, escritor
+        )
+        self.usuario_service = UsuarioService(self.usuario_repository, self.atividade_service, escritor)
+    
+    def init_app(self, app):
+        """Registra o container em app.extensions"""
+        app.extensions[EXTENSAO] = self
+        return self
+
+
+def obter_servicos() -> ContainerServicos:
+    """Container da aplicação atual"""
+    return current_app.extensions[EXTENSAO]
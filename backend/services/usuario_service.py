@@ -3,18 +3,33 @@ Service Layer - Business Logic
 Contém toda a lógica de negócio da aplicação
 """
 
+import base64
 import re
-from typing import Dict, Tuple, List
-from datetime import datetime
+from typing import Dict, Iterable, Iterator, Sequence, Tuple, List, Optional
+from datetime import datetime, date, timedelta
 from domain.entities import Usuario, Atividade
-from repositories.base_repository import UsuarioRepository, AtividadeRepository
+from repositories.base_repository import UsuarioRepository, AtividadeRepository, EstatisticasRepository
+from repositories.escritor import EscritorUnico
+from utils.datas import DataInvalida, converter_iso8601, para_utc
+from utils.senhas import FilaSenhasCheia, hasher_atual
 
 
 class UsuarioService:
     """Serviço de lógica de negócio para Usuario"""
     
-    def __init__(self, repository: UsuarioRepository):
+    MENSAGEM_OCUPADO = "Servidor ocupado, tente novamente em instantes"
+    
+    def __init__(self, repository: UsuarioRepository, atividade_service: Optional['AtividadeService'] = None,
+                 escritor: Optional[EscritorUnico] = None):
         self.repository = repository
+        self.atividade_service = atividade_service
+        self.escritor = escritor
+    
+    def _executar_escrita(self, funcao, *args):
+        """Executa funcao no escritor único, se configurado, ou na própria thread"""
+        if self.escritor is None:
+            return funcao(*args)
+        return self.escritor.executar(funcao, *args)
     
     @staticmethod
     def validar_email(email: str) -> bool:
@@ -62,7 +77,10 @@ class UsuarioService:
         
         # Cria novo usuário
         usuario = Usuario(nome=nome, email=email.lower())
-        usuario.set_password(senha)
+        try:
+            usuario.set_password(senha)
+        except FilaSenhasCheia:
+            return None, self.MENSAGEM_OCUPADO, 503
         
         usuario_salvo = self.repository.save(usuario)
         return usuario_salvo, "Usuário registrado com sucesso", 201
@@ -74,8 +92,16 @@ class UsuarioService:
         
         usuario = self.repository.find_by_email(email.lower())
         
-        if not usuario or not usuario.check_password(senha):
-            return None, "Email ou senha incorretos", 401
+        try:
+            if not usuario or not usuario.check_password(senha):
+                return None, "Email ou senha incorretos", 401
+            
+            # Parâmetros de hash alterados na configuração: atualiza com a senha em mãos
+            # (gravado pelo repositório, sem alterar o objeto da sessão desta thread)
+            if usuario.precisa_rehash():
+                self._executar_escrita(self.repository.atualizar_senha, usuario.id, hasher_atual().gerar_hash(senha))
+        except FilaSenhasCheia:
+            return None, self.MENSAGEM_OCUPADO, 503
         
         return usuario, "Login realizado com sucesso", 200
     
@@ -90,18 +116,29 @@ class UsuarioService:
     
     def atualizar_perfil(self, usuario_id: int, dados: Dict) -> Tuple[Usuario, str, int]:
         """Atualiza o perfil do usuário"""
-        usuario = self.repository.find_by_id(usuario_id)
+        usuario_atualizado = self._executar_escrita(self._atualizar_perfil, usuario_id, dados)
         
-        if not usuario:
+        if not usuario_atualizado:
             return None, "Usuário não encontrado", 404
         
+        if dados.get('recalcular_historico') and self.atividade_service:
+            # Calorias das atividades existentes passam a refletir o peso atual
+            recalculadas = self.atividade_service.recalcular_historico(usuario_id, usuario_atualizado.peso or 70)
+            return usuario_atualizado, f"Perfil atualizado com sucesso; {recalculadas} atividade(s) recalculada(s)", 200
+        return usuario_atualizado, "Perfil atualizado com sucesso", 200
+    
+    def _atualizar_perfil(self, usuario_id: int, dados: Dict) -> Optional[Usuario]:
+        usuario = self.repository.find_by_id(usuario_id)
+        if not usuario:
+            return None
+        
         usuario.nome = dados.get('nome', usuario.nome)
         usuario.idade = dados.get('idade', usuario.idade)
         usuario.peso = dados.get('peso', usuario.peso)
         usuario.altura = dados.get('altura', usuario.altura)
         
-        usuario_atualizado = self.repository.update(usuario)
-        return usuario_atualizado, "Perfil atualizado com sucesso", 200
+        self.repository.incrementar_versao(usuario_id)
+        return self.repository.update(usuario)
 
 
 class AtividadeService:
@@ -118,9 +155,49 @@ class AtividadeService:
         'yoga': {'baixa': 2, 'moderada': 4, 'alta': 6}
     }
     
-    def __init__(self, repository: AtividadeRepository, usuario_repository: UsuarioRepository):
+    # Calorias por minuto de cada (tipo, intensidade); intensidades fora da
+    # tabela usam TAXA_PADRAO, como em calcular_calorias
+    TAXAS_CALORIAS = {
+        (tipo, intensidade): taxa
+        for tipo, taxas in TABELA_CALORIAS.items()
+        for intensidade, taxa in taxas.items()
+    }
+    TAXA_PADRAO = 5
+    
+    # Atividades lidas e gravadas por vez no recálculo do histórico
+    TAMANHO_LOTE_RECALCULO = 1000
+    
+    # Limite de erros detalhados na resposta da importação
+    MAX_ERROS_IMPORTACAO = 100
+    
+    # Janela padrão (em dias) e chave do período de cada granularidade da série
+    JANELAS_SERIE = {'dia': 29, 'semana': 7 * 12 - 1, 'mes': 365}
+    PERIODOS_SERIE = {
+        'dia': lambda dia: dia.isoformat(),
+        'semana': lambda dia: (dia - timedelta(days=dia.weekday())).isoformat(),
+        'mes': lambda dia: dia.strftime('%Y-%m')
+    }
+    # Início de cada período e do período seguinte, para percorrer o intervalo
+    INICIOS_PERIODO = {
+        'dia': lambda dia: dia,
+        'semana': lambda dia: dia - timedelta(days=dia.weekday()),
+        'mes': lambda dia: dia.replace(day=1)
+    }
+    PROXIMOS_PERIODO = {
+        'dia': lambda dia: dia + timedelta(days=1),
+        'semana': lambda dia: dia + timedelta(days=7),
+        'mes': lambda dia: date(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+    }
+    # Máximo de períodos por série (cerca de 2 anos por dia, 5 por semana, 10 por mês)
+    MAXIMO_PERIODOS_SERIE = {'dia': 731, 'semana': 261, 'mes': 120}
+    
+    def __init__(self, repository: AtividadeRepository, usuario_repository: UsuarioRepository,
+                 estatisticas_repository: Optional[EstatisticasRepository] = None,
+                 escritor: Optional[EscritorUnico] = None):
         self.repository = repository
         self.usuario_repository = usuario_repository
+        self.estatisticas_repository = estatisticas_repository
+        self.escritor = escritor
     
     def calcular_calorias(self, tipo: str, duracao: int, intensidade: str, peso: float = 70) -> int:
         """Calcula calorias queimadas baseado em tipo, duração, intensidade e peso"""
@@ -131,58 +208,86 @@ class AtividadeService:
         calorias = (caloria_por_minuto * duracao * peso) / 70
         return round(calorias)
     
-    def criar_atividade(self, usuario_id: int, dados: Dict) -> Tuple[Atividade, str, int]:
-        """Cria uma nova atividade"""
-        # Valida se usuário existe
-        usuario = self.usuario_repository.find_by_id(usuario_id)
-        if not usuario:
-            return None, "Usuário não encontrado", 404
+    def calcular_calorias_lote(self, linhas: Iterable[Tuple], peso: float = 70) -> List[Tuple[int, int]]:
+        """Calorias de várias atividades (id, tipo, intensidade, duracao, ...) de uma vez
+        
+        Mesmo resultado de calcular_calorias, mas com uma busca em
+        TAXAS_CALORIAS por linha e o fator do peso calculado uma só vez.
+        Retorna pares (id, calorias).
+        """
+        taxas = self.TAXAS_CALORIAS
+        tipos = self.TABELA_CALORIAS
+        padrao = self.TAXA_PADRAO
+        return [
+            (linha[0], round(taxas.get((linha[1], linha[2]), padrao) * linha[3] * peso / 70)
+             if linha[1] in tipos and linha[3] else 0)
+            for linha in linhas
+        ]
+    
+    def recalcular_historico(self, usuario_id: int, peso: float = 70, tamanho_lote: Optional[int] = None) -> int:
+        """Recalcula as calorias de todas as atividades do usuário com o peso informado
+        
+        Percorre o histórico em lotes pela chave primária, grava só as
+        atividades cujo valor mudou (um UPDATE executemany e um commit por
+        lote, pelo escritor único se configurado) e, ao final, reconstrói os
+        totais. Retorna quantas mudaram.
+        """
+        tamanho_lote = tamanho_lote or self.TAMANHO_LOTE_RECALCULO
+        alteradas = 0
+        ultimo_id = 0
+        while True:
+            linhas = self.repository.listar_para_recalculo(usuario_id, ultimo_id, tamanho_lote)
+            if not linhas:
+                break
+            ultimo_id = linhas[-1][0]
+            
+            atuais = {linha[0]: linha[4] for linha in linhas}
+            mudancas = [
+                (atividade_id, calorias) for atividade_id, calorias in self.calcular_calorias_lote(linhas, peso)
+                if atuais[atividade_id] != calorias
+            ]
+            if mudancas:
+                self._executar_escrita(self._gravar_calorias, usuario_id, mudancas, not alteradas)
+                alteradas += len(mudancas)
+            if len(linhas) < tamanho_lote:
+                break
+        
+        if alteradas and self.estatisticas_repository:
+            self._executar_escrita(self.reconstruir_estatisticas, usuario_id)
+        return alteradas
+    
+    def _gravar_calorias(self, usuario_id: int, mudancas: List[Tuple[int, int]], primeiro_lote: bool):
+        """Grava um lote do recálculo; a versão dos dados muda só no primeiro"""
+        if primeiro_lote:
+            self.usuario_repository.incrementar_versao(usuario_id)
+        self.repository.atualizar_calorias(usuario_id, mudancas)
+    
+    def validar_atividade(self, dados: Dict, peso: float = 70) -> Tuple[Optional[Atividade], Optional[str]]:
+        """Valida os dados de uma nova atividade e calcula suas calorias
         
-        # Validações
+        Retorna a entidade pronta para ser salva (sem usuario_id) ou a mensagem de erro.
+        """
         tipo = dados.get('tipo')
         if not tipo or tipo not in self.TABELA_CALORIAS:
-            return None, f"Tipo de atividade inválido. Tipos válidos: {', '.join(self.TABELA_CALORIAS.keys())}", 400
+            return None, f"Tipo de atividade inválido. Tipos válidos: {', '.join(self.TABELA_CALORIAS.keys())}"
         
         duracao = dados.get('duracao')
         if not duracao or duracao <= 0:
-            return None, "Duração deve ser maior que 0", 400
+            return None, "Duração deve ser maior que 0"
         
         intensidade = dados.get('intensidade', 'moderada')
         if intensidade not in ['baixa', 'moderada', 'alta']:
-            return None, "Intensidade inválida", 400
+            return None, "Intensidade inválida"
+        
+        try:
+            data_atividade = self.converter_data_atividade(dados.get('data_atividade'))
+        except DataInvalida as erro:
+            return None, str(erro)
         
         # Calcula calorias
-        calorias = self.calcular_calorias(tipo, duracao, intensidade, usuario.peso or 70)
-        
-        # Converte data_atividade de string ISO para datetime se necessário
-        data_atividade = dados.get('data_atividade')
-        if data_atividade:
-            if isinstance(data_atividade, str):
-                try:
-                    # Remove o 'Z' do final se existir
-                    data_str = data_atividade.rstrip('Z')
-                    # Remove timezone offset se existir (formato +00:00 ou -03:00)
-                    if '+' in data_str:
-                        data_str = data_str.split('+')[0]
-                    elif data_str.count('-') > 2:  # Tem timezone negativo
-                        parts = data_str.rsplit('-', 2)
-                        if len(parts) == 3 and ':' in parts[2]:
-                            data_str = '-'.join(parts[:2])
-                    # Converte usando fromisoformat
-                    data_atividade = datetime.fromisoformat(data_str)
-                except (ValueError, AttributeError):
-                    # Se falhar, usa a data atual
-                    data_atividade = datetime.utcnow()
-            elif not isinstance(data_atividade, datetime):
-                data_atividade = datetime.utcnow()
-            # Remove timezone se existir (SQLite não suporta timezone)
-            if isinstance(data_atividade, datetime) and data_atividade.tzinfo:
-                data_atividade = data_atividade.replace(tzinfo=None)
-        else:
-            data_atividade = datetime.utcnow()
+        calorias = self.calcular_calorias(tipo, duracao, intensidade, peso)
         
         atividade = Atividade(
-            usuario_id=usuario_id,
             tipo=tipo,
             duracao=duracao,
             distancia=dados.get('distancia'),
@@ -191,36 +296,218 @@ class AtividadeService:
             data_atividade=data_atividade,
             observacoes=dados.get('observacoes')
         )
+        return atividade, None
+    
+    @staticmethod
+    def converter_data_atividade(data_atividade) -> datetime:
+        """Converte data_atividade (texto ISO 8601 ou datetime) em datetime UTC sem fuso
+        
+        Ausente, usa o momento atual. Entradas inválidas geram DataInvalida.
+        """
+        if not data_atividade:
+            return datetime.utcnow()
+        if isinstance(data_atividade, datetime):
+            return para_utc(data_atividade)
+        return converter_iso8601(data_atividade)
+    
+    def _executar_escrita(self, funcao, *args):
+        """Executa funcao no escritor único, se configurado, ou na própria thread"""
+        if self.escritor is None:
+            return funcao(*args)
+        return self.escritor.executar(funcao, *args)
+    
+    def criar_atividade(self, usuario_id: int, dados: Dict) -> Tuple[Atividade, str, int]:
+        """Cria uma nova atividade"""
+        return self._executar_escrita(self._criar_atividade, usuario_id, dados)
+    
+    def _criar_atividade(self, usuario_id: int, dados: Dict) -> Tuple[Atividade, str, int]:
+        # Valida se usuário existe
+        usuario = self.usuario_repository.find_by_id(usuario_id)
+        if not usuario:
+            return None, "Usuário não encontrado", 404
+        
+        atividade, erro = self.validar_atividade(dados, usuario.peso or 70)
+        if erro:
+            return None, erro, 400
+        atividade.usuario_id = usuario_id
         
+        # Totais e versão dos dados são atualizados na mesma transação do save
+        self._garantir_estatisticas(usuario_id)
+        self._registrar_estatisticas(atividade, 1)
+        self.usuario_repository.incrementar_versao(usuario_id)
         atividade_salva = self.repository.save(atividade)
         return atividade_salva, "Atividade criada com sucesso", 201
     
-    def obter_atividade(self, atividade_id: int, usuario_id: int) -> Tuple[Atividade, str, int]:
-        """Obtém uma atividade específica"""
-        atividade = self.repository.find_by_id(atividade_id)
+    def importar_atividades(self, usuario_id: int, linhas: Iterable[Tuple[int, Optional[Dict], Optional[str]]],
+                            tamanho_lote: int = 500) -> Tuple[Dict, str, int]:
+        """Importa atividades em lote a partir de linhas (numero_linha, dados, erro)
+        
+        Cada linha passa pelas mesmas validações de criar_atividade. As válidas são
+        inseridas em lotes de tamanho_lote, cada lote em uma transação junto com a
+        atualização dos totais (pelo escritor único, se configurado); só o lote
+        corrente fica em memória.
+        """
+        usuario = self.usuario_repository.find_by_id(usuario_id)
+        if not usuario:
+            return None, "Usuário não encontrado", 404
+        
+        peso = usuario.peso or 70
+        
+        lote = []
+        importadas = 0
+        erros = []
+        total_erros = 0
+        for numero_linha, dados, erro in linhas:
+            atividade = None
+            if erro is None:
+                atividade, erro = self.validar_atividade(dados, peso)
+            if erro:
+                total_erros += 1
+                if len(erros) < self.MAX_ERROS_IMPORTACAO:
+                    erros.append({'linha': numero_linha, 'mensagem': erro})
+                continue
+            
+            atividade.usuario_id = usuario_id
+            lote.append(atividade)
+            if len(lote) >= tamanho_lote:
+                importadas += self._executar_escrita(self._inserir_lote, usuario_id, lote)
+                lote = []
+        
+        if lote:
+            importadas += self._executar_escrita(self._inserir_lote, usuario_id, lote)
+        
+        return {
+            'importadas': importadas,
+            'total_erros': total_erros,
+            'erros': erros
+        }, "Importação concluída", 200
+    
+    def _inserir_lote(self, usuario_id: int, lote: List[Atividade]) -> int:
+        """Insere um lote de atividades e atualiza os totais na mesma transação"""
+        self._garantir_estatisticas(usuario_id)
+        if self.estatisticas_repository:
+            self.estatisticas_repository.registrar_lote(usuario_id, lote)
+        self.usuario_repository.incrementar_versao(usuario_id)
+        return self.repository.inserir_em_lote(lote)
+    
+    def exportar_atividades(self, usuario_id: int, campos: Sequence[str]) -> Tuple[Iterator[Tuple], str, int]:
+        """Obtém um iterador sobre todo o histórico do usuário, para exportação"""
+        usuario = self.usuario_repository.find_by_id(usuario_id)
+        if not usuario:
+            return None, "Usuário não encontrado", 404
+        
+        return self.repository.iterar_por_usuario(usuario_id, campos), "Exportação iniciada", 200
+    
+    @staticmethod
+    def resolver_campos(campos: Optional[str], padrao: Sequence[str] = Atividade.CAMPOS) -> Optional[Tuple[str, ...]]:
+        """Converte o parâmetro campos ('tipo,duracao') na tupla de campos a carregar
+        
+        Sem o parâmetro, usa padrao. O id é sempre incluído e a ordem segue
+        Atividade.CAMPOS. Retorna None se algum campo for desconhecido.
+        """
+        if campos is None:
+            return tuple(padrao)
+        pedidos = {campo.strip() for campo in campos.split(',') if campo.strip()}
+        if not pedidos <= set(Atividade.CAMPOS):
+            return None
+        pedidos.add('id')
+        return tuple(campo for campo in Atividade.CAMPOS if campo in pedidos)
+    
+    def obter_atividade(self, atividade_id: int, usuario_id: int,
+                        campos: Optional[Sequence[str]] = None) -> Tuple[Atividade, str, int]:
+        """Obtém uma atividade específica (carregando só campos, se informado)"""
+        atividade = self.repository.find_by_id(atividade_id, campos)
         
         if not atividade or atividade.usuario_id != usuario_id:
             return None, "Atividade não encontrada", 404
         
         return atividade, "Atividade obtida com sucesso", 200
     
-    def listar_atividades(self, usuario_id: int, pagina: int = 1, por_pagina: int = 10) -> Tuple[List, int, str, int]:
-        """Lista atividades do usuário com paginação"""
+    def listar_atividades(self, usuario_id: int, pagina: int = 1, por_pagina: int = 10,
+                          campos: Optional[Sequence[str]] = None) -> Tuple[List, int, str, int]:
+        """Lista atividades do usuário com paginação (carregando só campos, se informado)"""
         # Valida se usuário existe
         usuario = self.usuario_repository.find_by_id(usuario_id)
         if not usuario:
             return None, 0, "Usuário não encontrado", 404
         
-        atividades, total = self.repository.find_by_usuario(usuario_id, pagina, por_pagina)
+        atividades, total = self.repository.find_by_usuario(usuario_id, pagina, por_pagina, campos)
         return atividades, total, "Atividades listadas com sucesso", 200
     
+    def listar_atividades_cursor(self, usuario_id: int, cursor: Optional[str] = None, por_pagina: int = 10,
+                                 incluir_total: bool = False,
+                                 campos: Optional[Sequence[str]] = None) -> Tuple[Dict, str, int]:
+        """Lista atividades do usuário por cursor (keyset), sem OFFSET
+        
+        Retorna as atividades, o cursor opaco da próxima página (None na última)
+        e, se solicitado, o total de atividades.
+        """
+        if por_pagina < 1:
+            return None, "por_pagina deve ser maior que 0", 400
+        
+        apos = None
+        if cursor:
+            apos = self.decodificar_cursor(cursor)
+            if apos is None:
+                return None, "Cursor inválido", 400
+        
+        usuario = self.usuario_repository.find_by_id(usuario_id)
+        if not usuario:
+            return None, "Usuário não encontrado", 404
+        
+        atividades, tem_mais = self.repository.find_by_usuario_apos(usuario_id, apos, por_pagina, campos)
+        resultado = {
+            'atividades': atividades,
+            'proximo_cursor': self.codificar_cursor(atividades[-1]) if tem_mais else None
+        }
+        if incluir_total:
+            resultado['total'] = self._contar_atividades(usuario_id)
+        return resultado, "Atividades listadas com sucesso", 200
+    
+    @staticmethod
+    def codificar_cursor(atividade) -> str:
+        """Gera o cursor opaco que aponta para depois da atividade"""
+        posicao = f'{atividade.data_atividade.isoformat()}|{atividade.id}'
+        return base64.urlsafe_b64encode(posicao.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decodificar_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+        """Converte o cursor de volta em (data_atividade, id); None se inválido"""
+        try:
+            posicao = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            data_iso, atividade_id = posicao.split('|')
+            return datetime.fromisoformat(data_iso), int(atividade_id)
+        except (ValueError, UnicodeDecodeError):
+            return None
+    
+    def obter_versao_dados(self, usuario_id: int) -> Optional[int]:
+        """Versão dos dados do usuário, usada para respostas condicionais"""
+        return self.usuario_repository.obter_versao(usuario_id)
+    
+    def _contar_atividades(self, usuario_id: int) -> int:
+        """Conta as atividades pelos totais armazenados quando disponíveis"""
+        if self.estatisticas_repository:
+            agregados = self.estatisticas_repository.obter_agregados(usuario_id)
+            if agregados is not None:
+                return agregados['total_atividades']
+        return self.repository.contar_por_usuario(usuario_id)
+    
     def atualizar_atividade(self, atividade_id: int, usuario_id: int, dados: Dict) -> Tuple[Atividade, str, int]:
         """Atualiza uma atividade"""
+        return self._executar_escrita(self._atualizar_atividade, atividade_id, usuario_id, dados)
+    
+    def _atualizar_atividade(self, atividade_id: int, usuario_id: int, dados: Dict) -> Tuple[Atividade, str, int]:
         atividade = self.repository.find_by_id(atividade_id)
         
         if not atividade or atividade.usuario_id != usuario_id:
             return None, "Atividade não encontrado", 404
         
+        # Leituras antes de alterar a atividade: com autoflush, uma consulta
+        # feita depois das atribuições emitiria um UPDATE intermediário
+        usuario = self.usuario_repository.find_by_id(usuario_id)
+        self._garantir_estatisticas(usuario_id)
+        anterior = self._copiar_atividade(atividade)
+        
         atividade.tipo = dados.get('tipo', atividade.tipo)
         atividade.duracao = dados.get('duracao', atividade.duracao)
         atividade.distancia = dados.get('distancia', atividade.distancia)
@@ -228,47 +515,216 @@ class AtividadeService:
         atividade.observacoes = dados.get('observacoes', atividade.observacoes)
         
         # Recalcula calorias se necessário
-        usuario = self.usuario_repository.find_by_id(usuario_id)
         if usuario:
             atividade.calorias_queimadas = self.calcular_calorias(
                 atividade.tipo, atividade.duracao, atividade.intensidade, usuario.peso or 70
             )
         
+        if self.estatisticas_repository:
+            self.estatisticas_repository.registrar_substituicao(anterior, atividade)
+        self.usuario_repository.incrementar_versao(usuario_id)
         atividade_atualizada = self.repository.update(atividade)
         return atividade_atualizada, "Atividade atualizada com sucesso", 200
     
     def deletar_atividade(self, atividade_id: int, usuario_id: int) -> Tuple[bool, str, int]:
         """Deleta uma atividade"""
+        return self._executar_escrita(self._deletar_atividade, atividade_id, usuario_id)
+    
+    def _deletar_atividade(self, atividade_id: int, usuario_id: int) -> Tuple[bool, str, int]:
         atividade = self.repository.find_by_id(atividade_id)
         
         if not atividade or atividade.usuario_id != usuario_id:
             return False, "Atividade não encontrada", 404
         
+        self._garantir_estatisticas(usuario_id)
+        self._registrar_estatisticas(atividade, -1)
+        self.usuario_repository.incrementar_versao(usuario_id)
         self.repository.delete(atividade_id)
         return True, "Atividade deletada com sucesso", 200
     
     def obter_estatisticas(self, usuario_id: int) -> Dict:
         """Obtém estatísticas do usuário"""
+        if self.estatisticas_repository:
+            # Caminho normal: leitura dos totais pela chave primária
+            agregados = self.estatisticas_repository.obter_agregados(usuario_id)
+            if agregados is not None:
+                return self.formatar_estatisticas(agregados)
+        
         usuario = self.usuario_repository.find_by_id(usuario_id)
         if not usuario:
             return {}
         
-        atividades, _ = self.repository.find_by_usuario(usuario_id, pagina=1, por_pagina=1000)
-        
-        if not atividades:
-            return {
-                'total_atividades': 0,
-                'total_duracao_minutos': 0,
-                'total_calorias': 0,
-                'media_calorias': 0
+        # Usuário ainda sem totais (nenhuma escrita desde que foram criados pela
+        # migração 3): agrega as atividades, sem gravar em uma leitura
+        agregados = self.repository.obter_agregados(usuario_id)
+        return self.formatar_estatisticas(agregados)
+    
+    def obter_serie(self, usuario_id: int, granularidade: str = 'dia', de: Optional[str] = None,
+                    ate: Optional[str] = None) -> Tuple[Dict, str, int]:
+        """Obtém totais por dia, semana ou mês a partir dos totais diários"""
+        if granularidade not in self.JANELAS_SERIE:
+            return None, f"Granularidade inválida. Valores válidos: {', '.join(self.JANELAS_SERIE)}", 400
+        
+        try:
+            fim = date.fromisoformat(ate) if ate else datetime.utcnow().date()
+            inicio = date.fromisoformat(de) if de else fim - timedelta(days=self.JANELAS_SERIE[granularidade])
+        except ValueError:
+            return None, "Datas devem estar no formato AAAA-MM-DD", 400
+        except OverflowError:
+            return None, "Data fora do intervalo suportado", 400
+        
+        if inicio > fim:
+            return None, "Data inicial deve ser anterior à data final", 400
+        
+        periodos = self._periodos_serie(granularidade, inicio, fim)
+        if periodos is None:
+            maximo = self.MAXIMO_PERIODOS_SERIE[granularidade]
+            return None, f"Intervalo muito longo: no máximo {maximo} períodos com granularidade '{granularidade}'", 400
+        
+        # Usuário ainda sem totais: agrega as atividades, sem gravar em uma leitura
+        origem = self.estatisticas_repository
+        if origem.find_by_id(usuario_id) is None:
+            if not self.usuario_repository.find_by_id(usuario_id):
+                return None, "Usuário não encontrado", 404
+            origem = self.repository
+        
+        chave_periodo = self.PERIODOS_SERIE[granularidade]
+        for dia, quantidade, duracao, distancia, calorias in origem.obter_serie_diaria(usuario_id, inicio, fim):
+            totais = periodos[chave_periodo(dia)]
+            totais[0] += quantidade
+            totais[1] += duracao
+            totais[2] += distancia
+            totais[3] += calorias
+        
+        serie = [
+            {
+                'periodo': periodo,
+                'total_atividades': quantidade,
+                'total_duracao_minutos': duracao,
+                'total_distancia_km': round(distancia, 2),
+                'total_calorias': calorias
             }
+            for periodo, (quantidade, duracao, distancia, calorias) in periodos.items()
+        ]
+        return {
+            'granularidade': granularidade,
+            'de': inicio.isoformat(),
+            'ate': fim.isoformat(),
+            'serie': serie
+        }, "Série obtida com sucesso", 200
+    
+    def _periodos_serie(self, granularidade: str, inicio: date, fim: date) -> Optional[Dict[str, List]]:
+        """Totais zerados de todos os períodos do intervalo, inclusive os sem atividade
+        
+        Percorre um período por vez (não um dia por vez) e para antes de
+        date.max. Retorna None se o intervalo passar de MAXIMO_PERIODOS_SERIE.
+        """
+        chave_periodo = self.PERIODOS_SERIE[granularidade]
+        proximo = self.PROXIMOS_PERIODO[granularidade]
+        maximo = self.MAXIMO_PERIODOS_SERIE[granularidade]
+        periodos = {}
+        dia = self.INICIOS_PERIODO[granularidade](inicio)
+        while dia <= fim:
+            if len(periodos) == maximo:
+                return None
+            periodos[chave_periodo(dia)] = [0, 0, 0, 0]
+            try:
+                dia = proximo(dia)
+            except (OverflowError, ValueError):
+                break  # último período antes de date.max
+        return periodos
+    
+    def reconstruir_estatisticas(self, usuario_id: int, aplicar: bool = True) -> Dict:
+        """Recalcula os totais do usuário a partir das atividades
+        
+        Retorna as divergências encontradas entre os totais armazenados e os
+        recalculados, no formato {campo: (armazenado, recalculado)}.
+        """
+        recalculado = self.repository.obter_agregados(usuario_id)
+        armazenado = self.estatisticas_repository.obter_agregados(usuario_id)
+        diarios_recalculados = self.repository.obter_agregados_diarios(usuario_id)
+        
+        divergencias = {}
+        if armazenado is None:
+            divergencias['registro'] = (None, 'ausente')
+        else:
+            for campo in ('total_atividades', 'total_duracao', 'total_distancia', 'total_calorias'):
+                if abs((armazenado[campo] or 0) - (recalculado[campo] or 0)) > 1e-6:
+                    divergencias[campo] = (armazenado[campo], recalculado[campo])
+            if armazenado['distribuicao_tipos'] != recalculado['distribuicao_tipos']:
+                divergencias['distribuicao_tipos'] = (
+                    armazenado['distribuicao_tipos'], recalculado['distribuicao_tipos']
+                )
+            
+            diarios_armazenados = self.estatisticas_repository.obter_diarios(usuario_id)
+            dias_divergentes = sum(
+                1 for chave in diarios_armazenados.keys() | diarios_recalculados.keys()
+                if not self._mesmos_totais(diarios_armazenados.get(chave), diarios_recalculados.get(chave))
+            )
+            if dias_divergentes:
+                divergencias['dias'] = (len(diarios_armazenados), f'{dias_divergentes} divergente(s)')
+        
+        if aplicar and divergencias:
+            estatisticas = self.estatisticas_repository.reconstruir(usuario_id, recalculado, diarios_recalculados)
+            self.usuario_repository.incrementar_versao(usuario_id)
+            self.estatisticas_repository.update(estatisticas)
+        return divergencias
+    
+    def _garantir_estatisticas(self, usuario_id: int):
+        """Cria os totais do usuário a partir do histórico caso ainda não existam (sem commit)"""
+        if self.estatisticas_repository and self.estatisticas_repository.find_by_id(usuario_id) is None:
+            self.estatisticas_repository.reconstruir(
+                usuario_id,
+                self.repository.obter_agregados(usuario_id),
+                self.repository.obter_agregados_diarios(usuario_id)
+            )
+    
+    @staticmethod
+    def _mesmos_totais(armazenado: Optional[Dict], recalculado: Optional[Dict]) -> bool:
+        """Compara dois totais diários tolerando erros de arredondamento"""
+        if armazenado is None or recalculado is None:
+            return armazenado is recalculado
+        return all(abs((armazenado[campo] or 0) - (recalculado[campo] or 0)) <= 1e-6 for campo in recalculado)
+    
+    def _registrar_estatisticas(self, atividade, sinal: int):
+        """Aplica a atividade aos totais do usuário (sem commit)"""
+        if self.estatisticas_repository:
+            self.estatisticas_repository.registrar_atividade(atividade, sinal)
+    
+    @staticmethod
+    def _copiar_atividade(atividade) -> Atividade:
+        """Copia os campos relevantes de uma atividade antes de alterá-la"""
+        return Atividade(
+            id=atividade.id,
+            usuario_id=atividade.usuario_id,
+            tipo=atividade.tipo,
+            duracao=atividade.duracao,
+            distancia=atividade.distancia,
+            intensidade=atividade.intensidade,
+            calorias_queimadas=atividade.calorias_queimadas,
+            data_atividade=atividade.data_atividade,
+            observacoes=atividade.observacoes
+        )
+    
+    @staticmethod
+    def formatar_estatisticas(agregados: Dict) -> Dict:
+        """Monta a resposta de estatísticas a partir dos agregados do repositório"""
+        total_atividades = agregados['total_atividades']
+        total_calorias = agregados['total_calorias']
+        distribuicao = agregados['distribuicao_tipos']
         
-        total_duracao = sum(a.duracao or 0 for a in atividades)
-        total_calorias = sum(a.calorias_queimadas or 0 for a in atividades)
+        # Atividade mais comum (empates resolvidos pela ordem alfabética)
+        atividade_favorita = None
+        if distribuicao:
+            atividade_favorita = min(distribuicao, key=lambda tipo: (-distribuicao[tipo], tipo))
         
         return {
-            'total_atividades': len(atividades),
-            'total_duracao_minutos': total_duracao,
+            'total_atividades': total_atividades,
+            'total_duracao_minutos': agregados['total_duracao'],
+            'total_distancia_km': round(agregados['total_distancia'], 2),
             'total_calorias': total_calorias,
-            'media_calorias': total_calorias // len(atividades) if atividades else 0
+            'media_calorias': total_calorias // total_atividades if total_atividades else 0,
+            'media_duracao_minutos': round(agregados['media_duracao'], 2),
+            'atividade_favorita': atividade_favorita,
+            'distribuicao_tipos': distribuicao
         }
@@ -0,0 +1,611 @@
+"""
+Testes de Integração - API de Atividades
+"""
+
+import io
+import pytest
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from server import create_app
+from models.models import db, Usuario, Atividade, UsuarioEstatisticas, AtividadeDiaria
+
+
+@pytest.fixture
+def app():
+    """Cria aplicação de teste"""
+    app = create_app('testing')
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Cliente autenticado para fazer requisições"""
+    client = app.test_client()
+    client.post('/api/auth/registrar',
+        json={
+            'nome': 'Test User',
+            'email': 'test@test.com',
+            'senha': 'Senha123!'
+        },
+        content_type='application/json'
+    )
+    return client
+
+
+@pytest.fixture
+def usuario(client):
+    """Usuário autenticado no cliente"""
+    return Usuario.query.filter_by(email='test@test.com').first()
+
+
+def inserir_atividades(usuario_id, quantidade, tipo='corrida', duracao=30, distancia=5.0, calorias=360):
+    """Insere atividades diretamente no banco"""
+    inicio = datetime(2024, 1, 1, 7, 0)
+    db.session.add_all([
+        Atividade(
+            usuario_id=usuario_id,
+            tipo=tipo,
+            duracao=duracao,
+            distancia=distancia,
+            intensidade='moderada',
+            calorias_queimadas=calorias,
+            data_atividade=inicio + timedelta(hours=i)
+        )
+        for i in range(quantidade)
+    ])
+    db.session.commit()
+
+
+def escritas_durante(funcao):
+    """Executa funcao e retorna os comandos INSERT/UPDATE/DELETE enviados ao banco"""
+    comandos = []
+    
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            comandos.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', capturar)
+    try:
+        resultado = funcao()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capturar)
+    return resultado, comandos
+
+
+class TestEstatisticasAPI:
+    """Testes do endpoint de estatísticas"""
+    
+    def test_estatisticas_sem_autenticacao(self, app):
+        """Testa acesso sem sessão"""
+        response = app.test_client().get('/api/atividades/resumo/stats')
+        assert response.status_code == 401
+    
+    def test_estatisticas_sem_atividades(self, client):
+        """Testa estatísticas de usuário novo"""
+        response = client.get('/api/atividades/resumo/stats')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['total_atividades'] == 0
+        assert data['total_distancia_km'] == 0
+        assert data['atividade_favorita'] is None
+        assert data['distribuicao_tipos'] == {}
+    
+    def test_estatisticas_consideram_todo_historico(self, client, usuario):
+        """Testa que estatísticas não são limitadas a 1000 atividades"""
+        inserir_atividades(usuario.id, 1100)
+        inserir_atividades(usuario.id, 5, tipo='yoga', duracao=60, distancia=None, calorias=240)
+        
+        response = client.get('/api/atividades/resumo/stats')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['total_atividades'] == 1105
+        assert data['total_duracao_minutos'] == 1100 * 30 + 5 * 60
+        assert data['total_distancia_km'] == 5500.0
+        assert data['total_calorias'] == 1100 * 360 + 5 * 240
+        assert data['atividade_favorita'] == 'corrida'
+        assert data['distribuicao_tipos'] == {'corrida': 1100, 'yoga': 5}
+
+
+class TestEstatisticasIncrementais:
+    """Testes dos totais mantidos incrementalmente"""
+    
+    def criar(self, client, **dados):
+        response = client.post('/api/atividades', json=dados)
+        assert response.status_code == 201
+        return json.loads(response.data)['atividade']
+    
+    def test_totais_acompanham_criacao_edicao_e_exclusao(self, client, usuario):
+        """Testa que os totais refletem cada mutação das atividades"""
+        corrida = self.criar(client, tipo='corrida', duracao=30, distancia=5.0)
+        self.criar(client, tipo='yoga', duracao=60)
+        
+        client.put(f"/api/atividades/{corrida['id']}", json={'tipo': 'ciclismo', 'duracao': 45, 'distancia': 20.0})
+        
+        estatisticas = db.session.get(UsuarioEstatisticas, usuario.id)
+        assert estatisticas.total_atividades == 2
+        assert estatisticas.total_duracao == 105
+        assert estatisticas.total_distancia == 20.0
+        assert estatisticas.distribuicao_tipos == {'ciclismo': 1, 'yoga': 1}
+        
+        client.delete(f"/api/atividades/{corrida['id']}")
+        
+        data = json.loads(client.get('/api/atividades/resumo/stats').data)
+        assert data['total_atividades'] == 1
+        assert data['total_duracao_minutos'] == 60
+        assert data['total_distancia_km'] == 0
+        assert data['distribuicao_tipos'] == {'yoga': 1}
+    
+    def test_historico_anterior_e_incorporado(self, client, usuario):
+        """Testa que atividades sem totais armazenados são consideradas"""
+        inserir_atividades(usuario.id, 3)
+        self.criar(client, tipo='corrida', duracao=30)
+        
+        data = json.loads(client.get('/api/atividades/resumo/stats').data)
+        assert data['total_atividades'] == 4
+    
+    def test_leitura_sem_totais_nao_grava(self, client, usuario):
+        """Testa que o resumo de um usuário ainda sem totais é calculado sem escrever"""
+        inserir_atividades(usuario.id, 3)
+        
+        response, comandos = escritas_durante(lambda: client.get('/api/atividades/resumo/stats'))
+        
+        assert json.loads(response.data)['total_atividades'] == 3
+        assert comandos == []
+        assert db.session.get(UsuarioEstatisticas, usuario.id) is None
+    
+    def test_comando_reconstruir_corrige_divergencias(self, app, client, usuario):
+        """Testa o comando de reconstrução dos totais"""
+        self.criar(client, tipo='corrida', duracao=30)
+        inserir_atividades(usuario.id, 2, tipo='yoga')
+        
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=['estatisticas', 'reconstruir', '--apenas-verificar'])
+        assert 'total_atividades: 1 -> 3' in result.output
+        assert db.session.get(UsuarioEstatisticas, usuario.id).total_atividades == 1
+        
+        result = runner.invoke(args=['estatisticas', 'reconstruir'])
+        assert '1 com divergências corrigidas' in result.output
+        assert db.session.get(UsuarioEstatisticas, usuario.id).total_atividades == 3
+        
+        result = runner.invoke(args=['estatisticas', 'reconstruir'])
+        assert '0 com divergências' in result.output
+
+
+class TestRecalculoHistoricoAPI:
+    """Testes do recálculo de calorias quando o peso muda"""
+    
+    def test_perfil_sem_recalculo_mantem_historico(self, client, usuario):
+        """Testa que, sem a opção, as calorias antigas não mudam"""
+        client.post('/api/atividades', json={'tipo': 'corrida', 'duracao': 30})
+        
+        client.put('/api/auth/atualizar-perfil', json={'peso': 140})
+        
+        assert json.loads(client.get('/api/atividades/resumo/stats').data)['total_calorias'] == 360
+    
+    def test_perfil_com_recalculo_atualiza_atividades_e_totais(self, client, usuario):
+        """Testa que recalcular_historico aplica o novo peso às atividades e aos totais"""
+        client.post('/api/atividades', json={'tipo': 'corrida', 'duracao': 30, 'data_atividade': '2024-01-01T07:00:00'})
+        client.post('/api/atividades', json={'tipo': 'yoga', 'duracao': 60, 'intensidade': 'baixa'})
+        
+        response = client.put('/api/auth/atualizar-perfil', json={'peso': 140, 'recalcular_historico': True})
+        
+        assert '2 atividade(s) recalculada(s)' in json.loads(response.data)['mensagem']
+        calorias = sorted(a['calorias_queimadas'] for a in json.loads(client.get('/api/atividades').data)['atividades'])
+        assert calorias == [240, 720]
+        assert json.loads(client.get('/api/atividades/resumo/stats').data)['total_calorias'] == 960
+        serie = json.loads(client.get('/api/atividades/resumo/serie?de=2024-01-01&ate=2024-01-01').data)['serie']
+        assert serie[0]['total_calorias'] == 720
+    
+    def test_comando_recalcula_em_lotes(self, app, client, usuario):
+        """Testa o comando para todos os usuários com lotes pequenos"""
+        inserir_atividades(usuario.id, 5, calorias=1)
+        
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=['atividades', 'recalcular-calorias', '--lote', '2'])
+        
+        assert '5 atividade(s) recalculada(s)' in result.output
+        assert {a.calorias_queimadas for a in Atividade.query.all()} == {360}
+        assert db.session.get(UsuarioEstatisticas, usuario.id).total_calorias == 1800
+        
+        result = runner.invoke(args=['atividades', 'recalcular-calorias'])
+        assert '0 atividade(s) recalculada(s)' in result.output
+
+
+class TestSerieAPI:
+    """Testes do endpoint de série temporal"""
+    
+    def criar(self, client, data, **dados):
+        response = client.post('/api/atividades', json=dict(dados, data_atividade=data))
+        assert response.status_code == 201
+        return json.loads(response.data)['atividade']
+    
+    def test_serie_diaria(self, client):
+        """Testa totais por dia, incluindo dias sem atividade"""
+        self.criar(client, '2024-03-01T07:00:00', tipo='corrida', duracao=30, distancia=5.0)
+        self.criar(client, '2024-03-01T18:00:00', tipo='yoga', duracao=60)
+        self.criar(client, '2024-03-03T07:00:00', tipo='corrida', duracao=20, distancia=3.0)
+        
+        response = client.get('/api/atividades/resumo/serie?granularidade=dia&de=2024-03-01&ate=2024-03-03')
+        
+        assert response.status_code == 200
+        serie = json.loads(response.data)['serie']
+        assert [p['periodo'] for p in serie] == ['2024-03-01', '2024-03-02', '2024-03-03']
+        assert [p['total_atividades'] for p in serie] == [2, 0, 1]
+        assert serie[0]['total_duracao_minutos'] == 90
+        assert serie[2]['total_distancia_km'] == 3.0
+    
+    def test_serie_semanal_e_mensal_a_partir_dos_dias(self, client):
+        """Testa agrupamento semanal (segunda a domingo) e mensal"""
+        self.criar(client, '2024-01-28T07:00:00', tipo='corrida', duracao=30)  # domingo
+        self.criar(client, '2024-01-29T07:00:00', tipo='corrida', duracao=40)  # segunda
+        self.criar(client, '2024-02-04T07:00:00', tipo='corrida', duracao=50)  # domingo
+        
+        semanas = json.loads(client.get(
+            '/api/atividades/resumo/serie?granularidade=semana&de=2024-01-22&ate=2024-02-04'
+        ).data)['serie']
+        assert [(p['periodo'], p['total_duracao_minutos']) for p in semanas] == [
+            ('2024-01-22', 30), ('2024-01-29', 90)
+        ]
+        
+        meses = json.loads(client.get(
+            '/api/atividades/resumo/serie?granularidade=mes&de=2024-01-01&ate=2024-02-29'
+        ).data)['serie']
+        assert [(p['periodo'], p['total_atividades']) for p in meses] == [('2024-01', 2), ('2024-02', 1)]
+    
+    def test_serie_acompanha_exclusao(self, client, usuario):
+        """Testa que excluir a única atividade do dia remove o total diário"""
+        atividade = self.criar(client, '2024-03-01T07:00:00', tipo='corrida', duracao=30)
+        client.delete(f"/api/atividades/{atividade['id']}")
+        
+        assert AtividadeDiaria.query.filter_by(usuario_id=usuario.id).count() == 0
+        serie = json.loads(client.get(
+            '/api/atividades/resumo/serie?de=2024-03-01&ate=2024-03-01'
+        ).data)['serie']
+        assert serie[0]['total_atividades'] == 0
+    
+    def test_serie_historico_anterior(self, client, usuario):
+        """Testa que o histórico sem totais diários é considerado"""
+        inserir_atividades(usuario.id, 30)  # de hora em hora a partir de 2024-01-01 07:00
+        
+        response, comandos = escritas_durante(lambda: client.get(
+            '/api/atividades/resumo/serie?de=2024-01-01&ate=2024-01-02'
+        ))
+        serie = json.loads(response.data)['serie']
+        assert [p['total_atividades'] for p in serie] == [17, 13]
+        assert serie[0]['total_calorias'] == 17 * 360
+        # Sem totais, a série é agregada das atividades, sem escrever em uma leitura
+        assert comandos == []
+        assert db.session.get(UsuarioEstatisticas, usuario.id) is None
+    
+    def test_serie_parametros_invalidos(self, client):
+        """Testa validação de granularidade e datas"""
+        assert client.get('/api/atividades/resumo/serie?granularidade=ano').status_code == 400
+        assert client.get('/api/atividades/resumo/serie?de=01/03/2024').status_code == 400
+        assert client.get('/api/atividades/resumo/serie?de=2024-03-02&ate=2024-03-01').status_code == 400
+    
+    def test_serie_intervalo_longo_demais(self, client):
+        """Testa que intervalos acima do máximo de períodos são recusados"""
+        response = client.get('/api/atividades/resumo/serie?granularidade=dia&de=0001-01-01&ate=9999-12-31')
+        assert response.status_code == 400
+        assert client.get('/api/atividades/resumo/serie?granularidade=mes&de=2000-01-01&ate=2009-12-31').status_code == 200
+        assert client.get('/api/atividades/resumo/serie?granularidade=mes&de=2000-01-01&ate=2010-01-01').status_code == 400
+    
+    def test_serie_ate_data_maxima(self, client):
+        """Testa que o último período antes de date.max não estoura"""
+        response = client.get('/api/atividades/resumo/serie?granularidade=mes&ate=9999-12-31')
+        assert response.status_code == 200
+        serie = json.loads(response.data)['serie']
+        assert serie[-1]['periodo'] == '9999-12'
+        
+        response = client.get('/api/atividades/resumo/serie?granularidade=semana&de=9999-12-01&ate=9999-12-31')
+        assert response.status_code == 200
+        assert json.loads(response.data)['serie'][-1]['periodo'] == '9999-12-27'
+        
+        assert client.get('/api/atividades/resumo/serie?granularidade=dia&ate=0001-01-05').status_code == 400
+
+
+class TestListagemCursorAPI:
+    """Testes da listagem paginada por cursor"""
+    
+    def test_percorre_historico_sem_repetir_nem_pular(self, client, usuario):
+        """Testa que as páginas por cursor cobrem todo o histórico em ordem"""
+        inserir_atividades(usuario.id, 23)
+        # Duas atividades com a mesma data exercitam o desempate por id
+        inserir_atividades(usuario.id, 2, tipo='yoga')
+        
+        ids, cursor, paginas = [], '', 0
+        while cursor is not None:
+            data = json.loads(client.get(f'/api/atividades?cursor={cursor}&por_pagina=10').data)
+            ids.extend(a['id'] for a in data['atividades'])
+            cursor = data['proximo_cursor']
+            paginas += 1
+        
+        esperado = [a.id for a in Atividade.query.order_by(
+            Atividade.data_atividade.desc(), Atividade.id.desc()
+        )]
+        assert ids == esperado
+        assert paginas == 3
+    
+    def test_total_opcional(self, client, usuario):
+        """Testa que o total só é calculado quando solicitado"""
+        inserir_atividades(usuario.id, 3)
+        
+        data = json.loads(client.get('/api/atividades?cursor=&por_pagina=2').data)
+        assert 'total' not in data
+        assert data['proximo_cursor']
+        
+        data = json.loads(client.get('/api/atividades?cursor=&por_pagina=2&incluir_total=1').data)
+        assert data['total'] == 3
+    
+    def test_cursor_invalido(self, client):
+        """Testa cursor malformado"""
+        response = client.get('/api/atividades?cursor=nao-e-um-cursor')
+        assert response.status_code == 400
+    
+    def test_paginacao_por_pagina_continua_funcionando(self, client, usuario):
+        """Testa a paginação tradicional por número de página"""
+        inserir_atividades(usuario.id, 12)
+        
+        data = json.loads(client.get('/api/atividades?pagina=2&por_pagina=10').data)
+        assert data['total'] == 12
+        assert data['total_paginas'] == 2
+        assert len(data['atividades']) == 2
+
+
+class TestDataAtividadeAPI:
+    """Testes da conversão de data_atividade"""
+    
+    def test_offset_convertido_para_utc(self, client):
+        """Testa que o fuso informado é convertido para UTC"""
+        response = client.post('/api/atividades', json={
+            'tipo': 'corrida', 'duracao': 30, 'data_atividade': '2024-01-01T22:30:00-03:00'
+        })
+        
+        assert json.loads(response.data)['atividade']['data_atividade'] == '2024-01-02T01:30:00'
+    
+    def test_data_invalida_rejeitada(self, client):
+        """Testa que uma data inválida resulta em 400, e não na data atual"""
+        response = client.post('/api/atividades', json={'tipo': 'corrida', 'duracao': 30, 'data_atividade': '31/01/2024'})
+        
+        assert response.status_code == 400
+        assert 'Data inválida' in json.loads(response.data)['mensagem']
+        assert Atividade.query.count() == 0
+    
+    def test_importacao_aponta_linha_com_data_invalida(self, client):
+        """Testa que a importação relata a linha com data inválida"""
+        corpo = 'tipo,duracao,data_atividade\ncorrida,30,2024-01-01T07:00:00Z\nyoga,20,2024-02-30\n'
+        
+        data = json.loads(client.post('/api/atividades/importar', data=corpo, content_type='text/csv').data)
+        
+        assert data['importadas'] == 1
+        assert data['erros'][0]['linha'] == 3
+
+
+class TestImportacaoAPI:
+    """Testes da importação em lote"""
+    
+    CSV = (
+        'tipo,duracao,distancia,intensidade,data_atividade,observacoes\n'
+        'corrida,30,5,moderada,2024-01-01T07:00:00,\n'
+        'natacao,40,,alta,2024-01-02T07:00:00,piscina\n'
+        'voo,30,,,2024-01-03T07:00:00,\n'
+        'corrida,0,,,2024-01-03T07:00:00,\n'
+        'yoga,60,,baixa,2024-01-03T07:00:00,\n'
+    )
+    
+    def test_importa_csv_com_erros_por_linha(self, client, usuario):
+        """Testa importação de CSV com linhas válidas e inválidas"""
+        response = client.post('/api/atividades/importar', data=self.CSV, content_type='text/csv')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['importadas'] == 3
+        assert data['total_erros'] == 2
+        assert [erro['linha'] for erro in data['erros']] == [4, 5]
+        assert 'Tipo de atividade inválido' in data['erros'][0]['mensagem']
+        
+        natacao = Atividade.query.filter_by(usuario_id=usuario.id, tipo='natacao').one()
+        assert natacao.calorias_queimadas == 14 * 40
+        assert natacao.observacoes == 'piscina'
+    
+    def test_campo_grande_demais_nao_interrompe_importacao(self, client, usuario):
+        """Testa que um campo acima do limite do CSV vira erro da linha, e não 500"""
+        corpo = self.CSV + f"corrida,30,,,2024-01-04T07:00:00,{'x' * 200 * 1024}\n" + 'yoga,20,,,2024-01-05T07:00:00,\n'
+        
+        response = client.post('/api/atividades/importar', data=corpo, content_type='text/csv')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert (data['importadas'], data['total_erros']) == (4, 3)
+        assert data['erros'][-1]['linha'] == 7
+    
+    def test_importa_ndjson_em_varios_lotes(self, app, client, usuario):
+        """Testa que lotes sucessivos mantêm os totais consistentes"""
+        app.config['IMPORTACAO_TAMANHO_LOTE'] = 2
+        corpo = ''.join(
+            json.dumps({'tipo': 'corrida', 'duracao': 10, 'data_atividade': f'2024-02-0{dia}T07:00:00'}) + '\n'
+            for dia in (1, 1, 2, 3, 3)
+        )
+        
+        response = client.post('/api/atividades/importar', data=corpo, content_type='application/x-ndjson')
+        
+        assert json.loads(response.data)['importadas'] == 5
+        stats = json.loads(client.get('/api/atividades/resumo/stats').data)
+        assert stats['total_atividades'] == 5
+        assert stats['total_duracao_minutos'] == 50
+        serie = json.loads(client.get('/api/atividades/resumo/serie?de=2024-02-01&ate=2024-02-03').data)['serie']
+        assert [p['total_atividades'] for p in serie] == [2, 1, 2]
+    
+    def test_importa_arquivo_multipart(self, client):
+        """Testa envio como arquivo de formulário"""
+        response = client.post('/api/atividades/importar', data={
+            'arquivo': (io.BytesIO(self.CSV.encode('utf-8')), 'historico.csv')
+        }, content_type='multipart/form-data')
+        
+        assert json.loads(response.data)['importadas'] == 3
+    
+    def test_formato_desconhecido(self, client):
+        """Testa rejeição de formato não suportado"""
+        response = client.post('/api/atividades/importar', data='{}', content_type='application/json')
+        assert response.status_code == 400
+    
+    def test_limita_erros_detalhados(self, client):
+        """Testa que a lista de erros não cresce com o arquivo"""
+        corpo = 'tipo,duracao\n' + 'voo,10\n' * 150
+        
+        data = json.loads(client.post('/api/atividades/importar?formato=csv', data=corpo).data)
+        
+        assert data['total_erros'] == 150
+        assert len(data['erros']) == 100
+
+
+class TestExportacaoAPI:
+    """Testes da exportação em streaming"""
+    
+    def test_exporta_csv_em_streaming(self, client, usuario):
+        """Testa exportação CSV de todo o histórico"""
+        inserir_atividades(usuario.id, 1200)
+        
+        response = client.get('/api/atividades/exportar?formato=csv')
+        
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert 'attachment' in response.headers['Content-Disposition']
+        linhas = response.get_data(as_text=True).splitlines()
+        assert linhas[0].startswith('id,tipo,duracao')
+        assert len(linhas) == 1201
+    
+    def test_exporta_ndjson_mais_recente_primeiro(self, client, usuario):
+        """Testa exportação NDJSON em ordem de data decrescente"""
+        inserir_atividades(usuario.id, 3)
+        
+        response = client.get('/api/atividades/exportar?formato=ndjson')
+        
+        assert response.mimetype == 'application/x-ndjson'
+        datas = [json.loads(linha)['data_atividade'] for linha in response.get_data(as_text=True).splitlines()]
+        assert datas == sorted(datas, reverse=True)
+    
+    def test_exportacao_pode_ser_reimportada(self, app, client, usuario):
+        """Testa que o CSV exportado é aceito pela importação"""
+        inserir_atividades(usuario.id, 5)
+        exportado = client.get('/api/atividades/exportar?formato=csv').get_data()
+        
+        outro = app.test_client()
+        outro.post('/api/auth/registrar', json={'nome': 'Outro', 'email': 'outro@test.com', 'senha': 'Senha123!'})
+        response = outro.post('/api/atividades/importar', data=exportado, content_type='text/csv')
+        
+        assert json.loads(response.data)['importadas'] == 5
+    
+    def test_formato_invalido(self, client):
+        """Testa formato não suportado"""
+        assert client.get('/api/atividades/exportar?formato=xml').status_code == 400
+
+
+class TestRespostasCondicionaisAPI:
+    """Testes de ETag / If-None-Match nas leituras"""
+    
+    def test_304_com_etag_atual(self, client):
+        """Testa que a listagem responde 304 sem corpo para o ETag atual"""
+        response = client.get('/api/atividades')
+        etag = response.headers['ETag']
+        
+        response = client.get('/api/atividades', headers={'If-None-Match': etag})
+        
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+    
+    def test_alteracoes_mudam_etag(self, client):
+        """Testa que criar atividade e atualizar perfil invalidam o ETag"""
+        etags = [client.get('/api/atividades/resumo/stats').headers['ETag']]
+        
+        client.post('/api/atividades', json={'tipo': 'corrida', 'duracao': 30})
+        etags.append(client.get('/api/atividades/resumo/stats').headers['ETag'])
+        client.put('/api/auth/atualizar-perfil', json={'peso': 80})
+        etags.append(client.get('/api/atividades/resumo/stats').headers['ETag'])
+        
+        assert len(set(etags)) == 3
+        response = client.get('/api/atividades/resumo/stats', headers={'If-None-Match': etags[0]})
+        assert response.status_code == 200
+        assert json.loads(response.data)['total_atividades'] == 1
+    
+    def test_detalhe_condicional(self, client):
+        """Testa o ETag no detalhe da atividade"""
+        atividade = json.loads(client.post('/api/atividades', json={'tipo': 'yoga', 'duracao': 20}).data)['atividade']
+        url = f"/api/atividades/{atividade['id']}"
+        etag = client.get(url).headers['ETag']
+        
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+        client.put(url, json={'duracao': 25})
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
+    
+    def test_serie_padrao_revalida_na_virada_do_dia(self, client, monkeypatch):
+        """Testa que a série sem 'ate' (termina hoje) não responde 304 no dia seguinte"""
+        import routes.atividades_refatorada as rotas
+        url = '/api/atividades/resumo/serie'
+        etag = client.get(url).headers['ETag']
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+        assert client.get(f'{url}?ate=2024-03-01').headers['ETag'] != etag
+        
+        class Amanha(datetime):
+            @classmethod
+            def utcnow(cls):
+                return datetime.utcnow() + timedelta(days=1)
+        
+        monkeypatch.setattr(rotas, 'datetime', Amanha)
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    
+    def test_erro_sem_etag(self, client):
+        """Testa que respostas de erro não recebem ETag"""
+        response = client.get('/api/atividades/999999')
+        
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
+
+
+class TestCamposAPI:
+    """Testes do parâmetro campos nas leituras"""
+    
+    @pytest.fixture
+    def atividade(self, client):
+        response = client.post('/api/atividades', json={'tipo': 'corrida', 'duracao': 30, 'observacoes': 'x' * 500})
+        return json.loads(response.data)['atividade']
+    
+    def test_listagem_omite_observacoes_por_padrao(self, client, atividade):
+        """Testa que a listagem não traz o texto livre sem pedir"""
+        item = json.loads(client.get('/api/atividades').data)['atividades'][0]
+        
+        assert 'observacoes' not in item
+        assert item['tipo'] == 'corrida'
+    
+    def test_listagem_com_campos(self, client, atividade):
+        """Testa a listagem com campos escolhidos (paginada e por cursor)"""
+        for url in ('/api/atividades?campos=tipo,calorias_queimadas', '/api/atividades?cursor=&campos=tipo,calorias_queimadas'):
+            item = json.loads(client.get(url).data)['atividades'][0]
+            assert set(item) == {'id', 'tipo', 'calorias_queimadas'}
+        
+        item = json.loads(client.get('/api/atividades?campos=observacoes').data)['atividades'][0]
+        assert item == {'id': atividade['id'], 'observacoes': 'x' * 500}
+    
+    def test_detalhe_completo_e_com_campos(self, client, atividade):
+        """Testa que o detalhe traz tudo por padrão e só os campos pedidos com campos"""
+        url = f"/api/atividades/{atividade['id']}"
+        
+        assert json.loads(client.get(url).data)['observacoes'] == 'x' * 500
+        assert json.loads(client.get(url + '?campos=duracao').data) == {'id': atividade['id'], 'duracao': 30}
+    
+    def test_campo_invalido(self, client, atividade):
+        """Testa que campos desconhecidos resultam em 400"""
+        assert client.get('/api/atividades?campos=tipo,senha').status_code == 400
+        assert client.get(f"/api/atividades/{atividade['id']}?campos=senha").status_code == 400
@@ -6,6 +6,7 @@ import pytest
 import json
 from server import create_app
 from models.models import db, Usuario
+from utils.senhas import HasherSenhas
 
 
 @pytest.fixture
@@ -144,3 +145,135 @@ class TestAuthAPI:
         """Testa logout"""
         response = client.post('/api/auth/logout', content_type='application/json')
         assert response.status_code == 200
+
+
+class TestSenhasAPI:
+    """Testes do hash de senhas nas rotas de autenticação"""
+    
+    def registrar(self, client):
+        return client.post('/api/auth/registrar', json={
+            'nome': 'Test User',
+            'email': 'test@test.com',
+            'senha': 'Senha123!'
+        })
+    
+    def test_hash_com_parametros_da_config(self, app, client):
+        """Testa que o registro grava o hash uma única vez, com o método configurado"""
+        self.registrar(client)
+        
+        usuario = Usuario.query.filter_by(email='test@test.com').first()
+        assert usuario.senha_hash.startswith(app.config['SENHA_METODO'] + '$')
+        assert usuario.check_password('Senha123!')
+    
+    def test_rehash_no_login(self, app, client):
+        """Testa que o login atualiza hashes gerados com parâmetros antigos"""
+        self.registrar(client)
+        app.extensions['senhas'] = HasherSenhas(metodo='pbkdf2:sha256:2000')
+        
+        response = client.post('/api/auth/login', json={'email': 'test@test.com', 'senha': 'Senha123!'})
+        
+        assert response.status_code == 200
+        usuario = Usuario.query.filter_by(email='test@test.com').first()
+        assert usuario.senha_hash.startswith('pbkdf2:sha256:2000$')
+        assert usuario.check_password('Senha123!')
+    
+    def test_fila_cheia_retorna_503(self, app, client):
+        """Testa que a fila de hash cheia responde 503 em vez de enfileirar"""
+        self.registrar(client)
+        hasher = HasherSenhas(processos=1, fila_maxima=0)
+        hasher._vagas.acquire()
+        app.extensions['senhas'] = hasher
+        
+        response = client.post('/api/auth/login', json={'email': 'test@test.com', 'senha': 'Senha123!'})
+        
+        assert response.status_code == 503
+        assert 'ocupado' in json.loads(response.data)['mensagem']
+
+
+class TestBackendsSessao:
+    """Testes do fluxo de autenticação em cada armazenamento de sessão"""
+    
+    @pytest.fixture(params=['memoria', 'sqlite', 'cookie'])
+    def app_sessao(self, request, tmp_path):
+        app = create_app('testing', {
+            'SESSION_BACKEND': request.param,
+            'SESSION_SQLITE_CAMINHO': str(tmp_path / 'sessoes.db')
+        })
+        with app.app_context():
+            yield app
+            db.session.remove()
+    
+    def test_login_leitura_logout(self, app_sessao):
+        """Testa registro, leitura da sessão e logout"""
+        client = app_sessao.test_client()
+        client.post('/api/auth/registrar', json={
+            'nome': 'Test User', 'email': 'test@test.com', 'senha': 'Senha123!'
+        })
+        
+        assert client.get('/api/auth/usuario-atual').status_code == 200
+        assert client.post('/api/auth/logout').status_code == 200
+        assert client.get('/api/auth/usuario-atual').status_code == 401
+    
+    def test_leitura_nao_regrava_sessao(self, app):
+        """Testa que requisições que só leem a sessão não escrevem no armazenamento"""
+        client = app.test_client()
+        client.post('/api/auth/registrar', json={
+            'nome': 'Test User', 'email': 'test@test.com', 'senha': 'Senha123!'
+        })
+        armazenamento = app.session_interface.armazenamento
+        gravacoes = []
+        gravar = armazenamento.gravar
+        armazenamento.gravar = lambda *args: gravacoes.append(args) or gravar(*args)
+        
+        response = client.get('/api/auth/usuario-atual')
+        
+        assert response.status_code == 200
+        assert gravacoes == []
+        assert 'Set-Cookie' not in response.headers
+
+
+class TestTokensAPI:
+    """Testes da autenticação por token Bearer"""
+    
+    @pytest.fixture
+    def token(self, app):
+        client = app.test_client()
+        client.post('/api/auth/registrar', json={
+            'nome': 'Test User', 'email': 'test@test.com', 'senha': 'Senha123!'
+        })
+        response = app.test_client().post('/api/auth/login', json={
+            'email': 'test@test.com', 'senha': 'Senha123!', 'modo': 'token'
+        })
+        assert response.status_code == 200
+        assert 'Set-Cookie' not in response.headers
+        return json.loads(response.data)['token']
+    
+    def test_acesso_com_token(self, app, token):
+        """Testa rotas protegidas apenas com o cabeçalho Authorization"""
+        client = app.test_client()
+        cabecalhos = {'Authorization': f'Bearer {token}'}
+        
+        response = client.get('/api/auth/usuario-atual', headers=cabecalhos)
+        assert response.status_code == 200
+        assert json.loads(response.data)['email'] == 'test@test.com'
+        
+        response = client.post('/api/atividades', headers=cabecalhos, json={'tipo': 'corrida', 'duracao': 30})
+        assert response.status_code == 201
+    
+    def test_token_invalido(self, client):
+        """Testa que um token inválido não cai para a sessão"""
+        client.post('/api/auth/registrar', json={
+            'nome': 'Test User', 'email': 'test@test.com', 'senha': 'Senha123!'
+        })
+        
+        response = client.get('/api/auth/usuario-atual', headers={'Authorization': 'Bearer 1.2.3.invalido'})
+        
+        assert response.status_code == 401
+    
+    def test_logout_revoga_token(self, app, token):
+        """Testa que o token deixa de valer após o logout"""
+        client = app.test_client()
+        cabecalhos = {'Authorization': f'Bearer {token}'}
+        
+        assert client.post('/api/auth/logout', headers=cabecalhos).status_code == 200
+        assert client.get('/api/auth/usuario-atual', headers=cabecalhos).status_code == 401
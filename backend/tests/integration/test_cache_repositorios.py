@@ -0,0 +1,89 @@
+"""
+Testes de Integração - Cache de leituras dos repositórios
+
+Cada requisição roda em uma sessão nova (sem contexto de aplicação externo),
+de modo que só o cache pode evitar as consultas.
+"""
+
+import pytest
+from server import create_app
+from models.models import db
+from tests.integration.test_consultas_por_requisicao import contar_consultas
+
+
+@pytest.fixture
+def app():
+    """Aplicação de teste com o cache local ligado"""
+    app = create_app('testing', {'CACHE_BACKEND': 'local'})
+    
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Cliente autenticado com uma atividade"""
+    client = app.test_client()
+    client.post('/api/auth/registrar', json={
+        'nome': 'Test User', 'email': 'test@test.com', 'senha': 'Senha123!'
+    })
+    client.post('/api/atividades', json={'tipo': 'corrida', 'duracao': 30})
+    return client
+
+
+class TestCacheRepositorios:
+    """Testes do cache nas rotas"""
+    
+    def test_leituras_repetidas_sem_consultas(self, app, client):
+        """Testa que a segunda leitura do perfil e da primeira página vem do cache"""
+        client.get('/api/atividades')
+        
+        with contar_consultas(app) as comandos:
+            perfil = client.get('/api/auth/usuario-atual')
+            lista = client.get('/api/atividades')
+        
+        assert perfil.status_code == 200
+        assert lista.get_json()['total'] == 1
+        assert comandos == []
+        assert app.extensions['servicos'].cache.estatisticas()['acertos'] >= 2
+    
+    def test_escrita_invalida_o_usuario(self, app, client):
+        """Testa que criar uma atividade invalida a primeira página em cache"""
+        client.get('/api/atividades')
+        client.post('/api/atividades', json={'tipo': 'yoga', 'duracao': 20})
+        
+        response = client.get('/api/atividades')
+        
+        assert response.get_json()['total'] == 2
+        assert [a['tipo'] for a in response.get_json()['atividades']] == ['yoga', 'corrida']
+    
+    def test_perfil_atualizado_apos_alteracao(self, app, client):
+        """Testa que o perfil em cache reflete a atualização"""
+        client.get('/api/auth/usuario-atual')
+        client.put('/api/auth/atualizar-perfil', json={'peso': 80})
+        
+        assert client.get('/api/auth/usuario-atual').get_json()['peso'] == 80
+    
+    def test_pagina_seguinte_nao_usa_cache(self, app, client):
+        """Testa que só a primeira página é guardada"""
+        client.get('/api/atividades?pagina=2')
+        
+        with contar_consultas(app) as comandos:
+            client.get('/api/atividades?pagina=2')
+        
+        assert any('FROM atividades' in c for c in comandos)
+    
+    def test_login_pelo_cache(self, app, client):
+        """Testa que o login por email reutiliza o índice email -> id e o usuário em cache"""
+        credenciais = {'email': 'test@test.com', 'senha': 'Senha123!'}
+        client.post('/api/auth/login', json=credenciais)
+        client.get('/api/auth/usuario-atual')
+        
+        with contar_consultas(app) as comandos:
+            response = client.post('/api/auth/login', json=credenciais)
+        
+        assert response.status_code == 200
+        assert comandos == []
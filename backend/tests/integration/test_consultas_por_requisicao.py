@@ -0,0 +1,177 @@
+"""
+Testes de Integração - Número de consultas SQL por requisição
+
+Cada requisição roda em seu próprio contexto de aplicação (e portanto em uma
+sessão nova), como em produção. Os limites abaixo são exatos: uma consulta a
+mais indica uma regressão (busca repetida, refresh após commit, autoflush).
+"""
+
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import event, text
+from server import create_app
+from models.models import db
+from repositories.mapa_identidade import MapaIdentidade, mapa_da_sessao
+
+
+@pytest.fixture
+def app():
+    """Aplicação de teste sem contexto ativo durante as requisições"""
+    app = create_app('testing')
+    
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Cliente autenticado"""
+    client = app.test_client()
+    client.post('/api/auth/registrar', json={
+        'nome': 'Test User',
+        'email': 'test@test.com',
+        'senha': 'Senha123!'
+    })
+    return client
+
+
+@pytest.fixture
+def atividade(client):
+    """Atividade já criada pelo cliente"""
+    response = client.post('/api/atividades', json={
+        'tipo': 'corrida', 'duracao': 30, 'distancia': 5, 'data_atividade': '2024-01-01T07:00:00'
+    })
+    return response.get_json()['atividade']
+
+
+@contextmanager
+def contar_consultas(app):
+    """Registra os comandos SQL emitidos dentro do bloco"""
+    comandos = []
+    
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+    
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield comandos
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+
+class TestConsultasPorRequisicao:
+    """Consultas emitidas por endpoint de atividades e perfil"""
+    
+    def test_criar_atividade(self, app, client, atividade):
+        """usuário + totais + dia + 2 INSERTs + UPDATE dos totais + versão"""
+        with contar_consultas(app) as comandos:
+            response = client.post('/api/atividades', json={
+                'tipo': 'corrida', 'duracao': 45, 'data_atividade': '2024-01-02T07:00:00'
+            })
+        
+        assert response.status_code == 201
+        assert len(comandos) == 7
+    
+    def test_atualizar_atividade(self, app, client, atividade):
+        """Mesmo dia e tipo: o total diário é alterado, não apagado e recriado"""
+        with contar_consultas(app) as comandos:
+            response = client.put(f"/api/atividades/{atividade['id']}", json={'duracao': 40})
+        
+        assert response.status_code == 200
+        assert response.get_json()['atividade']['duracao'] == 40
+        assert not any(c.startswith(('DELETE', 'INSERT')) for c in comandos)
+        assert len(comandos) == 8
+    
+    def test_deletar_atividade(self, app, client, atividade):
+        """Os totais do usuário são lidos uma única vez"""
+        with contar_consultas(app) as comandos:
+            response = client.delete(f"/api/atividades/{atividade['id']}")
+        
+        assert response.status_code == 200
+        assert sum(c.startswith('SELECT usuario_estatisticas') for c in comandos) == 1
+        assert len(comandos) == 7
+    
+    def test_obter_atividade(self, app, client, atividade):
+        """Versão dos dados (ETag) e atividade, ambas pela chave primária"""
+        with contar_consultas(app) as comandos:
+            response = client.get(f"/api/atividades/{atividade['id']}")
+        
+        assert response.status_code == 200
+        assert len(comandos) == 2
+    
+    def test_estatisticas(self, app, client, atividade):
+        """Versão dos dados (ETag) e totais, ambos pela chave primária"""
+        with contar_consultas(app) as comandos:
+            response = client.get('/api/atividades/resumo/stats')
+        
+        assert response.status_code == 200
+        assert len(comandos) == 2
+    
+    def test_listagem_projeta_colunas(self, app, client, atividade):
+        """A listagem não lê observacoes e, com campos, só as colunas pedidas"""
+        with contar_consultas(app) as comandos:
+            client.get('/api/atividades')
+            client.get('/api/atividades?campos=tipo')
+        
+        selects = [c for c in comandos if 'FROM atividades' in c and 'count' not in c.lower()]
+        assert len(selects) == 2
+        assert all('observacoes' not in c for c in selects)
+        assert 'duracao' in selects[0] and 'duracao' not in selects[1]
+    
+    def test_nao_modificado(self, app, client, atividade):
+        """If-None-Match válido: só a versão é lida, nada de atividades"""
+        etag = client.get('/api/atividades').headers['ETag']
+        with contar_consultas(app) as comandos:
+            response = client.get('/api/atividades', headers={'If-None-Match': etag})
+        
+        assert response.status_code == 304
+        assert len(comandos) == 1
+        assert comandos[0].startswith('SELECT usuarios')
+    
+    def test_atualizar_perfil_sem_refresh(self, app, client):
+        """Serializar após o commit não recarrega o usuário"""
+        with contar_consultas(app) as comandos:
+            response = client.put('/api/auth/atualizar-perfil', json={'peso': 80})
+        
+        assert response.status_code == 200
+        assert response.get_json()['usuario']['peso'] == 80
+        assert len(comandos) == 3
+
+
+class TestMapaIdentidade:
+    """Testes do mapa de identidade por sessão"""
+    
+    def test_registrar_e_obter(self):
+        """Testa registro, busca e remoção"""
+        mapa = MapaIdentidade()
+        objeto = object()
+        
+        mapa.registrar('Modelo', 1, objeto)
+        mapa.registrar('Modelo', 2, None)
+        
+        assert mapa.obter('Modelo', 1) is objeto
+        assert mapa.obter('Modelo', 2) is None
+        mapa.remover('Modelo', 1)
+        assert len(mapa) == 0
+    
+    def test_limpo_apos_rollback(self, app):
+        """Objetos pendentes não sobrevivem a um rollback"""
+        with app.app_context():
+            mapa = mapa_da_sessao(db.session)
+            mapa.registrar('Modelo', 1, object())
+            db.session.execute(text('SELECT 1'))
+            db.session.rollback()
+            
+            assert len(mapa) == 0
+    
+    def test_uma_sessao_por_requisicao(self, app):
+        """Cada contexto de aplicação recebe um mapa novo"""
+        with app.app_context():
+            mapa_da_sessao(db.session).registrar('Modelo', 1, object())
+        with app.app_context():
+            assert mapa_da_sessao(db.session).obter('Modelo', 1) is None
@@ -0,0 +1,133 @@
+"""
+Testes de Integração - Escritores concorrentes em um banco SQLite em arquivo
+
+Várias threads criam atividades ao mesmo tempo, parte delas para o mesmo
+usuário (disputando a mesma linha de totais). Com WAL, busy_timeout e
+BEGIN IMMEDIATE nenhuma requisição pode falhar com "database is locked" e
+nenhuma atualização dos totais pode se perder, com transações por
+requisição ou com o escritor único (ESCRITA_SERIALIZADA).
+
+Leituras (GET/HEAD/OPTIONS) abrem transações com BEGIN comum e por isso não
+podem escrever; todas as rotas GET são verificadas quanto a isso.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from server import create_app
+from models.models import db, Atividade, UsuarioEstatisticas
+from models.banco import METODOS_LEITURA, pragmas_atuais
+
+THREADS = 8
+ESCRITAS_POR_THREAD = 25
+# Escritas por segundo exigidas do conjunto (bem abaixo do medido localmente)
+VAZAO_MINIMA = 20
+
+
+@pytest.fixture(params=[False, True], ids=['transacoes', 'escritor_unico'])
+def app(tmp_path, request):
+    """Aplicação com banco em arquivo, como em produção, com e sem o escritor único"""
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'concorrencia.db'}",
+        'ESCRITA_SERIALIZADA': request.param
+    })
+    yield app
+    escritor = app.extensions['servicos'].escritor
+    if escritor is not None:
+        escritor.encerrar()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def novo_cliente(app, email, registrar):
+    client = app.test_client()
+    dados = {'nome': 'Test User', 'email': email, 'senha': 'Senha123!'}
+    if registrar:
+        client.post('/api/auth/registrar', json=dados)
+    else:
+        client.post('/api/auth/login', json=dados)
+    return client
+
+
+class TestEscritaConcorrente:
+    """Testes de concorrência de escrita"""
+    
+    def test_pragmas_aplicados(self, app):
+        """Testa que cada conexão recebe os PRAGMAs configurados"""
+        with app.app_context(), db.engine.connect() as conexao:
+            valores = pragmas_atuais(conexao, ('journal_mode', 'synchronous', 'busy_timeout', 'foreign_keys'))
+        
+        assert valores == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'foreign_keys': 1}
+    
+    def test_sem_erros_de_lock(self, app):
+        """Testa que nenhuma escrita concorrente falha ou se perde"""
+        # Metade das threads escreve para um usuário compartilhado
+        clientes = [novo_cliente(app, 'compartilhado@test.com', True)]
+        clientes += [novo_cliente(app, 'compartilhado@test.com', False) for _ in range(THREADS // 2 - 1)]
+        clientes += [novo_cliente(app, f'usuario{i}@test.com', True) for i in range(THREADS // 2)]
+        
+        status = []
+        trava = threading.Lock()
+        barreira = threading.Barrier(THREADS)
+        
+        def escrever(client, indice):
+            barreira.wait()
+            for i in range(ESCRITAS_POR_THREAD):
+                response = client.post('/api/atividades', json={
+                    'tipo': 'corrida', 'duracao': 30, 'data_atividade': f'2024-01-{(i % 28) + 1:02d}T{indice:02d}:00:00'
+                })
+                with trava:
+                    status.append(response.status_code)
+        
+        threads = [threading.Thread(target=escrever, args=(c, i)) for i, c in enumerate(clientes)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        vazao = len(status) / (time.perf_counter() - inicio)
+        
+        assert status.count(201) == THREADS * ESCRITAS_POR_THREAD, {s: status.count(s) for s in set(status)}
+        assert vazao >= VAZAO_MINIMA
+        with app.app_context():
+            assert Atividade.query.count() == THREADS * ESCRITAS_POR_THREAD
+            totais = {e.usuario_id: e.total_atividades for e in UsuarioEstatisticas.query.all()}
+            assert sorted(totais.values()) == [ESCRITAS_POR_THREAD] * (THREADS // 2) + [ESCRITAS_POR_THREAD * THREADS // 2]
+
+
+class TestLeiturasSemEscrita:
+    """Testes de que as rotas de leitura não escrevem (invariante de models/banco.py)"""
+    
+    def test_rotas_get_nao_escrevem(self, app):
+        """Testa cada rota GET para um usuário com histórico ainda sem totais"""
+        client = novo_cliente(app, 'leitor@test.com', True)
+        with app.app_context():
+            usuario_id = db.session.execute(db.text("SELECT id FROM usuarios WHERE email = 'leitor@test.com'")).scalar()
+            db.session.add_all([
+                Atividade(usuario_id=usuario_id, tipo='corrida', duracao=30, data_atividade=datetime(2024, 1, 1) + timedelta(hours=i))
+                for i in range(5)
+            ])
+            db.session.commit()
+            atividade_id = Atividade.query.filter_by(usuario_id=usuario_id).first().id
+            
+            escritas = []
+            
+            def capturar(conexao, cursor, comando, parametros, contexto, executemany):
+                if comando.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+                    escritas.append((rota, comando))
+            
+            event.listen(db.engine, 'before_cursor_execute', capturar)
+            valores = {'atividade_id': atividade_id, 'nome': 'inexistente', 'filename': 'inexistente'}
+            rotas = [regra for regra in app.url_map.iter_rules() if regra.methods & METODOS_LEITURA]
+            try:
+                for regra in rotas:
+                    rota = regra.build({nome: valores[nome] for nome in regra.arguments})[1]
+                    client.get(rota)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capturar)
+        
+        assert '/api/atividades/resumo/stats' in {regra.rule for regra in rotas}
+        assert escritas == []
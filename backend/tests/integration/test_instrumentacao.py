@@ -0,0 +1,85 @@
+"""
+Testes de Integração - Cabeçalho Server-Timing e log estruturado por requisição
+"""
+
+import json
+import logging
+import pytest
+from server import create_app
+from tests.integration.test_consultas_por_requisicao import contar_consultas
+
+
+def criar_cliente(app):
+    client = app.test_client()
+    client.post('/api/auth/registrar', json={'nome': 'Test User', 'email': 'test@test.com', 'senha': 'Senha123!'})
+    client.post('/api/atividades', json={'tipo': 'corrida', 'duracao': 30, 'data_atividade': '2024-01-01T07:00:00'})
+    return client
+
+
+def ler_server_timing(response):
+    """{métrica: (duração em ms, descrição)} do cabeçalho Server-Timing"""
+    metricas = {}
+    for item in response.headers['Server-Timing'].split(', '):
+        nome, *parametros = item.split(';')
+        valores = dict(parametro.split('=', 1) for parametro in parametros)
+        metricas[nome] = (float(valores['dur']), valores.get('desc', '').strip('"'))
+    return metricas
+
+
+class TestServerTiming:
+    """Testes do cabeçalho Server-Timing"""
+    
+    def test_metricas_da_listagem(self):
+        """Testa tempos de SQL, serialização, sessão e total de uma listagem"""
+        app = create_app('testing')
+        client = criar_cliente(app)
+        
+        with contar_consultas(app) as comandos:
+            response = client.get('/api/atividades')
+        metricas = ler_server_timing(response)
+        
+        assert set(metricas) == {'sql', 'serializacao', 'sessao', 'app', 'total'}
+        assert metricas['sql'][1] == f'{len(comandos)} consultas'
+        assert metricas['sql'][0] > 0 and metricas['serializacao'][0] > 0
+        partes = metricas['sql'][0] + metricas['serializacao'][0] + metricas['sessao'][0] + metricas['app'][0]
+        assert partes == pytest.approx(metricas['total'][0], abs=0.05)
+    
+    def test_desligado(self):
+        """Testa que INSTRUMENTACAO = False não adiciona o cabeçalho"""
+        app = create_app('testing', {'INSTRUMENTACAO': False})
+        
+        response = criar_cliente(app).get('/api/atividades')
+        
+        assert response.status_code == 200
+        assert 'Server-Timing' not in response.headers
+
+
+class TestLogEstruturado:
+    """Testes da linha de log por requisição"""
+    
+    def test_linha_json(self, caplog):
+        """Testa a linha JSON emitida ao final da requisição"""
+        app = create_app('testing', {'INSTRUMENTACAO_LOG': True})
+        client = criar_cliente(app)
+        
+        with caplog.at_level(logging.INFO, logger='fittrack.requisicoes'):
+            caplog.clear()
+            client.get('/api/atividades/1')
+        registro = json.loads(caplog.records[-1].getMessage())
+        
+        assert registro['metodo'] == 'GET'
+        assert registro['rota'] == '/api/atividades/<int:atividade_id>'
+        assert registro['status'] == 200
+        assert registro['consultas'] >= 1
+        assert registro['total_ms'] >= registro['sql_ms']
+    
+    def test_limiar(self, caplog):
+        """Testa que requisições abaixo do limiar não são registradas"""
+        app = create_app('testing', {'INSTRUMENTACAO_LOG': True, 'INSTRUMENTACAO_LOG_LIMIAR_MS': 60000})
+        client = criar_cliente(app)
+        
+        with caplog.at_level(logging.INFO, logger='fittrack.requisicoes'):
+            caplog.clear()
+            client.get('/api/atividades')
+        
+        assert not caplog.records
@@ -0,0 +1,162 @@
+"""
+Testes de Integração - Migrações e Índices
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, text
+from server import create_app
+from models.models import db, Usuario, Atividade, AtividadeDiaria, UsuarioEstatisticas
+from models.migracoes import MIGRACOES, adicionar_coluna, aplicar_migracoes, versoes_aplicadas
+from repositories.base_repository import AtividadeRepository
+from services.container import obter_servicos
+
+
+@pytest.fixture
+def app():
+    """Cria aplicação de teste"""
+    app = create_app('testing')
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def usuario_id(app):
+    """Usuário com algumas atividades"""
+    usuario = Usuario(nome='Test User', email='test@test.com', senha_hash='x')
+    db.session.add(usuario)
+    db.session.commit()
+    inicio = datetime(2024, 1, 1)
+    db.session.add_all([
+        Atividade(usuario_id=usuario.id, tipo=tipo, duracao=30, data_atividade=inicio + timedelta(days=i))
+        for i, tipo in enumerate(['corrida', 'yoga', 'natacao'] * 10)
+    ])
+    db.session.commit()
+    return usuario.id
+
+
+def indices_atividades():
+    return {indice['name'] for indice in inspect(db.engine).get_indexes('atividades')}
+
+
+def planos_de_consulta(funcao):
+    """Executa funcao capturando as consultas e retorna o EXPLAIN QUERY PLAN de cada uma"""
+    consultas = []
+    
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            consultas.append((statement, parameters))
+    
+    event.listen(db.engine, 'before_cursor_execute', capturar)
+    try:
+        funcao()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capturar)
+    
+    with db.engine.connect() as conexao:
+        return [
+            ' | '.join(linha[-1] for linha in conexao.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params))
+            for sql, params in consultas
+        ]
+
+
+class TestMigracoes:
+    """Testes do executor de migrações"""
+    
+    def test_banco_novo_registra_todas_as_versoes(self, app):
+        """Testa que create_app deixa o banco na versão mais recente"""
+        assert versoes_aplicadas(db.engine) == [versao for versao, _, _ in MIGRACOES]
+        assert {'ix_atividades_usuario_data', 'ix_atividades_usuario_tipo_data'} <= indices_atividades()
+    
+    def test_banco_existente_recebe_indices(self, app):
+        """Testa a migração de um banco criado antes dos índices"""
+        with db.engine.begin() as conexao:
+            conexao.execute(text('DROP INDEX ix_atividades_usuario_data'))
+            conexao.execute(text('DROP INDEX ix_atividades_usuario_tipo_data'))
+            conexao.execute(text('DELETE FROM versao_esquema'))
+        assert 'ix_atividades_usuario_data' not in indices_atividades()
+        
+        assert aplicar_migracoes(db.engine) == [versao for versao, _, _ in MIGRACOES]
+        assert {'ix_atividades_usuario_data', 'ix_atividades_usuario_tipo_data'} <= indices_atividades()
+        
+        # Segunda execução não reaplica nada
+        assert aplicar_migracoes(db.engine) == []
+    
+    def test_historico_recebe_totais(self, app, usuario_id):
+        """Testa que a migração 3 cria os totais de quem tem atividades e ainda não os tem"""
+        with db.engine.begin() as conexao:
+            conexao.execute(text('DELETE FROM versao_esquema WHERE versao = 3'))
+        assert db.session.get(UsuarioEstatisticas, usuario_id) is None
+        
+        assert aplicar_migracoes(db.engine) == [3]
+        
+        estatisticas = db.session.get(UsuarioEstatisticas, usuario_id)
+        assert (estatisticas.total_atividades, estatisticas.total_duracao) == (30, 900)
+        assert estatisticas.distribuicao_tipos == {'corrida': 10, 'yoga': 10, 'natacao': 10}
+        assert AtividadeDiaria.query.filter_by(usuario_id=usuario_id).count() == 30
+        assert obter_servicos().atividade_service.reconstruir_estatisticas(usuario_id, aplicar=False) == {}
+    
+    def test_adicionar_coluna_idempotente(self, app):
+        """Testa que o passo adiciona a coluna só quando ela falta"""
+        passo = adicionar_coluna('tabela_teste', 'versao_dados', 'INTEGER NOT NULL DEFAULT 0')
+        with db.engine.begin() as conexao:
+            conexao.execute(text('CREATE TABLE tabela_teste (id INTEGER PRIMARY KEY)'))
+            conexao.execute(text('INSERT INTO tabela_teste (id) VALUES (1)'))
+            passo(conexao)
+            passo(conexao)
+            
+            assert [c['name'] for c in inspect(conexao).get_columns('tabela_teste')] == ['id', 'versao_dados']
+            assert conexao.execute(text('SELECT versao_dados FROM tabela_teste')).scalar() == 0
+    
+    def test_comando_status(self, app):
+        """Testa o comando de status das migrações"""
+        result = app.test_cli_runner().invoke(args=['migracoes', 'status'])
+        assert '[x] 001' in result.output
+
+
+class TestIndicesAtividades:
+    """Testes de uso dos índices pelas consultas do repositório"""
+    
+    def test_listagem_usa_indice_usuario_data(self, app, usuario_id):
+        """Testa que a listagem filtra e ordena pelo índice (usuario_id, data_atividade)"""
+        repo = AtividadeRepository(db)
+        planos = planos_de_consulta(lambda: repo.find_by_usuario(usuario_id, pagina=2, por_pagina=5))
+        
+        assert planos
+        for plano in planos:
+            assert 'ix_atividades_usuario' in plano
+            assert 'SCAN atividades' not in plano
+        assert any('ix_atividades_usuario_data' in plano and 'TEMP B-TREE' not in plano for plano in planos)
+    
+    def test_listagem_por_cursor_posiciona_no_indice(self, app, usuario_id):
+        """Testa que a página por cursor busca no índice sem ordenação temporária"""
+        repo = AtividadeRepository(db)
+        apos = (datetime(2024, 1, 15), 15)
+        planos = planos_de_consulta(lambda: repo.find_by_usuario_apos(usuario_id, apos, 5))
+        
+        assert len(planos) == 1
+        assert 'ix_atividades_usuario_data' in planos[0]
+        assert 'TEMP B-TREE' not in planos[0]
+    
+    def test_estatisticas_usam_indice_usuario_tipo(self, app, usuario_id):
+        """Testa que a agregação por tipo usa o índice (usuario_id, tipo, data_atividade)"""
+        repo = AtividadeRepository(db)
+        planos = planos_de_consulta(lambda: repo.obter_agregados(usuario_id))
+        
+        assert len(planos) == 1
+        assert 'ix_atividades_usuario_tipo_data' in planos[0]
+        assert 'SCAN atividades' not in planos[0]
+        assert 'TEMP B-TREE' not in planos[0]
+    
+    def test_agregados_diarios_usam_indice(self, app, usuario_id):
+        """Testa que a agregação diária busca pelo índice do usuário"""
+        repo = AtividadeRepository(db)
+        planos = planos_de_consulta(lambda: repo.obter_agregados_diarios(usuario_id))
+        
+        assert len(planos) == 1
+        assert 'ix_atividades_usuario' in planos[0]
+        assert 'SCAN atividades' not in planos[0]
@@ -0,0 +1,111 @@
+"""
+Testes de Integração - Perfis cProfile de requisições (PERFIS)
+"""
+
+import os
+import pstats
+import pytest
+from server import create_app
+
+TOKEN = 'token-perfis'
+
+
+@pytest.fixture
+def diretorio(tmp_path):
+    return str(tmp_path / 'perfis')
+
+
+def criar_cliente(diretorio, **config):
+    app = create_app('testing', dict({'PERFIS': True, 'PERFIS_TOKEN': TOKEN, 'PERFIS_DIRETORIO': diretorio}, **config))
+    client = app.test_client()
+    client.post('/api/auth/registrar', json={'nome': 'Test User', 'email': 'test@test.com', 'senha': 'Senha123!'})
+    return client
+
+
+def perfis_gravados(diretorio):
+    return sorted(os.listdir(diretorio)) if os.path.isdir(diretorio) else []
+
+
+class TestCaptura:
+    """Testes de quando uma requisição é perfilada"""
+    
+    def test_solicitado_com_token(self, diretorio):
+        """Testa o perfil pedido pelo cabeçalho, com .prof legível e resumo"""
+        client = criar_cliente(diretorio)
+        
+        response = client.get('/api/atividades?por_pagina=5', headers={'X-Perfil': TOKEN})
+        nome = response.headers['X-Perfil']
+        
+        assert response.status_code == 200
+        assert perfis_gravados(diretorio) == [f'{nome}.json', f'{nome}.prof']
+        assert pstats.Stats(os.path.join(diretorio, f'{nome}.prof')).total_calls > 0
+        
+        indice = client.get('/api/perfis', headers={'X-Perfil': TOKEN}).get_json()
+        resumo = indice['perfis'][0]
+        assert resumo['rota'] == '/api/atividades'
+        assert resumo['parametros'] == {'por_pagina': '5'}
+        assert resumo['usuario_id'] == 1
+        assert resumo['motivo'] == 'solicitado'
+        assert resumo['funcoes']
+    
+    def test_token_invalido_ou_ausente(self, diretorio):
+        """Testa que chamadores não autorizados não geram perfis"""
+        client = criar_cliente(diretorio)
+        
+        client.get('/api/atividades?perfil=errado')
+        client.get('/api/atividades')
+        
+        assert perfis_gravados(diretorio) == []
+    
+    def test_ip_autorizado(self, diretorio):
+        """Testa endereços de PERFIS_IPS, com ?perfil= de qualquer valor"""
+        client = criar_cliente(diretorio, PERFIS_IPS=('127.0.0.1',))
+        
+        assert 'X-Perfil' in client.get('/api/atividades?perfil=1').headers
+    
+    def test_amostragem(self, diretorio):
+        """Testa a captura por sorteio, sem pedido"""
+        client = criar_cliente(diretorio, PERFIS_AMOSTRAGEM=1.0)
+        
+        response = client.get('/api/atividades')
+        
+        assert response.headers['X-Perfil'] + '.prof' in perfis_gravados(diretorio)
+    
+    def test_desligado(self, diretorio):
+        """Testa que PERFIS = False ignora pedidos e esconde o índice"""
+        client = criar_cliente(diretorio, PERFIS=False)
+        
+        assert 'X-Perfil' not in client.get('/api/atividades', headers={'X-Perfil': TOKEN}).headers
+        assert client.get('/api/perfis', headers={'X-Perfil': TOKEN}).status_code == 404
+
+
+class TestDiretorio:
+    """Testes da rotação e do acesso aos arquivos"""
+    
+    def test_rotacao(self, diretorio):
+        """Testa que só os PERFIS_MAXIMO perfis mais recentes permanecem"""
+        client = criar_cliente(diretorio, PERFIS_MAXIMO=2)
+        nomes = []
+        for _ in range(4):
+            nomes.append(client.get('/api/atividades', headers={'X-Perfil': TOKEN}).headers['X-Perfil'])
+            # mtime distinto entre perfis consecutivos
+            caminho = os.path.join(diretorio, nomes[-1] + '.prof')
+            os.utime(caminho, (len(nomes), len(nomes)))
+        
+        restantes = {arquivo.rsplit('.', 1)[0] for arquivo in perfis_gravados(diretorio)}
+        assert len(perfis_gravados(diretorio)) == 4
+        assert restantes == set(nomes[2:])
+    
+    def test_download(self, diretorio):
+        """Testa o download do .prof e a recusa a chamadores e nomes inválidos"""
+        client = criar_cliente(diretorio)
+        nome = client.get('/api/atividades', headers={'X-Perfil': TOKEN}).headers['X-Perfil']
+        
+        response = client.get(f'/api/perfis/{nome}', headers={'X-Perfil': TOKEN})
+        with open(os.path.join(diretorio, f'{nome}.prof'), 'rb') as arquivo:
+            conteudo = arquivo.read()
+        
+        assert response.status_code == 200
+        assert response.get_data() == conteudo
+        assert client.get(f'/api/perfis/{nome}').status_code == 404
+        assert client.get('/api/perfis/..%2Fsegredo', headers={'X-Perfil': TOKEN}).status_code == 404
@@ -5,7 +5,7 @@ Testes Unitários - Serviço de Atividades
 import pytest
 from services.usuario_service import AtividadeService
 from domain.entities import Atividade
-from repositories.base_repository import AtividadeRepository, UsuarioRepository
+from repositories.base_repository import AtividadeRepository, UsuarioRepository, EstatisticasRepository
 from unittest.mock import Mock
 
 
@@ -128,3 +128,162 @@ class TestAtividadeServiceListar:
         
         assert status == 404
         assert "Usuário não encontrado" in msg
+
+
+class TestAtividadeServiceRecalculo:
+    """Testes do recálculo de calorias do histórico"""
+    
+    def test_lote_igual_ao_calculo_individual(self, atividade_service):
+        """Testa que o cálculo em lote reproduz calcular_calorias, inclusive casos fora da tabela"""
+        combinacoes = [
+            (tipo, intensidade, duracao)
+            for tipo in list(AtividadeService.TABELA_CALORIAS) + ['desconhecido']
+            for intensidade in ('baixa', 'moderada', 'alta', None, 'extrema')
+            for duracao in (0, None, 1, 37, 90)
+        ]
+        linhas = [(i, tipo, intensidade, duracao) for i, (tipo, intensidade, duracao) in enumerate(combinacoes)]
+        
+        resultado = atividade_service.calcular_calorias_lote(linhas, 83.5)
+        
+        assert resultado == [
+            (i, atividade_service.calcular_calorias(tipo, duracao, intensidade, 83.5))
+            for i, tipo, intensidade, duracao in linhas
+        ]
+    
+    def test_recalcula_em_lotes_gravando_so_mudancas(self, atividade_service, mock_atividade_repository):
+        """Testa a leitura por lotes e a gravação apenas dos valores alterados"""
+        mock_atividade_repository.listar_para_recalculo.side_effect = [
+            [(1, 'corrida', 'moderada', 30, 720), (2, 'yoga', 'baixa', 60, 120)],
+            [(5, 'corrida', 'alta', 10, 150)]
+        ]
+        
+        alteradas = atividade_service.recalcular_historico(1, peso=140, tamanho_lote=2)
+        
+        assert alteradas == 2
+        assert mock_atividade_repository.listar_para_recalculo.call_args_list[1].args == (1, 2, 2)
+        mock_atividade_repository.atualizar_calorias.assert_any_call(1, [(2, 240)])
+        mock_atividade_repository.atualizar_calorias.assert_any_call(1, [(5, 300)])
+        atividade_service.usuario_repository.incrementar_versao.assert_called_once_with(1)
+
+
+class TestAtividadeServiceCampos:
+    """Testes do parâmetro campos"""
+    
+    def test_padrao_quando_ausente(self, atividade_service):
+        """Testa que sem o parâmetro vale o padrão informado"""
+        assert atividade_service.resolver_campos(None, Atividade.CAMPOS_LISTA) == Atividade.CAMPOS_LISTA
+        assert 'observacoes' not in Atividade.CAMPOS_LISTA
+    
+    def test_inclui_id_na_ordem_canonica(self, atividade_service):
+        """Testa que o id é incluído e a ordem segue Atividade.CAMPOS"""
+        assert atividade_service.resolver_campos(' calorias_queimadas,tipo,,tipo ') == (
+            'id', 'tipo', 'calorias_queimadas'
+        )
+    
+    def test_campo_desconhecido(self, atividade_service):
+        """Testa que campos desconhecidos são rejeitados"""
+        assert atividade_service.resolver_campos('tipo,senha_hash') is None
+
+
+class TestAtividadeServiceCursor:
+    """Testes da listagem por cursor"""
+    
+    def test_cursor_ida_e_volta(self, atividade_service):
+        """Testa que o cursor codifica (data_atividade, id)"""
+        from datetime import datetime
+        atividade = Mock(data_atividade=datetime(2024, 3, 1, 7, 30), id=42)
+        
+        cursor = atividade_service.codificar_cursor(atividade)
+        
+        assert atividade_service.decodificar_cursor(cursor) == (datetime(2024, 3, 1, 7, 30), 42)
+    
+    def test_cursor_invalido(self, atividade_service):
+        """Testa cursor malformado"""
+        assert atividade_service.decodificar_cursor('???') is None
+        assert atividade_service.decodificar_cursor('YWJj') is None
+    
+    def test_listar_cursor_proxima_pagina(self, atividade_service, mock_usuario_repository, mock_atividade_repository):
+        """Testa que o próximo cursor aponta para a última atividade entregue"""
+        from datetime import datetime
+        mock_usuario_repository.find_by_id.return_value = Mock()
+        atividades = [Mock(data_atividade=datetime(2024, 3, i), id=i) for i in (3, 2)]
+        mock_atividade_repository.find_by_usuario_apos.return_value = (atividades, True)
+        
+        resultado, msg, status = atividade_service.listar_atividades_cursor(1, None, 2)
+        
+        assert status == 200
+        assert atividade_service.decodificar_cursor(resultado['proximo_cursor']) == (datetime(2024, 3, 2), 2)
+        assert 'total' not in resultado
+        mock_atividade_repository.find_by_usuario_apos.assert_called_once_with(1, None, 2, None)
+
+
+class TestAtividadeServiceEstatisticas:
+    """Testes de estatísticas de atividades"""
+    
+    def test_obter_estatisticas_usa_agregados(self, atividade_service, mock_usuario_repository, mock_atividade_repository):
+        """Testa que as estatísticas vêm da agregação do repositório"""
+        mock_usuario_repository.find_by_id.return_value = Mock()
+        mock_atividade_repository.obter_agregados.return_value = {
+            'total_atividades': 3,
+            'total_duracao': 90,
+            'total_distancia': 12.345,
+            'total_calorias': 900,
+            'media_duracao': 30,
+            'media_calorias': 300,
+            'distribuicao_tipos': {'corrida': 2, 'yoga': 1}
+        }
+        
+        stats = atividade_service.obter_estatisticas(1)
+        
+        mock_atividade_repository.find_by_usuario.assert_not_called()
+        assert stats['total_atividades'] == 3
+        assert stats['total_duracao_minutos'] == 90
+        assert stats['total_distancia_km'] == 12.35
+        assert stats['media_calorias'] == 300
+        assert stats['atividade_favorita'] == 'corrida'
+        assert stats['distribuicao_tipos'] == {'corrida': 2, 'yoga': 1}
+    
+    def test_obter_estatisticas_sem_atividades(self, atividade_service, mock_usuario_repository, mock_atividade_repository):
+        """Testa estatísticas de usuário sem atividades"""
+        mock_usuario_repository.find_by_id.return_value = Mock()
+        mock_atividade_repository.obter_agregados.return_value = {
+            'total_atividades': 0,
+            'total_duracao': 0,
+            'total_distancia': 0,
+            'total_calorias': 0,
+            'media_duracao': 0,
+            'media_calorias': 0,
+            'distribuicao_tipos': {}
+        }
+        
+        stats = atividade_service.obter_estatisticas(1)
+        
+        assert stats['total_atividades'] == 0
+        assert stats['media_calorias'] == 0
+        assert stats['atividade_favorita'] is None
+    
+    def test_obter_estatisticas_usuario_inexistente(self, atividade_service, mock_usuario_repository):
+        """Testa estatísticas com usuário inexistente"""
+        mock_usuario_repository.find_by_id.return_value = None
+        
+        assert atividade_service.obter_estatisticas(999) == {}
+
+    def test_obter_estatisticas_le_totais_armazenados(self, mock_atividade_repository, mock_usuario_repository):
+        """Testa que os totais armazenados dispensam consultas às atividades"""
+        mock_estatisticas_repository = Mock(spec=EstatisticasRepository)
+        mock_estatisticas_repository.obter_agregados.return_value = {
+            'total_atividades': 1,
+            'total_duracao': 30,
+            'total_distancia': 5.0,
+            'total_calorias': 360,
+            'media_duracao': 30,
+            'media_calorias': 360,
+            'distribuicao_tipos': {'corrida': 1}
+        }
+        servico = AtividadeService(mock_atividade_repository, mock_usuario_repository, mock_estatisticas_repository)
+        
+        stats = servico.obter_estatisticas(1)
+        
+        assert stats['total_atividades'] == 1
+        mock_atividade_repository.obter_agregados.assert_not_called()
+        mock_usuario_repository.find_by_id.assert_not_called()
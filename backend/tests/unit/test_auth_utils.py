@@ -0,0 +1,54 @@
+"""
+Testes Unitários - Tokens de acesso
+"""
+
+import time
+import pytest
+from utils.auth_utils import EmissorTokens
+
+
+@pytest.fixture
+def emissor():
+    """Emissor com chave de teste"""
+    return EmissorTokens('chave-de-teste', validade=60)
+
+
+class TestEmissorTokens:
+    """Testes de emissão e verificação de tokens"""
+    
+    def test_gerar_e_verificar(self, emissor):
+        """Testa que o token carrega o ID do usuário"""
+        token, expira = emissor.gerar(42)
+        
+        assert emissor.verificar(token) == 42
+        assert expira > time.time()
+    
+    def test_token_adulterado(self, emissor):
+        """Testa que alterar o usuário invalida a assinatura"""
+        token, _ = emissor.gerar(42)
+        
+        assert emissor.verificar('43' + token[2:]) is None
+        assert emissor.verificar(token + 'x') is None
+        assert emissor.verificar('lixo') is None
+    
+    def test_outra_chave(self, emissor):
+        """Testa que tokens de outra chave são recusados"""
+        token, _ = EmissorTokens('outra-chave').gerar(42)
+        
+        assert emissor.verificar(token) is None
+    
+    def test_token_vencido(self):
+        """Testa que tokens vencidos são recusados"""
+        emissor = EmissorTokens('chave-de-teste', validade=-1)
+        token, _ = emissor.gerar(42)
+        
+        assert emissor.verificar(token) is None
+    
+    def test_revogar(self, emissor):
+        """Testa que o token revogado deixa de valer e os demais não"""
+        token, _ = emissor.gerar(42)
+        outro, _ = emissor.gerar(42)
+        
+        assert emissor.revogar(token) is True
+        assert emissor.verificar(token) is None
+        assert emissor.verificar(outro) == 42
@@ -0,0 +1,122 @@
+"""
+Testes Unitários - Cache de leituras dos repositórios
+"""
+
+import threading
+import pytest
+from types import SimpleNamespace
+from repositories.cache import AUSENTE, CacheLocal, CacheRemoto, CacheRepositorios, criar_servidor_cache, em_cache
+
+
+class TestCacheLocal:
+    """Testes do armazenamento LRU/TTL"""
+    
+    def test_lru(self):
+        """Testa que a entrada usada há mais tempo é descartada"""
+        cache = CacheLocal(capacidade=2)
+        cache.gravar('a', 1)
+        cache.gravar('b', 2)
+        cache.obter('a')
+        cache.gravar('c', 3)
+        
+        assert cache.obter('b') is None
+        assert cache.obter('a') == 1
+        assert cache.estatisticas()['descartes'] == 1
+    
+    def test_ttl(self):
+        """Testa que entradas expiradas não são devolvidas"""
+        cache = CacheLocal()
+        cache.gravar('a', 1, ttl=-1)
+        cache.gravar('b', 2, ttl=60)
+        
+        assert cache.obter('a') is None
+        assert cache.obter('b') == 2
+
+
+class TestCacheRepositorios:
+    """Testes de chaves por geração e contadores"""
+    
+    def test_acertos_e_falhas(self):
+        """Testa os contadores"""
+        cache = CacheRepositorios(CacheLocal())
+        
+        assert cache.obter('usuario', 1, ()) is AUSENTE
+        cache.gravar('usuario', 1, (), {'nome': 'Ana'})
+        assert cache.obter('usuario', 1, ()) == {'nome': 'Ana'}
+        
+        estatisticas = cache.estatisticas()
+        assert (estatisticas['acertos'], estatisticas['falhas'], estatisticas['taxa_acerto']) == (1, 1, 0.5)
+    
+    def test_invalidacao_por_usuario(self):
+        """Testa que invalidar um usuário não afeta os demais"""
+        cache = CacheRepositorios(CacheLocal())
+        cache.gravar('usuario', 1, (), 'um')
+        cache.gravar('atividades', 1, ((1, 10), ()), 'lista')
+        cache.gravar('usuario', 2, (), 'dois')
+        
+        cache.invalidar(1)
+        
+        assert cache.obter('usuario', 1, ()) is AUSENTE
+        assert cache.obter('atividades', 1, ((1, 10), ())) is AUSENTE
+        assert cache.obter('usuario', 2, ()) == 'dois'
+    
+    def test_geracao_descartada_nao_ressuscita_entradas(self):
+        """Testa que perder a geração pelo LRU não torna válidas entradas antigas"""
+        armazenamento = CacheLocal()
+        cache = CacheRepositorios(armazenamento)
+        cache.gravar('usuario', 1, (), 'antigo')
+        armazenamento.remover(('geracao', 1))
+        
+        assert cache.obter('usuario', 1, ()) is AUSENTE
+    
+    def test_invalidacao_durante_leitura_nao_grava_dado_antigo(self):
+        """Testa que um valor lido antes de uma invalidação não é servido depois dela"""
+        cache = CacheRepositorios(CacheLocal())
+        banco = {1: 'antigo'}
+        
+        class Repositorio:
+            db = SimpleNamespace(session=None)
+            
+            def __init__(self):
+                self.cache = cache
+            
+            @em_cache('usuario')
+            def buscar(self, usuario_id):
+                valor = banco[usuario_id]
+                # Outra requisição grava e invalida entre a leitura e a gravação no cache
+                banco[usuario_id] = 'novo'
+                cache.invalidar(usuario_id)
+                return valor
+        
+        repositorio = Repositorio()
+        assert repositorio.buscar(1) == 'antigo'
+        assert cache.obter('usuario', 1, ((), ())) is AUSENTE
+    
+    def test_remoto_indisponivel(self):
+        """Testa que falhas do backend viram falhas de cache, não erros"""
+        cache = CacheRepositorios(CacheRemoto(('127.0.0.1', 9), b'chave'))
+        
+        assert cache.obter('usuario', 1, ()) is AUSENTE
+        cache.gravar('usuario', 1, (), 'valor')
+        assert cache.estatisticas()['erros'] == 2
+
+
+class TestCacheRemoto:
+    """Testes do cache compartilhado via multiprocessing.managers"""
+    
+    @pytest.fixture
+    def endereco(self):
+        servidor = criar_servidor_cache(('127.0.0.1', 0), b'chave-teste', capacidade=100)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        return servidor.address
+    
+    def test_compartilhado_entre_clientes(self, endereco):
+        """Testa que dois clientes enxergam as mesmas entradas e invalidações"""
+        primeiro = CacheRepositorios(CacheRemoto(endereco, b'chave-teste'))
+        segundo = CacheRepositorios(CacheRemoto(endereco, b'chave-teste'))
+        
+        primeiro.gravar('usuario', 1, (), {'nome': 'Ana'})
+        assert segundo.obter('usuario', 1, ()) == {'nome': 'Ana'}
+        
+        segundo.invalidar(1)
+        assert primeiro.obter('usuario', 1, ()) is AUSENTE
@@ -0,0 +1,39 @@
+"""
+Testes Unitários - Container de serviços
+"""
+
+import pytest
+from unittest.mock import Mock
+from flask import Flask
+from services.container import ContainerServicos, obter_servicos
+
+
+@pytest.fixture
+def app():
+    """Aplicação mínima com o container registrado"""
+    app = Flask(__name__)
+    ContainerServicos(Mock()).init_app(app)
+    return app
+
+
+class TestContainerServicos:
+    """Testes do container criado em create_app"""
+    
+    def test_servicos_compartilham_repositorios(self):
+        """Testa que os serviços usam as mesmas instâncias de repositório"""
+        container = ContainerServicos(Mock())
+        
+        assert container.atividade_service.repository is container.atividade_repository
+        assert container.atividade_service.usuario_repository is container.usuario_repository
+        assert container.atividade_service.estatisticas_repository is container.estatisticas_repository
+        assert container.usuario_service.repository is container.usuario_repository
+    
+    def test_mesma_instancia_entre_requisicoes(self, app):
+        """Testa que requisições diferentes resolvem o mesmo serviço"""
+        with app.test_request_context():
+            primeiro = obter_servicos().atividade_service
+        with app.test_request_context():
+            segundo = obter_servicos().atividade_service
+        
+        assert primeiro is segundo
+        assert app.extensions['servicos'].atividade_service is primeiro
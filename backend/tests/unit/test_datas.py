@@ -0,0 +1,76 @@
+"""
+Testes Unitários - Conversão de datas ISO 8601
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from utils.datas import DataInvalida, converter_iso8601, para_utc
+
+
+class TestConverterIso8601:
+    """Testes do conversor de datas"""
+    
+    @pytest.mark.parametrize('texto, esperado', [
+        ('2024-03-10', datetime(2024, 3, 10)),
+        ('2024-03-10T07:30', datetime(2024, 3, 10, 7, 30)),
+        ('2024-03-10 07:30:15', datetime(2024, 3, 10, 7, 30, 15)),
+        ('2024-03-10T07:30:15.5', datetime(2024, 3, 10, 7, 30, 15, 500000)),
+        ('2024-03-10T07:30:15,123456789', datetime(2024, 3, 10, 7, 30, 15, 123456)),
+        ('2024-03-10T07:30:15.000Z', datetime(2024, 3, 10, 7, 30, 15)),
+        (' 2024-03-10T07:30:15z ', datetime(2024, 3, 10, 7, 30, 15)),
+    ])
+    def test_formas_usuais(self, texto, esperado):
+        """Testa as formas do caminho rápido"""
+        assert converter_iso8601(texto) == esperado
+    
+    @pytest.mark.parametrize('texto, esperado', [
+        ('2024-03-10T10:00:00-03:00', datetime(2024, 3, 10, 13)),
+        ('2024-03-10T10:00:00+0530', datetime(2024, 3, 10, 4, 30)),
+        ('2024-03-10T01:00:00+02', datetime(2024, 3, 9, 23)),
+        ('2024-12-31T22:00:00-03:00', datetime(2025, 1, 1, 1)),
+        ('2024-01-15T10:00:00,5-03:00', datetime(2024, 1, 15, 13, 0, 0, 500000)),
+        ('2024-01-15T10:00:00.1234567+02:00', datetime(2024, 1, 15, 8, 0, 0, 123456)),
+    ])
+    def test_offsets_convertidos_para_utc(self, texto, esperado):
+        """Testa que offsets são convertidos para UTC, e não descartados"""
+        assert converter_iso8601(texto) == esperado
+    
+    @pytest.mark.parametrize('texto', [
+        '', 'ontem', '2024-13-01', '2024-02-30T10:00', '2024-03-10T25:00', '2024-03-10T10:00+24:00',
+        '2024-03-10T10:00:00-03:00:00x', '2024-03-10T10:00+01:00Z', '10/03/2024', '9999-12-31T23:00:00-03:00'
+    ])
+    def test_entradas_invalidas(self, texto):
+        """Testa que entradas inválidas geram DataInvalida em vez da data atual"""
+        with pytest.raises(DataInvalida):
+            converter_iso8601(texto)
+    
+    def test_tipo_invalido(self):
+        """Testa que valores que não são texto são rejeitados"""
+        with pytest.raises(DataInvalida):
+            converter_iso8601(1710054000)
+    
+    def test_caminho_lento_equivalente(self):
+        """Testa que o caminho rápido concorda com fromisoformat + conversão para UTC"""
+        inicio = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=-3)))
+        for minutos in range(0, 60 * 24 * 3, 37):
+            data = inicio + timedelta(minutes=minutos, microseconds=minutos)
+            assert converter_iso8601(data.isoformat()) == para_utc(data)
+    
+    def test_offset_aplicado_uma_vez_no_caminho_alternativo(self, monkeypatch):
+        """Testa que o caminho alternativo (Python < 3.11) não desloca o offset duas vezes"""
+        import utils.datas as datas
+        
+        class SemFromisoformat(datetime):
+            @classmethod
+            def fromisoformat(cls, texto):
+                raise ValueError(texto)
+        
+        monkeypatch.setattr(datas, 'datetime', SemFromisoformat)
+        assert converter_iso8601('2024-01-15T10:00:00,5-03:00') == datetime(2024, 1, 15, 13, 0, 0, 500000)
+        assert converter_iso8601('2024-01-15T10:00:00.1234567+02:00') == datetime(2024, 1, 15, 8, 0, 0, 123456)
+        assert converter_iso8601('2024-01-15T10:00:00Z') == datetime(2024, 1, 15, 10)
+    
+    def test_para_utc(self):
+        """Testa a normalização de datetimes"""
+        assert para_utc(datetime(2024, 1, 1, 12)) == datetime(2024, 1, 1, 12)
+        assert para_utc(datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))) == datetime(2024, 1, 1, 10)
@@ -0,0 +1,186 @@
+"""
+Testes Unitários - Escritor único (repositories/escritor.py)
+"""
+
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from server import create_app
+from models.models import db, Atividade, Usuario
+from repositories.escritor import EscritorOcupado, em_lote_de_escrita
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'escritor.db'}",
+        'ESCRITA_SERIALIZADA': True
+    })
+    yield app
+    app.extensions['servicos'].escritor.encerrar()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def escritor(app):
+    return app.extensions['servicos'].escritor
+
+
+def inserir(email):
+    usuario = Usuario(nome='Test User', email=email, senha_hash='x')
+    db.session.add(usuario)
+    db.session.flush()
+    return usuario
+
+
+class TestEscritorUnico:
+    """Testes do agrupamento e do isolamento de falhas"""
+    
+    def test_desligado_em_memoria(self):
+        """Testa que bancos em memória não usam o escritor"""
+        app = create_app('testing', {'ESCRITA_SERIALIZADA': True})
+        
+        assert app.extensions['servicos'].escritor is None
+    
+    def test_agrupa_em_um_commit(self, app, escritor):
+        """Testa que operações enfileiradas juntas são confirmadas juntas"""
+        commits = []
+        with app.app_context():
+            event.listen(db.engine, 'commit', lambda conexao: commits.append(1))
+        liberar = threading.Event()
+        
+        primeiro = escritor.submeter(liberar.wait)
+        futuros = [escritor.submeter(inserir, f'u{i}@test.com') for i in range(20)]
+        liberar.set()
+        usuarios = [futuro.result(timeout=10) for futuro in futuros]
+        
+        assert primeiro.result(timeout=10) is True
+        # O primeiro lote não tocou o banco; as 20 inserções saem em um commit
+        assert len(commits) == 1
+        assert len({usuario.id for usuario in usuarios}) == 20
+        with app.app_context():
+            assert Usuario.query.count() == 20
+    
+    def test_falha_isolada(self, app, escritor):
+        """Testa que a falha de uma operação não desfaz as demais do lote"""
+        liberar = threading.Event()
+        escritor.submeter(liberar.wait)
+        bons = [escritor.submeter(inserir, f'u{i}@test.com') for i in range(3)]
+        ruim = escritor.submeter(inserir, 'u0@test.com')
+        liberar.set()
+        
+        assert all(futuro.result(timeout=10).id for futuro in bons)
+        with pytest.raises(Exception):
+            ruim.result(timeout=10)
+        with app.app_context():
+            assert Usuario.query.count() == 3
+    
+    def test_reentrante(self, escritor):
+        """Testa que uma escrita feita de dentro do lote roda na mesma transação"""
+        def aninhada():
+            return em_lote_de_escrita(), escritor.executar(inserir, 'a@test.com').id
+        
+        assert escritor.executar(aninhada) == (True, 1)
+        assert em_lote_de_escrita() is False
+    
+    def test_espera_esgotada_descarta_escrita_nao_iniciada(self, app, escritor):
+        """Testa que a escrita que não começou no prazo é cancelada, e não confirmada depois"""
+        escritor.espera = 0.1
+        iniciado, liberar = threading.Event(), threading.Event()
+        bloqueio = escritor.submeter(lambda: iniciado.set() or liberar.wait())
+        iniciado.wait(timeout=10)
+        
+        with pytest.raises(EscritorOcupado):
+            escritor.executar(inserir, 'atrasado@test.com')
+        liberar.set()
+        bloqueio.result(timeout=10)
+        escritor.executar(inserir, 'seguinte@test.com')
+        
+        with app.app_context():
+            assert [usuario.email for usuario in Usuario.query.all()] == ['seguinte@test.com']
+    
+    def test_espera_esgotada_aguarda_escrita_em_execucao(self, app, escritor):
+        """Testa que a escrita já iniciada é aguardada em vez de virar erro"""
+        escritor.espera = 0.1
+        
+        def lenta():
+            time.sleep(0.3)
+            return inserir('lento@test.com')
+        
+        assert escritor.executar(lenta).email == 'lento@test.com'
+        with app.app_context():
+            assert Usuario.query.count() == 1
+
+
+class TestEscritasDosServicos:
+    """Testes de que as escritas dos serviços são confirmadas pelo escritor único"""
+    
+    def test_importacao_e_recalculo(self, app, escritor):
+        """Testa que importação, recálculo e perfil não escrevem na thread da requisição"""
+        servicos = app.extensions['servicos']
+        threads = []
+        with app.app_context():
+            @event.listens_for(db.engine, 'before_cursor_execute')
+            def registrar(conexao, cursor, comando, parametros, contexto, executemany):
+                if comando.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+                    threads.append(threading.current_thread().name)
+            
+            usuario_id = escritor.executar(inserir, 'import@test.com').id
+            linhas = [
+                (numero, {'tipo': 'corrida', 'duracao': 30, 'data_atividade': '2024-01-01T10:00:00'}, None)
+                for numero in range(1, 6)
+            ]
+            
+            resultado, _, status = servicos.atividade_service.importar_atividades(usuario_id, linhas, tamanho_lote=2)
+            assert (status, resultado['importadas']) == (200, 5)
+            
+            perfil, _, status = servicos.usuario_service.atualizar_perfil(
+                usuario_id, {'peso': 80, 'recalcular_historico': True}
+            )
+            assert status == 200 and perfil.peso == 80
+            db.session.remove()
+        
+        assert threads and set(threads) == {'escritor-sqlite'}
+        with app.app_context():
+            assert servicos.atividade_service.repository.obter_agregados(usuario_id)['total_calorias'] == 5 * 411
+    
+    def test_leituras_sem_totais_nao_escrevem(self, app, escritor):
+        """Testa que resumo e série de um usuário sem totais só leem, mesmo com escritas em paralelo"""
+        servicos = app.extensions['servicos']
+        threads = []
+        
+        def historico():
+            usuario = inserir('historico@test.com')
+            db.session.add_all([
+                Atividade(usuario_id=usuario.id, tipo='corrida', duracao=30, calorias_queimadas=360,
+                          data_atividade=datetime(2024, 1, 1, 7) + timedelta(hours=i))
+                for i in range(30)
+            ])
+            return usuario.id
+        
+        with app.app_context():
+            usuario_id = escritor.executar(historico)
+            
+            @event.listens_for(db.engine, 'before_cursor_execute')
+            def registrar(conexao, cursor, comando, parametros, contexto, executemany):
+                if comando.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+                    threads.append(threading.current_thread().name)
+            
+            db.session.remove()
+        
+        # Como em uma requisição GET: transação de leitura comum (BEGIN, não IMMEDIATE)
+        with app.test_request_context('/api/atividades/resumo/stats'):
+            futuros = [escritor.submeter(inserir, f'paralelo{i}@test.com') for i in range(20)]
+            estatisticas = servicos.atividade_service.obter_estatisticas(usuario_id)
+            serie, _, status = servicos.atividade_service.obter_serie(usuario_id, 'dia', '2024-01-01', '2024-01-02')
+            for futuro in futuros:
+                futuro.result(timeout=10)
+            db.session.remove()
+        
+        assert estatisticas['total_atividades'] == 30
+        assert status == 200 and [p['total_atividades'] for p in serie['serie']] == [17, 13]
+        assert threads and set(threads) == {'escritor-sqlite'}
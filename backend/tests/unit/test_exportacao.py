@@ -0,0 +1,38 @@
+"""
+Testes Unitários - Geração de arquivos de exportação
+"""
+
+import json
+from datetime import datetime
+from utils.exportacao import CAMPOS_EXPORTACAO, gerar_csv, gerar_ndjson
+
+LINHA = (1, 'corrida', 30, 5.0, 'alta', 450, datetime(2024, 1, 1, 7), datetime(2024, 1, 1, 8), 'com "aspas", vírgula')
+
+
+class TestExportacao:
+    """Testes dos geradores CSV e NDJSON"""
+    
+    def test_csv_escapa_campos(self):
+        """Testa cabeçalho, datas ISO e escape de texto"""
+        texto = ''.join(gerar_csv([LINHA]))
+        
+        cabecalho, linha = texto.splitlines()
+        assert cabecalho == ','.join(CAMPOS_EXPORTACAO)
+        assert linha == '1,corrida,30,5.0,alta,450,2024-01-01T07:00:00,2024-01-01T08:00:00,"com ""aspas"", vírgula"'
+    
+    def test_ndjson_um_objeto_por_linha(self):
+        """Testa que cada linha é um objeto JSON completo"""
+        linhas = ''.join(gerar_ndjson([LINHA, LINHA])).splitlines()
+        
+        assert len(linhas) == 2
+        objeto = json.loads(linhas[0])
+        assert objeto['data_atividade'] == '2024-01-01T07:00:00'
+        assert objeto['observacoes'] == 'com "aspas", vírgula'
+    
+    def test_emite_em_blocos(self):
+        """Testa que o arquivo é produzido em vários blocos"""
+        blocos = list(gerar_ndjson([LINHA] * 25, linhas_por_bloco=10))
+        assert [bloco.count('\n') for bloco in blocos] == [10, 10, 5]
+        
+        blocos = list(gerar_csv([LINHA] * 25, linhas_por_bloco=10))
+        assert len(blocos) == 3
@@ -0,0 +1,110 @@
+"""
+Testes Unitários - Leitura de arquivos de importação
+"""
+
+import io
+from utils.importacao import MENSAGEM_LINHA_LONGA, TAMANHO_MAXIMO_LINHA, decodificar_linhas, detectar_formato, ler_csv, ler_ndjson
+
+
+def linhas(texto):
+    return decodificar_linhas(io.BytesIO(texto.encode('utf-8')))
+
+
+class TestLeituraCSV:
+    """Testes do leitor CSV"""
+    
+    def test_converte_tipos(self):
+        """Testa conversão de números e campos vazios"""
+        resultado = list(ler_csv(linhas(
+            'tipo,duracao,distancia,intensidade,data_atividade\n'
+            'corrida,30,5.5,alta,2024-01-01T07:00:00\n'
+            'yoga,45,,,\n'
+        )))
+        
+        assert resultado[0] == (2, {
+            'tipo': 'corrida', 'duracao': 30, 'distancia': 5.5,
+            'intensidade': 'alta', 'data_atividade': '2024-01-01T07:00:00'
+        }, None)
+        assert resultado[1] == (3, {'tipo': 'yoga', 'duracao': 45, 'distancia': None, 'data_atividade': None}, None)
+    
+    def test_erros_por_linha(self):
+        """Testa que linhas inválidas geram erro sem interromper a leitura"""
+        resultado = list(ler_csv(linhas(
+            '\ufefftipo,duracao\n'
+            'corrida,trinta\n'
+            'corrida,30,extra\n'
+            'corrida,30\n'
+        )))
+        
+        assert [(numero, erro is None) for numero, _, erro in resultado] == [(2, False), (3, False), (4, True)]
+        assert 'inteiro' in resultado[0][2]
+    
+    def test_observacoes_com_quebra_de_linha(self):
+        """Testa campo entre aspas ocupando mais de uma linha"""
+        resultado = list(ler_csv(linhas('tipo,duracao,observacoes\ncorrida,30,"linha 1\nlinha 2"\n')))
+        
+        assert resultado[0][1]['observacoes'] == 'linha 1\nlinha 2'
+
+
+    def test_campo_acima_do_limite_vira_erro_da_linha(self):
+        """Testa que csv.Error (campo maior que field_size_limit) não interrompe a leitura"""
+        resultado = list(ler_csv(linhas(
+            'tipo,duracao,observacoes\n'
+            f"corrida,30,{'x' * 200 * 1024}\n"
+            'yoga,20,ok\n'
+        )))
+        
+        assert [(numero, erro is None) for numero, _, erro in resultado] == [(2, False), (3, True)]
+        assert 'field larger than field limit' in resultado[0][2]
+    
+    def test_linha_longa_demais_descartada(self):
+        """Testa que uma linha acima do limite é relatada e as seguintes continuam numeradas"""
+        resultado = list(ler_csv(decodificar_linhas(io.BytesIO((
+            'tipo,duracao\n'
+            f"corrida,{'9' * (TAMANHO_MAXIMO_LINHA + 1)}\n"
+            'yoga,20\n'
+        ).encode()), tamanho_bloco=1000)))
+        
+        assert resultado[0] == (2, None, f'CSV inválido: {MENSAGEM_LINHA_LONGA}')
+        assert resultado[1] == (3, {'tipo': 'yoga', 'duracao': 20}, None)
+
+
+class TestLeituraNDJSON:
+    """Testes do leitor NDJSON"""
+    
+    def test_linhas_validas_e_invalidas(self):
+        """Testa objetos válidos, JSON inválido e linhas em branco"""
+        resultado = list(ler_ndjson(linhas(
+            '{"tipo": "corrida", "duracao": "30", "ignorado": 1}\n'
+            '\n'
+            '{quebrado\n'
+            '[1, 2]\n'
+        )))
+        
+        assert resultado[0] == (1, {'tipo': 'corrida', 'duracao': 30}, None)
+        assert [(numero, erro) for numero, _, erro in resultado[1:]] == [
+            (3, 'JSON inválido'), (4, 'Cada linha deve conter um objeto JSON')
+        ]
+
+
+    def test_linha_longa_demais_descartada(self):
+        """Testa que a linha longa demais não é acumulada e vira erro daquela linha"""
+        resultado = list(ler_ndjson(decodificar_linhas(io.BytesIO((
+            '{"tipo": "yoga"}\n'
+            + 'x' * (TAMANHO_MAXIMO_LINHA * 3) + '\n'
+            '{"tipo": "corrida"}'
+        ).encode()), tamanho_bloco=4096)))
+        
+        assert resultado == [
+            (1, {'tipo': 'yoga'}, None), (2, None, MENSAGEM_LINHA_LONGA), (3, {'tipo': 'corrida'}, None)
+        ]
+
+
+class TestDetectarFormato:
+    """Testes da detecção de formato"""
+    
+    def test_por_extensao_e_mimetype(self):
+        assert detectar_formato('multipart/form-data', 'historico.CSV') == 'csv'
+        assert detectar_formato('multipart/form-data', 'historico.jsonl') == 'ndjson'
+        assert detectar_formato('application/x-ndjson') == 'ndjson'
+        assert detectar_formato('application/json') is None
@@ -0,0 +1,120 @@
+"""
+Testes Unitários - Registro de métricas e exportação no formato do Prometheus
+"""
+
+import json
+import os
+import time
+from server import create_app
+from utils.metricas import MetricasAplicacao, RegistroMetricas
+
+ROTULOS = (('metodo', 'GET'), ('rota', '/api/atividades'))
+
+
+def linhas(texto, prefixo):
+    return [linha for linha in texto.splitlines() if linha.startswith(prefixo)]
+
+
+class TestRegistro:
+    """Testes de contadores, histogramas e formato de saída"""
+    
+    def test_histograma_acumulado(self):
+        """Testa buckets cumulativos (limite inclusivo), soma e contagem"""
+        registro = RegistroMetricas(limites=(0.1, 1))
+        for valor in (0.05, 0.1, 0.5, 3):
+            registro.observar('fittrack_requisicao_duracao_segundos', ROTULOS, valor)
+        
+        texto = MetricasAplicacao(registro).exportar()
+        
+        assert linhas(texto, 'fittrack_requisicao_duracao_segundos_bucket') == [
+            'fittrack_requisicao_duracao_segundos_bucket{metodo="GET",rota="/api/atividades",le="0.1"} 2',
+            'fittrack_requisicao_duracao_segundos_bucket{metodo="GET",rota="/api/atividades",le="1"} 3',
+            'fittrack_requisicao_duracao_segundos_bucket{metodo="GET",rota="/api/atividades",le="+Inf"} 4',
+        ]
+        assert 'fittrack_requisicao_duracao_segundos_sum{metodo="GET",rota="/api/atividades"} 3.65' in texto
+        assert 'fittrack_requisicao_duracao_segundos_count{metodo="GET",rota="/api/atividades"} 4' in texto
+        assert '# TYPE fittrack_requisicao_duracao_segundos histogram' in texto
+    
+    def test_rotulos_escapados(self):
+        """Testa o escape de aspas, barras e quebras de linha nos rótulos"""
+        registro = RegistroMetricas()
+        registro.incrementar('fittrack_requisicoes_total', (('rota', 'a"b\\c\nd'),))
+        
+        assert 'fittrack_requisicoes_total{rota="a\\"b\\\\c\\nd"} 1' in MetricasAplicacao(registro).exportar()
+
+
+class TestAgregacaoWorkers:
+    """Testes da soma dos instantâneos de vários workers"""
+    
+    def gravar_outro_worker(self, diretorio, pid, atualizado, registro):
+        instantaneo = registro.instantaneo()
+        instantaneo.update(pid=pid, atualizado=atualizado)
+        with open(os.path.join(diretorio, f'{pid}.json'), 'w') as arquivo:
+            json.dump(instantaneo, arquivo)
+    
+    def test_soma_contadores_e_separa_medidores(self, tmp_path):
+        """Testa contadores somados e medidores com o rótulo worker"""
+        outro = RegistroMetricas()
+        outro.incrementar('fittrack_requisicoes_total', ROTULOS, 5)
+        outro.observar('fittrack_requisicao_duracao_segundos', ROTULOS, 0.2)
+        outro.registrar_coletor(lambda: [('fittrack_senhas_pendentes', (), 3)])
+        self.gravar_outro_worker(tmp_path, 999999, time.time(), outro)
+        self.gravar_outro_worker(tmp_path, 999998, time.time() - 3600, outro)
+        
+        registro = RegistroMetricas()
+        registro.registrar_coletor(lambda: [('fittrack_senhas_pendentes', (), 1)])
+        metricas = MetricasAplicacao(registro, str(tmp_path), expiracao=300)
+        metricas.registrar_requisicao('GET', '/api/atividades', 200, 0.02)
+        metricas.registro.incrementar('fittrack_requisicoes_total', ROTULOS, 2)
+        texto = metricas.exportar()
+        
+        assert 'fittrack_requisicoes_total{metodo="GET",rota="/api/atividades"} 7' in texto
+        assert 'fittrack_requisicao_duracao_segundos_count{metodo="GET",rota="/api/atividades"} 2' in texto
+        assert f'fittrack_senhas_pendentes{{worker="{os.getpid()}"}} 1' in texto
+        assert 'fittrack_senhas_pendentes{worker="999999"} 3' in texto
+        # Worker sem atualização há mais de METRICAS_EXPIRACAO
+        assert '999998' not in texto
+
+
+class TestEndpoint:
+    """Testes de GET /api/metrics"""
+    
+    def test_requisicoes_por_rota(self):
+        """Testa a contagem pela regra da rota, não pelo caminho"""
+        app = create_app('testing')
+        client = app.test_client()
+        client.get('/api/atividades/1')
+        client.get('/api/atividades/2')
+        
+        response = client.get('/api/metrics')
+        texto = response.get_data(as_text=True)
+        
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        assert 'fittrack_requisicoes_total{metodo="GET",rota="/api/atividades/<int:atividade_id>",status="401"} 2' in texto
+        assert 'fittrack_senhas_pendentes 0' in texto
+        assert 'fittrack_processo_memoria_residente_bytes' in texto
+    
+    def test_token(self):
+        """Testa que METRICAS_TOKEN exige o cabeçalho Authorization"""
+        app = create_app('testing', {'METRICAS_TOKEN': 'segredo'})
+        client = app.test_client()
+        
+        assert client.get('/api/metrics').status_code == 401
+        assert client.get('/api/metrics', headers={'Authorization': 'Bearer segredo'}).status_code == 200
+    
+    def test_fechado_sem_opcao_explicita(self):
+        """Testa que, sem token, endereços nem METRICAS_PUBLICAS, a coleta é recusada"""
+        client = create_app('testing', {'METRICAS_PUBLICAS': False}).test_client()
+        assert client.get('/api/metrics').status_code == 401
+        
+        client = create_app('testing', {'METRICAS_PUBLICAS': False, 'METRICAS_IPS': ('127.0.0.1',)}).test_client()
+        assert client.get('/api/metrics').status_code == 200
+        assert client.get('/api/metrics', environ_base={'REMOTE_ADDR': '10.0.0.9'}).status_code == 401
+    
+    def test_producao_fechada_por_padrao(self):
+        """Testa que a configuração de produção não deixa as métricas públicas"""
+        from config import ProductionConfig
+        
+        assert ProductionConfig.METRICAS_PUBLICAS is False
+        assert (ProductionConfig.METRICAS_TOKEN, ProductionConfig.METRICAS_IPS) == (None, ())
@@ -0,0 +1,55 @@
+"""
+Testes Unitários - Hash de senhas
+"""
+
+import pytest
+from utils.senhas import FilaSenhasCheia, HasherSenhas
+
+
+@pytest.fixture
+def hasher():
+    """Hasher rápido executando na própria thread"""
+    return HasherSenhas(metodo='pbkdf2:sha256:1000')
+
+
+class TestHasherSenhas:
+    """Testes do HasherSenhas"""
+    
+    def test_gerar_e_verificar(self, hasher):
+        """Testa hash e verificação"""
+        senha_hash = hasher.gerar_hash('Senha123!')
+        
+        assert senha_hash.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verificar(senha_hash, 'Senha123!') is True
+        assert hasher.verificar(senha_hash, 'Errada123!') is False
+        assert hasher.verificar(None, 'Senha123!') is False
+    
+    def test_precisa_rehash(self, hasher):
+        """Testa detecção de hashes com parâmetros antigos"""
+        antigo = HasherSenhas(metodo='pbkdf2:sha256:500').gerar_hash('Senha123!')
+        
+        assert hasher.precisa_rehash(antigo) is True
+        assert hasher.precisa_rehash(hasher.gerar_hash('Senha123!')) is False
+    
+    def test_prefixo_com_metodo_abreviado(self):
+        """Testa que 'pbkdf2' sem iterações não força rehash a cada login"""
+        hasher = HasherSenhas(metodo='pbkdf2', tamanho_salt=4)
+        
+        assert hasher.precisa_rehash(hasher.prefixo + '$salt$hash') is False
+    
+    def test_fila_cheia(self):
+        """Testa que nenhuma tarefa é enfileirada além do limite"""
+        hasher = HasherSenhas(metodo='pbkdf2:sha256:1000', processos=1, fila_maxima=0)
+        hasher._vagas.acquire()
+        
+        with pytest.raises(FilaSenhasCheia):
+            hasher.gerar_hash('Senha123!')
+    
+    def test_pool_de_processos(self):
+        """Testa hash e verificação em um processo separado"""
+        hasher = HasherSenhas(metodo='pbkdf2:sha256:1000', processos=1)
+        try:
+            senha_hash = hasher.gerar_hash('Senha123!')
+            assert hasher.verificar(senha_hash, 'Senha123!') is True
+        finally:
+            hasher.encerrar()
@@ -0,0 +1,80 @@
+"""
+Testes Unitários - Serializadores pré-compilados e JSON compacto
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from server import create_app
+from models.models import Atividade
+from utils.serializacao import compilar, formatar_data, serializador
+
+
+def nova_atividade():
+    return Atividade(
+        id=7, usuario_id=1, tipo='corrida', duracao=30, distancia=5.0, intensidade='alta',
+        calorias_queimadas=450, data_atividade=datetime(2024, 1, 1, 7), data_criacao=None,
+        observacoes='ação'
+    )
+
+
+class TestCompilar:
+    """Testes da geração dos serializadores"""
+    
+    def test_objeto_igual_ao_serialize(self):
+        """Testa que o serializador compilado equivale a serialize()"""
+        atividade = nova_atividade()
+        
+        assert compilar(Atividade.CAMPOS)(atividade) == atividade.serialize()
+        assert compilar(('id', 'data_atividade'))(atividade) == {'id': 7, 'data_atividade': '2024-01-01T07:00:00'}
+    
+    def test_tupla_por_posicao(self):
+        """Testa a serialização direta de tuplas de resultado"""
+        serializar = compilar(('id', 'tipo', 'data_criacao'), 'tupla')
+        
+        assert serializar((3, 'yoga', datetime(2024, 5, 2, 8, 30))) == {
+            'id': 3, 'tipo': 'yoga', 'data_criacao': '2024-05-02T08:30:00'
+        }
+    
+    def test_compilado_uma_vez(self):
+        """Testa que o mesmo conjunto de campos reutiliza a função"""
+        assert compilar(('id', 'tipo')) is compilar(('id', 'tipo'))
+    
+    def test_campo_invalido(self):
+        """Testa que nomes que não são identificadores são rejeitados"""
+        with pytest.raises(ValueError):
+            compilar(('id', 'tipo); import os; (x',))
+    
+    def test_formatar_data(self):
+        """Testa o cache de datas e a passagem de None"""
+        assert formatar_data(None) is None
+        assert formatar_data(datetime(2024, 1, 1)) == '2024-01-01T00:00:00'
+    
+    def test_formatar_data_com_fuso(self):
+        """Testa que o mesmo instante em fusos diferentes mantém o offset de cada um"""
+        utc = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+        brasilia = utc.astimezone(timezone(timedelta(hours=-3)))
+        assert utc == brasilia
+        
+        assert formatar_data(utc) == '2024-01-01T12:00:00+00:00'
+        assert formatar_data(brasilia) == '2024-01-01T09:00:00-03:00'
+
+
+class TestConfiguracao:
+    """Testes de SERIALIZACAO_COMPILADA e JSON_COMPACTO"""
+    
+    def test_caminho_selecionavel(self):
+        """Testa que desligar a opção volta ao serialize() do modelo"""
+        app = create_app('testing', {'SERIALIZACAO_COMPILADA': False})
+        
+        with app.app_context():
+            assert serializador(('id',)) is not compilar(('id',))
+            assert serializador(('id',))(nova_atividade()) == {'id': 7}
+        assert serializador(('id',)) is compilar(('id',))
+    
+    def test_json_compacto_mesmo_em_debug(self):
+        """Testa a saída sem espaços, na ordem dos campos e em UTF-8"""
+        app = create_app('testing', {'DEBUG': True})
+        
+        with app.app_context():
+            assert app.json.dumps({'b': 'ação', 'a': [1, 2]}) == '{"b":"ação","a":[1,2]}'
+            assert app.json.response({'a': 1}).get_data() == b'{"a":1}\n'
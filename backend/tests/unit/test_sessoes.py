@@ -0,0 +1,70 @@
+"""
+Testes Unitários - Armazenamentos de sessão
+"""
+
+import time
+import pytest
+from utils.sessoes import ArmazenamentoMemoria, ArmazenamentoSQLite
+
+
+class TestArmazenamentoMemoria:
+    """Testes do armazenamento LRU em memória"""
+    
+    def test_gravar_obter_remover(self):
+        """Testa o ciclo básico"""
+        armazenamento = ArmazenamentoMemoria()
+        armazenamento.gravar('a', '{"usuario_id": 1}', 60)
+        
+        assert armazenamento.obter('a') == '{"usuario_id": 1}'
+        armazenamento.remover('a')
+        assert armazenamento.obter('a') is None
+    
+    def test_descarta_menos_usada(self):
+        """Testa que a capacidade descarta a sessão usada há mais tempo"""
+        armazenamento = ArmazenamentoMemoria(capacidade=2)
+        armazenamento.gravar('a', '1', 60)
+        armazenamento.gravar('b', '2', 60)
+        armazenamento.obter('a')
+        armazenamento.gravar('c', '3', 60)
+        
+        assert armazenamento.obter('b') is None
+        assert armazenamento.obter('a') == '1'
+        assert len(armazenamento) == 2
+    
+    def test_expiracao(self):
+        """Testa que sessões expiradas não são devolvidas"""
+        armazenamento = ArmazenamentoMemoria()
+        armazenamento.gravar('a', '1', -1)
+        
+        assert armazenamento.obter('a') is None
+        assert len(armazenamento) == 0
+
+
+class TestArmazenamentoSQLite:
+    """Testes do armazenamento SQLite"""
+    
+    @pytest.fixture
+    def armazenamento(self, tmp_path):
+        return ArmazenamentoSQLite(str(tmp_path / 'sessoes.db'), intervalo_limpeza=0)
+    
+    def test_gravar_obter_remover(self, armazenamento):
+        """Testa o ciclo básico"""
+        armazenamento.gravar('a', '{"usuario_id": 1}', 60)
+        
+        assert armazenamento.obter('a') == '{"usuario_id": 1}'
+        armazenamento.remover('a')
+        assert armazenamento.obter('a') is None
+    
+    def test_modo_wal(self, armazenamento):
+        """Testa que o banco de sessões usa WAL"""
+        assert armazenamento._conexao().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    
+    def test_limpeza_remove_expiradas(self, armazenamento):
+        """Testa que a limpeza periódica apaga as sessões expiradas"""
+        armazenamento.gravar('velha', '1', -1)
+        time.sleep(0.01)
+        armazenamento.gravar('nova', '2', 60)
+        
+        total = armazenamento._conexao().execute('SELECT COUNT(*) FROM sessoes').fetchone()[0]
+        assert total == 1
+        assert armazenamento.obter('nova') == '2'
@@ -0,0 +1,136 @@
+"""
+Autenticação por sessão ou por token assinado (Authorization: Bearer)
+
+O token tem a forma <usuario_id>.<expira>.<id>.<assinatura>: expira em
+segundos desde a época, id aleatório (usado na revogação) e assinatura
+HMAC-SHA256 dos três primeiros campos. A verificação não acessa banco nem
+armazenamento de sessão; o logout revoga o id do token em uma lista em
+memória até o seu vencimento (por processo).
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from functools import wraps
+from typing import Optional, Tuple
+
+from flask import current_app, g, jsonify, request, session
+
+EXTENSAO = 'tokens'
+
+
+def _b64(dados: bytes) -> str:
+    return base64.urlsafe_b64encode(dados).rstrip(b'=').decode()
+
+
+class ListaRevogacao:
+    """Ids de tokens revogados, mantidos até o vencimento de cada token"""
+    
+    def __init__(self):
+        self._revogados = {}
+        self._trava = threading.Lock()
+    
+    def revogar(self, id_token: str, expira: int):
+        with self._trava:
+            self._revogados[id_token] = expira
+            # Limpeza amortizada: a lista só guarda tokens ainda válidos
+            if len(self._revogados) % 256 == 0:
+                agora = time.time()
+                self._revogados = {i: e for i, e in self._revogados.items() if e > agora}
+    
+    def revogado(self, id_token: str) -> bool:
+        return id_token in self._revogados
+    
+    def __len__(self):
+        return len(self._revogados)
+
+
+class EmissorTokens:
+    """Emite, verifica e revoga tokens de acesso"""
+    
+    def __init__(self, segredo: str, validade: int = 86400):
+        # Chave própria para os tokens, derivada do SECRET_KEY
+        self._chave = hmac.new(segredo.encode(), b'fittrack-token-acesso', hashlib.sha256).digest()
+        self.validade = validade
+        self.revogacao = ListaRevogacao()
+    
+    @classmethod
+    def a_partir_da_config(cls, config) -> 'EmissorTokens':
+        """Cria o emissor com AUTH_TOKEN_CHAVE (ou SECRET_KEY) e AUTH_TOKEN_VALIDADE"""
+        return cls(config.get('AUTH_TOKEN_CHAVE') or config['SECRET_KEY'], config.get('AUTH_TOKEN_VALIDADE', 86400))
+    
+    def init_app(self, app):
+        """Registra o emissor em app.extensions"""
+        app.extensions[EXTENSAO] = self
+        return self
+    
+    def _assinar(self, conteudo: str) -> str:
+        return _b64(hmac.new(self._chave, conteudo.encode(), hashlib.sha256).digest())
+    
+    def gerar(self, usuario_id: int) -> Tuple[str, int]:
+        """Retorna (token, expira)"""
+        expira = int(time.time()) + self.validade
+        conteudo = f'{usuario_id}.{expira}.{_b64(secrets.token_bytes(9))}'
+        return f'{conteudo}.{self._assinar(conteudo)}', expira
+    
+    def _decodificar(self, token: str) -> Optional[Tuple[int, int, str]]:
+        """(usuario_id, expira, id_token) de um token íntegro e não vencido; None caso contrário"""
+        conteudo, _, assinatura = token.rpartition('.')
+        if not hmac.compare_digest(assinatura.encode(), self._assinar(conteudo).encode()):
+            return None
+        try:
+            usuario_id, expira, id_token = conteudo.split('.')
+            usuario_id, expira = int(usuario_id), int(expira)
+        except ValueError:
+            return None
+        if expira <= time.time():
+            return None
+        return usuario_id, expira, id_token
+    
+    def verificar(self, token: str) -> Optional[int]:
+        """Retorna o usuario_id de um token válido e não revogado"""
+        dados = self._decodificar(token)
+        if dados is None or self.revogacao.revogado(dados[2]):
+            return None
+        return dados[0]
+    
+    def revogar(self, token: str) -> bool:
+        """Revoga o token até o seu vencimento"""
+        dados = self._decodificar(token)
+        if dados is None:
+            return False
+        self.revogacao.revogar(dados[2], dados[1])
+        return True
+
+
+def obter_token_requisicao() -> Optional[str]:
+    """Token enviado em 'Authorization: Bearer <token>', se houver"""
+    cabecalho = request.headers.get('Authorization', '')
+    if cabecalho[:7].lower() == 'bearer ':
+        return cabecalho[7:].strip() or None
+    return None
+
+
+def obter_usuario_id() -> Optional[int]:
+    """ID do usuário autenticado pelo token (se enviado) ou pela sessão"""
+    token = obter_token_requisicao()
+    if token is not None:
+        emissor = current_app.extensions.get(EXTENSAO)
+        # Um token inválido não cai para a sessão
+        return emissor.verificar(token) if emissor else None
+    return session.get('usuario_id')
+
+
+def login_required(funcao):
+    """Exige autenticação; o ID do usuário fica disponível em g.usuario_id"""
+    @wraps(funcao)
+    def decorada(*args, **kwargs):
+        usuario_id = obter_usuario_id()
+        if not usuario_id:
+            return jsonify({'mensagem': 'Não autenticado'}), 401
+        g.usuario_id = usuario_id
+        return funcao(*args, **kwargs)
+    return decorada
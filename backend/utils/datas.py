@@ -0,0 +1,105 @@
+"""
+Conversão de datas ISO 8601 recebidas pela API e pela importação
+
+As datas são gravadas como datetime sem fuso, em UTC. Offsets ('Z',
+'+02:00', '-0300', '-03') são convertidos para UTC, e não descartados; uma
+data sem offset é considerada já em UTC.
+
+Caminho rápido: o sufixo 'Z' ou '±HH:MM' é separado por fatiamento (com o
+deslocamento de cada offset em cache) e o restante vai para
+datetime.fromisoformat, implementado em C. O que ele não aceita em todas as
+versões do Python (',' na fração, mais de 6 dígitos, '±HHMM', '±HH') passa
+por uma expressão regular pré-compilada. Qualquer outra entrada gera
+DataInvalida, em vez de ser trocada pela data atual.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+FORMATO_ESPERADO = 'AAAA-MM-DD[THH:MM[:SS[.ffffff]]][Z|±HH:MM]'
+
+_ISO8601 = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d{1,9}))?)?)?'
+    r'(?:[Zz]|([+-]\d{2}(?::?\d{2})?))?',
+    re.ASCII
+)
+
+
+class DataInvalida(ValueError):
+    """Data fora do formato ISO 8601 ou com valores impossíveis"""
+
+
+# Deslocamento de cada sufixo '±HH:MM' já visto; só existem algumas dezenas em uso
+_DESLOCAMENTOS: Dict[str, timedelta] = {}
+
+
+def _deslocamento(sufixo: str) -> timedelta:
+    """timedelta de um offset '±HH:MM', '±HHMM' ou '±HH'"""
+    deslocamento = _DESLOCAMENTOS.get(sufixo)
+    if deslocamento is None:
+        horas, minutos = sufixo[1:3], sufixo[-2:] if len(sufixo) > 3 else '00'
+        if not (horas.isdigit() and minutos.isdigit()) or int(horas) > 23 or int(minutos) > 59:
+            raise DataInvalida(f'Fuso horário inválido: {sufixo}')
+        deslocamento = timedelta(hours=int(horas), minutes=int(minutos))
+        if sufixo[0] == '-':
+            deslocamento = -deslocamento
+        if len(_DESLOCAMENTOS) < 1024:
+            _DESLOCAMENTOS[sufixo] = deslocamento
+    return deslocamento
+
+
+def converter_iso8601(texto: str) -> datetime:
+    """Converte uma data ISO 8601 em datetime sem fuso, em UTC"""
+    if not isinstance(texto, str):
+        raise DataInvalida(f'Data deve ser um texto no formato {FORMATO_ESPERADO}')
+    texto = texto.strip()
+    
+    base = texto
+    deslocamento = None
+    if texto[-1:] in ('Z', 'z'):
+        base = texto[:-1]
+    elif len(texto) > 16 and texto[-3] == ':' and texto[-6] in ('+', '-'):
+        base = texto[:-6]
+        deslocamento = _deslocamento(texto[-6:])
+    
+    try:
+        data = datetime.fromisoformat(base)
+    except ValueError:
+        # Já aplica o offset do texto completo; não passa pelo deslocamento abaixo
+        return _converter_alternativo(texto)
+    
+    try:
+        if data.tzinfo is not None:
+            if len(base) != len(texto):
+                raise DataInvalida(f'Data com dois fusos horários: {texto!r}')
+            return para_utc(data)
+        return data - deslocamento if deslocamento else data
+    except OverflowError:
+        raise DataInvalida(f'Data fora do intervalo suportado: {texto!r}') from None
+
+
+def _converter_alternativo(texto: str) -> datetime:
+    """Formas que fromisoformat não aceita em todas as versões do Python"""
+    partes = _ISO8601.fullmatch(texto)
+    if partes is None:
+        raise DataInvalida(f'Data inválida: {texto!r}. Use o formato {FORMATO_ESPERADO}')
+    
+    ano, mes, dia, hora, minuto, segundo, fracao, offset = partes.groups()
+    try:
+        data = datetime(
+            int(ano), int(mes), int(dia),
+            int(hora or 0), int(minuto or 0), int(segundo or 0),
+            int(fracao[:6].ljust(6, '0')) if fracao else 0
+        )
+        return data - _deslocamento(offset) if offset else data
+    except (ValueError, OverflowError) as erro:
+        raise DataInvalida(f'Data inválida: {texto!r} ({erro})') from None
+
+
+def para_utc(data: datetime) -> datetime:
+    """Converte um datetime com fuso para UTC sem fuso; sem fuso permanece igual"""
+    if data.tzinfo is None:
+        return data
+    return data.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,65 @@
+"""
+Geração incremental de arquivos de exportação de atividades (CSV e NDJSON)
+
+Os geradores recebem tuplas na ordem de CAMPOS_EXPORTACAO e produzem o
+arquivo em blocos de texto, sem montar o documento inteiro em memória.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, Tuple
+
+from utils.serializacao import compilar, formatar_data
+
+CAMPOS_EXPORTACAO = (
+    'id', 'tipo', 'duracao', 'distancia', 'intensidade', 'calorias_queimadas',
+    'data_atividade', 'data_criacao', 'observacoes'
+)
+
+MIMETYPES_EXPORTACAO = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def _formatar(valor):
+    return formatar_data(valor) if isinstance(valor, datetime) else valor
+
+
+def gerar_csv(linhas: Iterable[Tuple], linhas_por_bloco: int = 500) -> Iterator[str]:
+    """Gera o CSV com cabeçalho, emitindo um bloco a cada linhas_por_bloco linhas"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow(CAMPOS_EXPORTACAO)
+    
+    pendentes = 0
+    for linha in linhas:
+        escritor.writerow([_formatar(valor) for valor in linha])
+        pendentes += 1
+        if pendentes >= linhas_por_bloco:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pendentes = 0
+    
+    yield buffer.getvalue()
+
+
+def gerar_ndjson(linhas: Iterable[Tuple], linhas_por_bloco: int = 500) -> Iterator[str]:
+    """Gera um objeto JSON por linha, emitindo um bloco a cada linhas_por_bloco linhas"""
+    serializar = compilar(CAMPOS_EXPORTACAO, 'tupla')
+    codificar = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    bloco = []
+    for linha in linhas:
+        bloco.append(codificar(serializar(linha)))
+        if len(bloco) >= linhas_por_bloco:
+            yield '\n'.join(bloco) + '\n'
+            bloco = []
+    
+    if bloco:
+        yield '\n'.join(bloco) + '\n'
+
+
+GERADORES = {'csv': gerar_csv, 'ndjson': gerar_ndjson}
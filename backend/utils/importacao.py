@@ -0,0 +1,179 @@
+"""
+Leitura incremental de arquivos de importação de atividades (CSV e NDJSON)
+
+Os leitores consomem o arquivo linha a linha e produzem tuplas
+(numero_linha, dados, erro), sem nunca carregar o arquivo inteiro em memória.
+Linhas acima de TAMANHO_MAXIMO_LINHA são descartadas sem serem acumuladas e,
+como campos CSV acima de csv.field_size_limit(), viram erro daquela linha.
+"""
+
+import csv
+import json
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+CAMPOS_IMPORTACAO = ('tipo', 'duracao', 'distancia', 'intensidade', 'data_atividade', 'observacoes')
+
+FORMATOS_IMPORTACAO = {
+    'csv': ('text/csv', 'application/csv'),
+    'ndjson': ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+}
+
+# Bytes de uma linha física; acima disso a linha é descartada e relatada como erro
+TAMANHO_MAXIMO_LINHA = 256 * 1024
+MENSAGEM_LINHA_LONGA = f'Linha excede o tamanho máximo de {TAMANHO_MAXIMO_LINHA // 1024} KiB'
+
+LinhaImportada = Tuple[int, Optional[Dict], Optional[str]]
+
+
+def detectar_formato(mimetype: str, nome_arquivo: Optional[str] = None) -> Optional[str]:
+    """Detecta o formato pela extensão do arquivo ou pelo Content-Type"""
+    if nome_arquivo:
+        extensao = nome_arquivo.rsplit('.', 1)[-1].lower()
+        if extensao in ('ndjson', 'jsonl'):
+            return 'ndjson'
+        if extensao == 'csv':
+            return 'csv'
+    for formato, mimetypes in FORMATOS_IMPORTACAO.items():
+        if mimetype in mimetypes:
+            return formato
+    return None
+
+
+def decodificar_linhas(stream, encoding: str = 'utf-8', tamanho_bloco: int = 64 * 1024,
+                       tamanho_maximo: int = TAMANHO_MAXIMO_LINHA) -> Iterator[Optional[str]]:
+    """Decodifica um stream binário linha a linha, descartando o BOM inicial
+    
+    O stream é lido em blocos de tamanho_bloco: iterar o stream da requisição
+    diretamente faria uma leitura por byte. Apenas o bloco corrente e a linha
+    incompleta ficam em memória. Uma linha com mais de tamanho_maximo bytes é
+    descartada à medida que chega e produz None no seu lugar.
+    """
+    pendente = b''
+    primeira = True
+    descartando = False
+    for bloco in iter(lambda: stream.read(tamanho_bloco), b''):
+        partes = (pendente + bloco).split(b'\n')
+        pendente = partes.pop()
+        for parte in partes:
+            if descartando:
+                # Final da linha longa demais, já relatada
+                descartando = False
+                continue
+            if len(parte) > tamanho_maximo:
+                primeira = False
+                yield None
+                continue
+            texto = (parte + b'\n').decode(encoding, errors='replace')
+            if primeira:
+                texto = texto.lstrip('\ufeff')
+                primeira = False
+            yield texto
+        
+        if len(pendente) > tamanho_maximo:
+            if not descartando:
+                primeira = False
+                descartando = True
+                yield None
+            pendente = b''
+    
+    if pendente and not descartando:
+        texto = pendente.decode(encoding, errors='replace')
+        yield texto.lstrip('\ufeff') if primeira else texto
+
+
+def converter_tipos(dados: Dict) -> Dict:
+    """Converte duração e distância para número; campos vazios viram None"""
+    convertido = {campo: (valor if valor != '' else None) for campo, valor in dados.items() if campo in CAMPOS_IMPORTACAO}
+    
+    duracao = convertido.get('duracao')
+    if duracao is not None:
+        try:
+            convertido['duracao'] = int(duracao)
+        except (TypeError, ValueError):
+            raise ValueError('Duração deve ser um número inteiro de minutos')
+    
+    distancia = convertido.get('distancia')
+    if distancia is not None:
+        try:
+            convertido['distancia'] = float(distancia)
+        except (TypeError, ValueError):
+            raise ValueError('Distância deve ser um número')
+    
+    if convertido.get('intensidade') is None:
+        convertido.pop('intensidade', None)
+    return convertido
+
+
+class _LinhasNumeradas:
+    """Entrega linhas ao csv.reader contando-as; linhas descartadas (None) viram csv.Error
+    
+    O csv.reader retoma do início de uma nova linha após um erro, então a
+    leitura continua na linha seguinte.
+    """
+    
+    def __init__(self, linhas: Iterable[Optional[str]]):
+        self.linhas = iter(linhas)
+        self.numero = 0
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> str:
+        linha = next(self.linhas)
+        self.numero += 1
+        if linha is None:
+            raise csv.Error(MENSAGEM_LINHA_LONGA)
+        return linha
+
+
+def ler_csv(linhas: Iterable[Optional[str]]) -> Iterator[LinhaImportada]:
+    """Lê atividades de um CSV com cabeçalho (colunas em CAMPOS_IMPORTACAO)"""
+    origem = _LinhasNumeradas(linhas)
+    leitor = csv.DictReader(origem)
+    try:
+        leitor.fieldnames
+    except csv.Error as erro:
+        yield origem.numero, None, f'Cabeçalho inválido: {erro}'
+        return
+    
+    while True:
+        try:
+            registro = next(leitor)
+        except StopIteration:
+            return
+        except csv.Error as erro:
+            yield origem.numero, None, f'CSV inválido: {erro}'
+            continue
+        numero = origem.numero
+        if None in registro:
+            yield numero, None, 'Linha com mais colunas que o cabeçalho'
+            continue
+        try:
+            yield numero, converter_tipos(registro), None
+        except ValueError as erro:
+            yield numero, None, str(erro)
+
+
+def ler_ndjson(linhas: Iterable[Optional[str]]) -> Iterator[LinhaImportada]:
+    """Lê atividades de um arquivo com um objeto JSON por linha"""
+    for numero, linha in enumerate(linhas, start=1):
+        if linha is None:
+            yield numero, None, MENSAGEM_LINHA_LONGA
+            continue
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            yield numero, None, 'JSON inválido'
+            continue
+        if not isinstance(registro, dict):
+            yield numero, None, 'Cada linha deve conter um objeto JSON'
+            continue
+        try:
+            yield numero, converter_tipos(registro), None
+        except ValueError as erro:
+            yield numero, None, str(erro)
+
+
+LEITORES = {'csv': ler_csv, 'ndjson': ler_ndjson}
@@ -0,0 +1,210 @@
+"""
+Instrumentação por requisição: Server-Timing e log estruturado
+
+Com INSTRUMENTACAO, cada requisição acumula:
+- sql: tempo e quantidade de comandos SQL (eventos before/after_cursor_execute
+  do engine);
+- serializacao: montagem dos dicionários pelos serializadores e codificação
+  JSON da resposta;
+- sessao: leitura e gravação da sessão (open_session/save_session);
+- total: do início da requisição (abertura da sessão) até a resposta.
+  'app' é o restante do total.
+
+Os valores saem no cabeçalho Server-Timing (visível nas ferramentas do
+navegador) e, com INSTRUMENTACAO_LOG, em uma linha JSON no logger
+'fittrack.requisicoes' para requisições acima de INSTRUMENTACAO_LOG_LIMIAR_MS.
+
+Comandos executados pelo escritor único (ESCRITA_SERIALIZADA) rodam fora da
+requisição e entram apenas no total.
+"""
+
+import json
+import logging
+import time
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('fittrack.requisicoes')
+
+_CHAVE_CONEXAO = 'instrumentacao_inicio'
+
+
+class Medicoes:
+    """Tempos acumulados (em segundos) de uma requisição"""
+    
+    __slots__ = ('inicio', 'sql', 'consultas', 'serializacao', 'sessao', 'total')
+    
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sql = self.serializacao = self.sessao = 0.0
+        self.consultas = 0
+        self.total = None
+    
+    def encerrar(self) -> float:
+        self.total = time.perf_counter() - self.inicio
+        return self.total
+    
+    def server_timing(self) -> str:
+        """Valor do cabeçalho Server-Timing, em milissegundos"""
+        total = self.total if self.total is not None else time.perf_counter() - self.inicio
+        app = max(total - self.sql - self.serializacao - self.sessao, 0.0)
+        return (
+            f'sql;dur={self.sql * 1000:.2f};desc="{self.consultas} consultas", '
+            f'serializacao;dur={self.serializacao * 1000:.2f}, '
+            f'sessao;dur={self.sessao * 1000:.2f}, '
+            f'app;dur={app * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+
+
+def medicoes_atuais() -> Optional[Medicoes]:
+    """Medições da requisição atual (criadas no primeiro uso); None fora de requisição"""
+    if not has_request_context():
+        return None
+    medicoes = g.get('_medicoes')
+    if medicoes is None:
+        medicoes = g._medicoes = Medicoes()
+    return medicoes
+
+
+def cronometrado(campo: str, funcao: Callable) -> Callable:
+    """funcao somando o tempo de cada chamada ao campo das medições da requisição"""
+    @wraps(funcao)
+    def medida(*args, **kwargs):
+        medicoes = medicoes_atuais()
+        if medicoes is None:
+            return funcao(*args, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            setattr(medicoes, campo, getattr(medicoes, campo) + time.perf_counter() - inicio)
+    return medida
+
+
+def instrumentacao_ativa() -> bool:
+    return has_request_context() and current_app.config.get('INSTRUMENTACAO', False)
+
+
+def cronometrar_serializador(funcao: Callable) -> Callable:
+    """Serializador de linhas que soma seu tempo a serializacao, se a instrumentação estiver ativa
+    
+    As medições são obtidas uma vez, e não a cada linha.
+    """
+    if not instrumentacao_ativa():
+        return funcao
+    medicoes = medicoes_atuais()
+    relogio = time.perf_counter
+    
+    def medido(linha):
+        inicio = relogio()
+        resultado = funcao(linha)
+        medicoes.serializacao += relogio() - inicio
+        return resultado
+    return medido
+
+
+class SessaoCronometrada:
+    """Envolve a session_interface da aplicação medindo leitura e gravação"""
+    
+    def __init__(self, interface):
+        self.interface = interface
+        self.open_session = cronometrado('sessao', interface.open_session)
+    
+    def save_session(self, app, session, response):
+        medicoes = medicoes_atuais()
+        inicio = time.perf_counter()
+        try:
+            return self.interface.save_session(app, session, response)
+        finally:
+            if medicoes is not None:
+                medicoes.sessao += time.perf_counter() - inicio
+                # save_session roda depois dos after_request: atualiza o cabeçalho
+                if 'Server-Timing' in response.headers:
+                    medicoes.encerrar()
+                    response.headers['Server-Timing'] = medicoes.server_timing()
+    
+    def __getattr__(self, nome):
+        return getattr(self.interface, nome)
+
+
+def _antes_do_comando(conexao, cursor, comando, parametros, contexto, executemany):
+    if has_request_context():
+        conexao.info.setdefault(_CHAVE_CONEXAO, []).append(time.perf_counter())
+
+
+def _depois_do_comando(conexao, cursor, comando, parametros, contexto, executemany):
+    inicios = conexao.info.get(_CHAVE_CONEXAO)
+    if inicios and has_request_context():
+        medicoes = medicoes_atuais()
+        medicoes.sql += time.perf_counter() - inicios.pop()
+        medicoes.consultas += 1
+
+
+def _erro_no_comando(contexto_excecao):
+    # Comando que falhou não chega a after_cursor_execute
+    conexao = contexto_excecao.connection
+    inicios = conexao.info.get(_CHAVE_CONEXAO) if conexao is not None else None
+    if inicios:
+        inicios.pop()
+
+
+def configurar_instrumentacao(app, db):
+    """Registra as medições de SQL, sessão e JSON se INSTRUMENTACAO estiver ligada"""
+    if not app.config.get('INSTRUMENTACAO', False):
+        return
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _antes_do_comando)
+    event.listen(engine, 'after_cursor_execute', _depois_do_comando)
+    event.listen(engine, 'handle_error', _erro_no_comando)
+    app.session_interface = SessaoCronometrada(app.session_interface)
+    app.json.response = cronometrado('serializacao', app.json.response)
+    
+    if app.config.get('INSTRUMENTACAO_LOG', False) and not logger.handlers:
+        # Uma linha JSON por requisição, sem prefixos, para coletores de log
+        saida = logging.StreamHandler()
+        saida.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(saida)
+        logger.setLevel(logging.INFO)
+
+
+def iniciar_medicao():
+    """Garante as medições da requisição (before_request)"""
+    if instrumentacao_ativa():
+        medicoes_atuais()
+
+
+def registrar_server_timing(response):
+    """Adiciona o cabeçalho Server-Timing (after_request)"""
+    if instrumentacao_ativa():
+        medicoes = medicoes_atuais()
+        medicoes.encerrar()
+        g._status_resposta = response.status_code
+        response.headers['Server-Timing'] = medicoes.server_timing()
+    return response
+
+
+def registrar_log():
+    """Emite a linha de log estruturado da requisição (teardown_request)"""
+    if not (instrumentacao_ativa() and current_app.config.get('INSTRUMENTACAO_LOG', False)):
+        return
+    medicoes = g.get('_medicoes')
+    if medicoes is None:
+        return
+    total = medicoes.encerrar()
+    if total * 1000 < current_app.config.get('INSTRUMENTACAO_LOG_LIMIAR_MS', 0):
+        return
+    logger.info(json.dumps({
+        'metodo': request.method,
+        'rota': request.url_rule.rule if request.url_rule else request.path,
+        'status': g.get('_status_resposta'),
+        'total_ms': round(total * 1000, 2),
+        'sql_ms': round(medicoes.sql * 1000, 2),
+        'consultas': medicoes.consultas,
+        'serializacao_ms': round(medicoes.serializacao * 1000, 2),
+        'sessao_ms': round(medicoes.sessao * 1000, 2)
+    }, ensure_ascii=False))
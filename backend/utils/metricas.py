@@ -0,0 +1,336 @@
+"""
+Métricas da aplicação no formato de texto do Prometheus (GET /api/metrics)
+
+O registro fica no processo e é atualizado a cada requisição com uma seção
+crítica mínima (o bucket é calculado fora da trava; dentro dela há só uma
+busca em dicionário e dois incrementos). Threads de requisição são criadas
+e descartadas o tempo todo pelos servidores com threads, então não há
+fragmentos por thread para consolidar.
+
+Expõe:
+- fittrack_requisicoes_total{metodo, rota, status} e o histograma
+  fittrack_requisicao_duracao_segundos{metodo, rota};
+- conexões em uso e overflow do pool do banco;
+- acertos, falhas e taxa de acerto do cache de repositórios;
+- cálculos de senha em andamento ou na fila;
+- memória residente do processo.
+
+Vários workers (METRICAS_DIRETORIO): cada worker grava periodicamente um
+instantâneo em <diretorio>/<pid>.json, e quem recebe a coleta soma
+contadores e histogramas de todos os instantâneos recentes; medidores
+aparecem por worker, com o rótulo worker. Instantâneos sem atualização há
+mais de METRICAS_EXPIRACAO segundos (workers encerrados) são ignorados.
+"""
+
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Response, current_app, g, request
+
+EXTENSAO = 'metricas'
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Limites dos buckets de latência, em segundos (os padrões do Prometheus)
+LIMITES_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+DESCRICOES = {
+    'fittrack_requisicoes_total': ('counter', 'Requisições atendidas'),
+    'fittrack_requisicao_duracao_segundos': ('histogram', 'Duração das requisições até a resposta'),
+    'fittrack_db_pool_em_uso': ('gauge', 'Conexões do pool em uso'),
+    'fittrack_db_pool_overflow': ('gauge', 'Conexões além do tamanho do pool (negativo: vagas no pool)'),
+    'fittrack_db_pool_tamanho': ('gauge', 'Tamanho configurado do pool'),
+    'fittrack_cache_acertos_total': ('counter', 'Leituras atendidas pelo cache de repositórios'),
+    'fittrack_cache_falhas_total': ('counter', 'Leituras que foram ao banco'),
+    'fittrack_cache_invalidacoes_total': ('counter', 'Invalidações de usuário no cache'),
+    'fittrack_cache_erros_total': ('counter', 'Falhas de acesso ao cache'),
+    'fittrack_cache_taxa_acerto': ('gauge', 'Acertos / (acertos + falhas) do cache'),
+    'fittrack_cache_entradas': ('gauge', 'Entradas no armazenamento do cache'),
+    'fittrack_senhas_pendentes': ('gauge', 'Cálculos de hash de senha em andamento ou na fila'),
+    'fittrack_senhas_processos': ('gauge', 'Processos dedicados ao hash de senhas'),
+    'fittrack_processo_memoria_residente_bytes': ('gauge', 'Memória residente do processo'),
+}
+
+Rotulos = Tuple[Tuple[str, str], ...]
+Coletor = Callable[[], Iterable[Tuple[str, Rotulos, float]]]
+
+
+class RegistroMetricas:
+    """Contadores, histogramas e medidores (coletores chamados na exportação)"""
+    
+    def __init__(self, limites: Iterable[float] = LIMITES_PADRAO):
+        self.limites = tuple(limites)
+        self._contadores: Dict[Tuple[str, Rotulos], float] = {}
+        # [contagem de cada bucket (o último é +Inf), soma]
+        self._histogramas: Dict[Tuple[str, Rotulos], List[float]] = {}
+        self._coletores: List[Coletor] = []
+        self._trava = threading.Lock()
+    
+    def incrementar(self, nome: str, rotulos: Rotulos = (), valor: float = 1):
+        chave = (nome, rotulos)
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+    
+    def observar(self, nome: str, rotulos: Rotulos, valor: float):
+        chave = (nome, rotulos)
+        bucket = bisect_left(self.limites, valor)
+        with self._trava:
+            dados = self._histogramas.get(chave)
+            if dados is None:
+                dados = self._histogramas[chave] = [0] * (len(self.limites) + 1) + [0.0]
+            dados[bucket] += 1
+            dados[-1] += valor
+    
+    def registrar_coletor(self, coletor: Coletor):
+        """coletor() -> [(nome, rótulos, valor)], chamado a cada exportação"""
+        self._coletores.append(coletor)
+    
+    def instantaneo(self) -> Dict:
+        """Cópia serializável em JSON do estado atual, com os medidores coletados agora"""
+        with self._trava:
+            contadores = [[nome, list(rotulos), valor] for (nome, rotulos), valor in self._contadores.items()]
+            histogramas = [[nome, list(rotulos), list(dados)] for (nome, rotulos), dados in self._histogramas.items()]
+        medidores = []
+        for coletor in self._coletores:
+            for nome, rotulos, valor in coletor():
+                medidores.append([nome, list(rotulos), valor])
+        return {
+            'pid': os.getpid(),
+            'atualizado': time.time(),
+            'limites': list(self.limites),
+            'contadores': contadores,
+            'histogramas': histogramas,
+            'medidores': medidores
+        }
+
+
+class MetricasAplicacao:
+    """Registro da aplicação, gravação dos instantâneos e exportação"""
+    
+    def __init__(self, registro: RegistroMetricas, diretorio: Optional[str] = None,
+                 intervalo: float = 10, expiracao: float = 300):
+        self.registro = registro
+        self.diretorio = diretorio
+        self.intervalo = intervalo
+        self.expiracao = expiracao
+        self._proxima_gravacao = 0.0
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+    
+    def registrar_requisicao(self, metodo: str, rota: str, status: int, duracao: float):
+        self.registro.incrementar('fittrack_requisicoes_total', (('metodo', metodo), ('rota', rota), ('status', str(status))))
+        self.registro.observar('fittrack_requisicao_duracao_segundos', (('metodo', metodo), ('rota', rota)), duracao)
+        if self.diretorio and time.monotonic() >= self._proxima_gravacao:
+            self.gravar_instantaneo()
+    
+    def gravar_instantaneo(self) -> Dict:
+        """Grava o instantâneo deste worker em METRICAS_DIRETORIO (troca atômica do arquivo)"""
+        self._proxima_gravacao = time.monotonic() + self.intervalo
+        instantaneo = self.registro.instantaneo()
+        caminho = os.path.join(self.diretorio, f"{instantaneo['pid']}.json")
+        temporario = f'{caminho}.{threading.get_ident()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(instantaneo, arquivo)
+        os.replace(temporario, caminho)
+        return instantaneo
+    
+    def _instantaneos(self) -> List[Dict]:
+        if not self.diretorio:
+            return [self.registro.instantaneo()]
+        proprio = self.gravar_instantaneo()
+        instantaneos = [proprio]
+        limite = time.time() - self.expiracao
+        for caminho in glob.glob(os.path.join(self.diretorio, '*.json')):
+            try:
+                with open(caminho, encoding='utf-8') as arquivo:
+                    instantaneo = json.load(arquivo)
+            except (OSError, ValueError):
+                continue  # arquivo sendo substituído ou removido
+            if instantaneo['pid'] != proprio['pid'] and instantaneo['atualizado'] >= limite:
+                instantaneos.append(instantaneo)
+        return instantaneos
+    
+    def exportar(self) -> str:
+        """Texto no formato de exposição do Prometheus, agregando os workers"""
+        contadores: Dict[Tuple[str, Rotulos], float] = {}
+        histogramas: Dict[Tuple[str, Rotulos], List[float]] = {}
+        medidores: Dict[Tuple[str, Rotulos], float] = {}
+        for instantaneo in self._instantaneos():
+            for nome, rotulos, valor in instantaneo['contadores']:
+                chave = (nome, tuple(map(tuple, rotulos)))
+                contadores[chave] = contadores.get(chave, 0) + valor
+            if instantaneo['limites'] == list(self.registro.limites):
+                # Workers com outra configuração de buckets ficam de fora dos histogramas
+                for nome, rotulos, dados in instantaneo['histogramas']:
+                    chave = (nome, tuple(map(tuple, rotulos)))
+                    anteriores = histogramas.get(chave)
+                    histogramas[chave] = [a + b for a, b in zip(anteriores, dados)] if anteriores else dados
+            for nome, rotulos, valor in instantaneo['medidores']:
+                rotulos = tuple(map(tuple, rotulos))
+                if self.diretorio:
+                    rotulos += (('worker', str(instantaneo['pid'])),)
+                medidores[(nome, rotulos)] = valor
+        
+        series: Dict[str, List[str]] = {}
+        for (nome, rotulos), valor in sorted({**contadores, **medidores}.items()):
+            series.setdefault(nome, []).append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+        for (nome, rotulos), dados in sorted(histogramas.items()):
+            series.setdefault(nome, []).extend(self._linhas_histograma(nome, rotulos, dados))
+        
+        linhas = []
+        for nome in sorted(series):
+            tipo, ajuda = DESCRICOES.get(nome, ('untyped', nome))
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+            linhas.extend(series[nome])
+        return '\n'.join(linhas) + '\n'
+    
+    def _linhas_histograma(self, nome: str, rotulos: Rotulos, dados: List[float]) -> List[str]:
+        linhas = []
+        acumulado = 0
+        for limite, quantidade in zip((*map(_numero, self.registro.limites), '+Inf'), dados):
+            acumulado += quantidade
+            linhas.append(f'{nome}_bucket{_rotulos(rotulos + (("le", limite),))} {_numero(acumulado)}')
+        linhas.append(f'{nome}_sum{_rotulos(rotulos)} {_numero(dados[-1])}')
+        linhas.append(f'{nome}_count{_rotulos(rotulos)} {_numero(acumulado)}')
+        return linhas
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(rotulos: Rotulos) -> str:
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos) + '}'
+
+
+def _numero(valor) -> str:
+    if isinstance(valor, float):
+        return str(int(valor)) if valor.is_integer() else repr(valor)
+    return str(valor)
+
+
+def memoria_residente() -> Optional[int]:
+    """Memória residente atual em bytes (Linux); nos demais sistemas, o pico"""
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    return pico if os.uname().sysname == 'Darwin' else pico * 1024
+
+
+def _coletor_pool(engine) -> Coletor:
+    pool = engine.pool
+    
+    def coletar():
+        if hasattr(pool, 'checkedout'):
+            yield 'fittrack_db_pool_em_uso', (), pool.checkedout()
+        if hasattr(pool, 'overflow'):
+            yield 'fittrack_db_pool_overflow', (), pool.overflow()
+        if hasattr(pool, 'size'):
+            yield 'fittrack_db_pool_tamanho', (), pool.size()
+    return coletar
+
+
+def _coletor_cache(cache) -> Coletor:
+    def coletar():
+        estatisticas = cache.estatisticas()
+        yield 'fittrack_cache_acertos_total', (), estatisticas['acertos']
+        yield 'fittrack_cache_falhas_total', (), estatisticas['falhas']
+        yield 'fittrack_cache_invalidacoes_total', (), estatisticas['invalidacoes']
+        yield 'fittrack_cache_erros_total', (), estatisticas['erros']
+        yield 'fittrack_cache_taxa_acerto', (), estatisticas['taxa_acerto']
+        if 'entradas' in estatisticas:
+            yield 'fittrack_cache_entradas', (), estatisticas['entradas']
+    return coletar
+
+
+def _coletor_senhas(hasher) -> Coletor:
+    def coletar():
+        yield 'fittrack_senhas_pendentes', (), hasher.pendentes
+        yield 'fittrack_senhas_processos', (), hasher.processos
+    return coletar
+
+
+def _coletor_processo():
+    memoria = memoria_residente()
+    if memoria is not None:
+        yield 'fittrack_processo_memoria_residente_bytes', (), memoria
+
+
+def configurar_metricas(app, db):
+    """Cria o registro da aplicação com os coletores de pool, cache, senhas e memória"""
+    if not app.config.get('METRICAS', True):
+        return None
+    registro = RegistroMetricas()
+    with app.app_context():
+        registro.registrar_coletor(_coletor_pool(db.engine))
+    servicos = app.extensions.get('servicos')
+    if servicos is not None and servicos.cache is not None:
+        registro.registrar_coletor(_coletor_cache(servicos.cache))
+    if 'senhas' in app.extensions:
+        registro.registrar_coletor(_coletor_senhas(app.extensions['senhas']))
+    registro.registrar_coletor(_coletor_processo)
+    
+    metricas = MetricasAplicacao(
+        registro,
+        app.config.get('METRICAS_DIRETORIO'),
+        app.config.get('METRICAS_INTERVALO', 10),
+        app.config.get('METRICAS_EXPIRACAO', 300)
+    )
+    app.extensions[EXTENSAO] = metricas
+    return metricas
+
+
+def iniciar_requisicao():
+    """Marca o início da requisição (before_request)"""
+    g._inicio_metricas = time.perf_counter()
+
+
+def registrar_requisicao(response):
+    """Conta a requisição e sua duração pela regra da rota (after_request)"""
+    metricas = current_app.extensions.get(EXTENSAO)
+    inicio = g.get('_inicio_metricas')
+    if metricas is not None and inicio is not None:
+        rota = request.url_rule.rule if request.url_rule else 'desconhecida'
+        metricas.registrar_requisicao(request.method, rota, response.status_code, time.perf_counter() - inicio)
+    return response
+
+
+def coletor_autorizado() -> bool:
+    """Coleta com 'Authorization: Bearer <METRICAS_TOKEN>' ou de um endereço em METRICAS_IPS
+    
+    Sem token nem endereços configurados, só é aberta com METRICAS_PUBLICAS.
+    """
+    config = current_app.config
+    if request.remote_addr in config.get('METRICAS_IPS', ()):
+        return True
+    token = config.get('METRICAS_TOKEN')
+    if token:
+        autorizacao = request.headers.get('Authorization', '').encode()
+        return hmac.compare_digest(autorizacao, f'Bearer {token}'.encode())
+    return not config.get('METRICAS_IPS') and bool(config.get('METRICAS_PUBLICAS', False))
+
+
+def resposta_metricas():
+    """Resposta de GET /api/metrics, só para coletores autorizados (coletor_autorizado)"""
+    metricas = current_app.extensions.get(EXTENSAO)
+    if metricas is None:
+        return Response('Métricas desativadas\n', status=404, mimetype='text/plain')
+    if not coletor_autorizado():
+        return Response('Não autorizado\n', status=401, mimetype='text/plain')
+    return Response(metricas.exportar(), content_type=TIPO_CONTEUDO)
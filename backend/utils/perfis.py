@@ -0,0 +1,193 @@
+"""
+Perfis de requisições individuais com cProfile (PERFIS)
+
+Uma requisição é executada sob cProfile quando:
+- traz o cabeçalho X-Perfil ou o parâmetro ?perfil= com o valor de
+  PERFIS_TOKEN, ou vem de um endereço em PERFIS_IPS (qualquer valor); ou
+- é sorteada pela taxa PERFIS_AMOSTRAGEM (0.0 a 1.0).
+
+O perfil vai de before_request ao fim da requisição (teardown, depois da
+gravação da sessão) e é gravado em PERFIS_DIRETORIO como <nome>.prof
+(abrir com pstats, snakeviz etc.), com um <nome>.json ao lado contendo
+rota, usuário, duração e as funções de maior tempo acumulado. Só os
+PERFIS_MAXIMO perfis mais recentes são mantidos. A resposta traz o nome do
+perfil no cabeçalho X-Perfil.
+
+GET /api/perfis lista os perfis e GET /api/perfis/<nome> baixa o .prof,
+ambos apenas para os mesmos chamadores autorizados. Trechos executados pelo
+escritor único (ESCRITA_SERIALIZADA) rodam em outra thread e não aparecem
+no perfil.
+"""
+
+import cProfile
+import glob
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import current_app, g, jsonify, request, send_from_directory
+
+CABECALHO = 'X-Perfil'
+FUNCOES_NO_RESUMO = 15
+_NOME_VALIDO = re.compile(r'[\w.-]+')
+
+logger = logging.getLogger(__name__)
+
+
+def diretorio_perfis(app) -> str:
+    return app.config.get('PERFIS_DIRETORIO') or os.path.join(app.instance_path, 'perfis')
+
+
+def chamador_autorizado() -> bool:
+    """Chamador com o token de PERFIS_TOKEN ou endereço em PERFIS_IPS"""
+    config = current_app.config
+    if request.remote_addr in config.get('PERFIS_IPS', ()):
+        return True
+    token = config.get('PERFIS_TOKEN')
+    informado = request.headers.get(CABECALHO) or request.args.get('perfil') or ''
+    return bool(token) and hmac.compare_digest(informado.encode(), token.encode())
+
+
+def _motivo() -> Optional[str]:
+    if request.headers.get(CABECALHO) is not None or 'perfil' in request.args:
+        return 'solicitado' if chamador_autorizado() else None
+    amostragem = current_app.config.get('PERFIS_AMOSTRAGEM', 0.0)
+    if amostragem and random.random() < amostragem:
+        return 'amostragem'
+    return None
+
+
+def iniciar_perfil():
+    """Inicia o cProfile se a requisição foi solicitada ou sorteada (before_request)"""
+    if not current_app.config.get('PERFIS', False) or request.path.startswith('/api/perfis'):
+        return
+    motivo = _motivo()
+    if motivo is None:
+        return
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        return  # outro profiler já ativo nesta thread
+    rota = re.sub(r'\W+', '_', request.url_rule.rule if request.url_rule else request.path).strip('_')
+    g._perfil = {
+        'perfil': perfil,
+        'nome': f"{datetime.utcnow():%Y%m%dT%H%M%S}-{request.method}-{rota or 'raiz'}-{uuid.uuid4().hex[:8]}",
+        'motivo': motivo,
+        'inicio': time.perf_counter()
+    }
+
+
+def marcar_resposta(response):
+    """Informa o nome do perfil na resposta (after_request)"""
+    dados = g.get('_perfil')
+    if dados is not None:
+        dados['status'] = response.status_code
+        response.headers[CABECALHO] = dados['nome']
+    return response
+
+
+def finalizar_perfil():
+    """Encerra o cProfile e grava o perfil e o resumo (teardown_request)"""
+    dados = g.pop('_perfil', None)
+    if dados is None:
+        return
+    perfil = dados['perfil']
+    perfil.disable()
+    duracao = time.perf_counter() - dados['inicio']
+    
+    diretorio = diretorio_perfis(current_app)
+    try:
+        _gravar(diretorio, dados, perfil, duracao)
+    except OSError as erro:
+        logger.warning('Falha ao gravar o perfil %s: %s', dados['nome'], erro)
+        return
+    rotacionar(diretorio, current_app.config.get('PERFIS_MAXIMO', 50))
+
+
+def _gravar(diretorio: str, dados: Dict, perfil: cProfile.Profile, duracao: float):
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, dados['nome'])
+    perfil.dump_stats(caminho + '.prof')
+    
+    with open(caminho + '.json', 'w', encoding='utf-8') as arquivo:
+        json.dump({
+            'nome': dados['nome'],
+            'data': datetime.utcnow().isoformat(timespec='seconds'),
+            'metodo': request.method,
+            'caminho': request.path,
+            # Sem ?perfil=, que pode conter o token
+            'parametros': {chave: valor for chave, valor in request.args.items() if chave != 'perfil'},
+            'rota': request.url_rule.rule if request.url_rule else None,
+            'status': dados.get('status'),
+            'usuario_id': g.get('usuario_id'),
+            'motivo': dados['motivo'],
+            'duracao_ms': round(duracao * 1000, 2),
+            'funcoes': resumo(perfil)
+        }, arquivo, ensure_ascii=False, indent=2)
+
+
+def resumo(perfil: cProfile.Profile, limite: int = FUNCOES_NO_RESUMO) -> List[Dict]:
+    """Funções de maior tempo acumulado: [{funcao, chamadas, proprio_ms, acumulado_ms}]"""
+    estatisticas = pstats.Stats(perfil, stream=io.StringIO())
+    linhas = sorted(estatisticas.stats.items(), key=lambda item: item[1][3], reverse=True)[:limite]
+    return [
+        {
+            'funcao': f'{os.path.basename(arquivo)}:{linha}({funcao})',
+            'chamadas': chamadas,
+            'proprio_ms': round(proprio * 1000, 3),
+            'acumulado_ms': round(acumulado * 1000, 3)
+        }
+        for (arquivo, linha, funcao), (_, chamadas, proprio, acumulado, _) in linhas
+    ]
+
+
+def rotacionar(diretorio: str, maximo: int):
+    """Remove os perfis mais antigos além de maximo"""
+    perfis = sorted(glob.glob(os.path.join(diretorio, '*.prof')), key=_data_modificacao)
+    for caminho in perfis[:max(len(perfis) - maximo, 0)]:
+        for arquivo in (caminho, caminho[:-len('.prof')] + '.json'):
+            try:
+                os.remove(arquivo)
+            except FileNotFoundError:
+                pass  # removido por outra requisição ao mesmo tempo
+
+
+def _data_modificacao(caminho: str) -> float:
+    try:
+        return os.path.getmtime(caminho)
+    except OSError:
+        return 0.0
+
+
+def indice_perfis():
+    """Resposta de GET /api/perfis: resumos dos perfis, do mais recente ao mais antigo"""
+    if not (current_app.config.get('PERFIS', False) and chamador_autorizado()):
+        return jsonify({'mensagem': 'Recurso não encontrado', 'status': 404}), 404
+    perfis = []
+    diretorio = diretorio_perfis(current_app)
+    for caminho in sorted(glob.glob(os.path.join(diretorio, '*.json')), key=_data_modificacao, reverse=True):
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                perfis.append(json.load(arquivo))
+        except (OSError, ValueError):
+            continue  # rotacionado durante a leitura
+    return jsonify({'perfis': perfis, 'total': len(perfis)}), 200
+
+
+def baixar_perfil(nome: str):
+    """Resposta de GET /api/perfis/<nome>: o arquivo .prof"""
+    if not (current_app.config.get('PERFIS', False) and chamador_autorizado()) or not _NOME_VALIDO.fullmatch(nome):
+        return jsonify({'mensagem': 'Recurso não encontrado', 'status': 404}), 404
+    return send_from_directory(
+        os.path.abspath(diretorio_perfis(current_app)), f'{nome}.prof', mimetype='application/octet-stream', as_attachment=True
+    )
@@ -0,0 +1,136 @@
+"""
+Hash e verificação de senhas fora da thread da requisição
+
+O pbkdf2 do Werkzeug é propositalmente caro em CPU. Com SENHA_PROCESSOS > 0
+o cálculo roda em um pool de processos com fila limitada: quando a fila
+enche, FilaSenhasCheia é lançada (o serviço responde 503) em vez de as
+requisições se acumularem. Com SENHA_PROCESSOS = 0 o cálculo é feito na
+própria thread (usado nos testes).
+"""
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+EXTENSAO = 'senhas'
+
+
+class FilaSenhasCheia(Exception):
+    """Todos os processos ocupados e a fila de espera cheia"""
+
+
+def _gerar_hash(senha: str, metodo: str, tamanho_salt: int) -> str:
+    return generate_password_hash(senha, method=metodo, salt_length=tamanho_salt)
+
+
+def _verificar(senha_hash: str, senha: str) -> bool:
+    return check_password_hash(senha_hash, senha)
+
+
+class HasherSenhas:
+    """Gera e verifica hashes de senha com parâmetros configuráveis"""
+    
+    def __init__(self, metodo: str = 'pbkdf2:sha256:600000', tamanho_salt: int = 16,
+                 processos: int = 0, fila_maxima: int = 64):
+        self.metodo = metodo
+        self.tamanho_salt = tamanho_salt
+        self.processos = processos
+        # Tarefas em execução mais as que aguardam um processo livre
+        self._vagas = threading.BoundedSemaphore(processos + fila_maxima) if processos else None
+        self._pool = None
+        self._trava = threading.Lock()
+        self._prefixo = None
+        self._pendentes = 0
+    
+    @classmethod
+    def a_partir_da_config(cls, config) -> 'HasherSenhas':
+        """Cria o hasher com as chaves SENHA_* da configuração"""
+        return cls(
+            metodo=config.get('SENHA_METODO', 'pbkdf2:sha256:600000'),
+            tamanho_salt=config.get('SENHA_TAMANHO_SALT', 16),
+            processos=config.get('SENHA_PROCESSOS', 0),
+            fila_maxima=config.get('SENHA_FILA_MAXIMA', 64)
+        )
+    
+    def init_app(self, app):
+        """Registra o hasher em app.extensions"""
+        app.extensions[EXTENSAO] = self
+        return self
+    
+    def gerar_hash(self, senha: str) -> str:
+        """Hash da senha com os parâmetros atuais"""
+        return self._executar(_gerar_hash, senha, self.metodo, self.tamanho_salt)
+    
+    def verificar(self, senha_hash: Optional[str], senha: str) -> bool:
+        """Verifica a senha contra um hash (de quaisquer parâmetros)"""
+        if not senha_hash:
+            return False
+        return self._executar(_verificar, senha_hash, senha)
+    
+    def precisa_rehash(self, senha_hash: Optional[str]) -> bool:
+        """Indica se o hash foi gerado com parâmetros diferentes dos atuais"""
+        return bool(senha_hash) and senha_hash.split('$', 1)[0] != self.prefixo
+    
+    @property
+    def prefixo(self) -> str:
+        """Prefixo 'metodo:algoritmo:iteracoes' dos hashes gerados agora
+        
+        Calculado uma vez a partir de um hash real, pois SENHA_METODO pode
+        omitir partes (ex.: 'pbkdf2' completa algoritmo e iterações).
+        """
+        if self._prefixo is None:
+            self._prefixo = _gerar_hash('', self.metodo, 1).split('$', 1)[0]
+        return self._prefixo
+    
+    @property
+    def pendentes(self) -> int:
+        """Cálculos em andamento nos processos ou aguardando um processo livre"""
+        return self._pendentes
+    
+    def encerrar(self):
+        """Finaliza os processos do pool, se existirem"""
+        with self._trava:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+    
+    def _executar(self, funcao, *args):
+        if not self.processos:
+            return funcao(*args)
+        if not self._vagas.acquire(blocking=False):
+            raise FilaSenhasCheia()
+        with self._trava:
+            self._pendentes += 1
+        try:
+            return self._obter_pool().submit(funcao, *args).result()
+        finally:
+            with self._trava:
+                self._pendentes -= 1
+            self._vagas.release()
+    
+    def _obter_pool(self) -> ProcessPoolExecutor:
+        # Criado sob demanda: processos só existem se alguém fizer login/registro.
+        # 'spawn' evita herdar via fork as threads e conexões do servidor.
+        with self._trava:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processos, mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(self.encerrar)
+            return self._pool
+
+
+# Usado fora de uma aplicação (scripts, testes unitários do domínio)
+PADRAO = HasherSenhas()
+
+
+def hasher_atual() -> HasherSenhas:
+    """Hasher da aplicação atual ou o padrão (execução na própria thread)"""
+    if has_app_context():
+        return current_app.extensions.get(EXTENSAO, PADRAO)
+    return PADRAO
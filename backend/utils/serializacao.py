@@ -0,0 +1,90 @@
+"""
+Serializadores pré-compilados e saída JSON compacta
+
+compilar(campos) gera uma única vez, por conjunto de campos, uma função que
+monta o dicionário de uma linha com acessos diretos (atributos de um objeto
+ORM ou posições de uma tupla de resultado), sem laço nem getattr por campo.
+As datas passam por um cache de isoformat(), útil quando muitas linhas
+compartilham o mesmo instante (importações em lote, data_criacao).
+
+Com SERIALIZACAO_COMPILADA = False as rotas voltam a usar serialize() dos
+modelos; benchmarks/bench_serializacao.py compara os dois caminhos.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Sequence
+
+from flask import current_app, has_app_context
+from flask.json.provider import DefaultJSONProvider
+
+from .instrumentacao import cronometrar_serializador
+
+# Campos datetime de cada modelo, formatados em ISO 8601
+DATAS = frozenset({'data_atividade', 'data_criacao', 'data_conclusao', 'data_alvo'})
+
+
+@lru_cache(maxsize=8192)
+def _isoformat_sem_fuso(valor: datetime) -> str:
+    return valor.isoformat()
+
+
+def formatar_data(valor):
+    """isoformat() com cache; None permanece None
+    
+    Só datetimes sem fuso passam pelo cache: dois com fuso que representam o
+    mesmo instante são iguais (e têm o mesmo hash) e receberiam um o offset
+    do outro.
+    """
+    if not isinstance(valor, datetime):
+        return valor
+    if valor.tzinfo is not None:
+        return valor.isoformat()
+    return _isoformat_sem_fuso(valor)
+
+
+@lru_cache(maxsize=256)
+def compilar(campos: Sequence[str], origem: str = 'objeto') -> Callable[..., Dict]:
+    """Função linha -> dict para os campos informados (tupla, na ordem da saída)
+    
+    origem 'objeto' lê atributos (linha.tipo); 'tupla' lê posições na ordem
+    de campos (linha[1]), como as linhas de um select() de colunas.
+    """
+    if origem not in ('objeto', 'tupla'):
+        raise ValueError(f'Origem inválida: {origem}')
+    
+    itens = []
+    for posicao, campo in enumerate(campos):
+        if not campo.isidentifier():
+            raise ValueError(f'Campo inválido: {campo!r}')
+        acesso = f'linha.{campo}' if origem == 'objeto' else f'linha[{posicao}]'
+        if campo in DATAS:
+            acesso = f'_data({acesso})'
+        itens.append(f'{campo!r}: {acesso}')
+    
+    codigo = f"def serializar(linha):\n    return {{{', '.join(itens)}}}\n"
+    escopo = {'_data': formatar_data}
+    exec(compile(codigo, f'<serializador {origem} {",".join(campos)}>', 'exec'), escopo)
+    return escopo['serializar']
+
+
+def serializador(campos: Sequence[str]) -> Callable[..., Dict]:
+    """Serializador de objetos ORM para campos, conforme SERIALIZACAO_COMPILADA"""
+    if has_app_context() and not current_app.config.get('SERIALIZACAO_COMPILADA', True):
+        return cronometrar_serializador(lambda objeto: objeto.serialize(campos))
+    return cronometrar_serializador(compilar(tuple(campos)))
+
+
+class JSONCompacto(DefaultJSONProvider):
+    """JSON sem espaços nem indentação (mesmo com DEBUG), chaves na ordem da
+    serialização e UTF-8 direto em vez de escapes \\uXXXX
+    """
+    
+    compact = True
+    sort_keys = False
+    ensure_ascii = False
+    
+    def dumps(self, obj, **kwargs):
+        # compact só afeta response(); app.json.dumps() usa os mesmos separadores
+        kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
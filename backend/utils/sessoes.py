@@ -0,0 +1,200 @@
+"""
+Armazenamento de sessões plugável (SESSION_BACKEND)
+
+- 'memoria': dicionário LRU no próprio processo, com expiração por TTL.
+  Mais rápido; só serve para um único processo.
+- 'sqlite': tabela em um arquivo SQLite em modo WAL, com limpeza periódica
+  das sessões expiradas. Compartilhado entre processos do mesmo host.
+- 'cookie': sessão assinada no próprio cookie (padrão do Flask), sem estado
+  no servidor; funciona com vários hosts.
+- 'filesystem': Flask-Session com um arquivo por sessão (comportamento antigo).
+
+Nos modos 'memoria' e 'sqlite' o cookie guarda apenas um identificador
+aleatório, e a sessão só é regravada quando é alterada: requisições que
+apenas leem a sessão não escrevem nada.
+"""
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface, SessionInterface
+from flask_session import Session
+
+BACKENDS_SESSAO = ('memoria', 'sqlite', 'cookie', 'filesystem')
+
+
+class ArmazenamentoMemoria:
+    """Sessões serializadas em memória, descartando as menos usadas e as expiradas"""
+    
+    def __init__(self, capacidade: int = 10000):
+        self.capacidade = capacidade
+        self._dados = OrderedDict()
+        self._trava = threading.Lock()
+    
+    def obter(self, sid: str) -> Optional[str]:
+        with self._trava:
+            item = self._dados.get(sid)
+            if item is None:
+                return None
+            dados, expira = item
+            if expira <= time.time():
+                del self._dados[sid]
+                return None
+            self._dados.move_to_end(sid)
+            return dados
+    
+    def gravar(self, sid: str, dados: str, ttl: float):
+        with self._trava:
+            self._dados[sid] = (dados, time.time() + ttl)
+            self._dados.move_to_end(sid)
+            while len(self._dados) > self.capacidade:
+                self._dados.popitem(last=False)
+    
+    def remover(self, sid: str):
+        with self._trava:
+            self._dados.pop(sid, None)
+    
+    def __len__(self):
+        return len(self._dados)
+
+
+class ArmazenamentoSQLite:
+    """Sessões em uma tabela SQLite (WAL), com limpeza periódica das expiradas"""
+    
+    def __init__(self, caminho: str, intervalo_limpeza: float = 300):
+        self.caminho = caminho
+        self.intervalo_limpeza = intervalo_limpeza
+        self._local = threading.local()
+        self._ultima_limpeza = time.time()
+        self._trava_limpeza = threading.Lock()
+        self._conexao().execute(
+            'CREATE TABLE IF NOT EXISTS sessoes (sid TEXT PRIMARY KEY, dados TEXT NOT NULL, expira REAL NOT NULL)'
+        )
+    
+    def _conexao(self) -> sqlite3.Connection:
+        # Uma conexão por thread; autocommit, cada comando é sua própria transação
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, isolation_level=None, check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            conexao.execute('PRAGMA busy_timeout=5000')
+            self._local.conexao = conexao
+        return conexao
+    
+    def obter(self, sid: str) -> Optional[str]:
+        linha = self._conexao().execute(
+            'SELECT dados FROM sessoes WHERE sid = ? AND expira > ?', (sid, time.time())
+        ).fetchone()
+        return linha[0] if linha else None
+    
+    def gravar(self, sid: str, dados: str, ttl: float):
+        agora = time.time()
+        self._conexao().execute(
+            'INSERT OR REPLACE INTO sessoes (sid, dados, expira) VALUES (?, ?, ?)', (sid, dados, agora + ttl)
+        )
+        self._limpar_se_necessario(agora)
+    
+    def remover(self, sid: str):
+        self._conexao().execute('DELETE FROM sessoes WHERE sid = ?', (sid,))
+    
+    def limpar_expiradas(self) -> int:
+        """Remove as sessões expiradas e retorna quantas foram removidas"""
+        return self._conexao().execute('DELETE FROM sessoes WHERE expira <= ?', (time.time(),)).rowcount
+    
+    def _limpar_se_necessario(self, agora: float):
+        # Só uma thread faz a limpeza; as demais seguem sem esperar
+        if agora - self._ultima_limpeza < self.intervalo_limpeza or not self._trava_limpeza.acquire(blocking=False):
+            return
+        try:
+            self._ultima_limpeza = agora
+            self.limpar_expiradas()
+        finally:
+            self._trava_limpeza.release()
+
+
+class SessaoServidor(SecureCookieSession):
+    """Sessão guardada no servidor, identificada pelo cookie"""
+    
+    def __init__(self, initial=None, sid=None, nova=False):
+        super().__init__(initial)
+        self.sid = sid
+        self.nova = nova
+
+
+class InterfaceSessaoServidor(SessionInterface):
+    """SessionInterface que delega o conteúdo das sessões a um armazenamento"""
+    
+    serializador = TaggedJSONSerializer()
+    
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+    
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            dados = self.armazenamento.obter(sid)
+            if dados is not None:
+                return SessaoServidor(self.serializador.loads(dados), sid=sid)
+        return SessaoServidor(sid=secrets.token_urlsafe(32), nova=True)
+    
+    def save_session(self, app, session, response):
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho = self.get_cookie_path(app)
+        
+        if session.accessed:
+            response.vary.add('Cookie')
+        
+        if not session:
+            if session.modified:
+                self.armazenamento.remover(session.sid)
+                response.delete_cookie(nome, domain=dominio, path=caminho)
+            return
+        
+        if not self.should_set_cookie(app, session):
+            return
+        
+        if session.modified or session.nova:
+            ttl = app.permanent_session_lifetime.total_seconds()
+            self.armazenamento.gravar(session.sid, self.serializador.dumps(dict(session)), ttl)
+        
+        response.set_cookie(
+            nome,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=dominio,
+            path=caminho,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def configurar_sessoes(app):
+    """Configura o armazenamento de sessões indicado por SESSION_BACKEND"""
+    backend = app.config.get('SESSION_BACKEND', 'filesystem')
+    
+    if backend == 'filesystem':
+        Session(app)
+    elif backend == 'cookie':
+        app.session_interface = SecureCookieSessionInterface()
+    elif backend == 'memoria':
+        app.session_interface = InterfaceSessaoServidor(
+            ArmazenamentoMemoria(app.config.get('SESSION_MEMORIA_CAPACIDADE', 10000))
+        )
+    elif backend == 'sqlite':
+        caminho = app.config.get('SESSION_SQLITE_CAMINHO') or os.path.join(app.instance_path, 'sessoes.db')
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        app.session_interface = InterfaceSessaoServidor(
+            ArmazenamentoSQLite(caminho, app.config.get('SESSION_LIMPEZA_INTERVALO', 300))
+        )
+    else:
+        raise ValueError(f"SESSION_BACKEND inválido: {backend}. Use: {', '.join(BACKENDS_SESSAO)}")
+    return app.session_interface